@@ -1,9 +1,18 @@
 import pygame as pg
 import sys
 import json
+import argparse
 import random  
+import time
 from src.game_manager import GameManager
+from src.input_state import InputState
+from src.replay import InputRecorder
+from src.state_hash import StateHashLog
 from src.gui.gui_manager import GUIManager
+from src import assets
+from src.sim_clock import FixedStepClock, UNTHROTTLED
+from src.gui.interpolation import RenderInterpolator
+from src.room_prefetch import SwitchSpikeMeter
 
 BGM_CHANNEL = 0  
 
@@ -39,8 +48,28 @@ def stop_bgm():
     pg.mixer.Channel(BGM_CHANNEL).stop()
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options for simulation speed, render decimation, input recording and hash logs"""
+    parser = argparse.ArgumentParser(description="Tomb Raider: Maze Adventure")
+    parser.add_argument("--speed", default=None,
+                        help="simulation rate multiplier, e.g. 1 or 4, or 'unthrottled'")
+    parser.add_argument("--render-every", type=int, default=None,
+                        help="draw only every Nth frame while the simulation keeps running")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="record the input of this session to PATH for python -m src.replay")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the item layout (picked at random when recording without one)")
+    parser.add_argument("--hash-log", default=None, metavar="PATH",
+                        help="write every tick's state hashes to PATH, for python -m src.state_hash")
+    args = parser.parse_args(argv)
+    if args.speed not in (None, UNTHROTTLED):
+        args.speed = float(args.speed)
+    return args
+
+
+def main(argv=None):
     """Main game loop and initialization"""
+    args = parse_args(argv)
     config = load_config()
     bgm = init_audio(config)
     pg.init()
@@ -51,8 +80,26 @@ def main():
         print("Warning: Could not load window icon")
     screen = pg.display.set_mode((config["game"]["screen_width"], config["game"]["screen_height"]))
     pg.display.set_caption("Tomb Raider: Maze Adventure")
-    game_manager = GameManager(config)
+    assets.set_memory_budget(config.get("assets", {}).get("memory_budget_mb", 64) * 1024 * 1024)
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.getrandbits(32)
+    game_manager = GameManager(config, seed=seed)
+    recorder = InputRecorder(game_manager, seed) if args.record else None
+    if args.hash_log:
+        game_manager.hash_log = StateHashLog()
+
+    def save_recording():
+        """Write the input recording and the state hash log, if this session keeps them"""
+        if recorder is not None:
+            size = recorder.save(args.record, game_manager)
+            print(f"Recorded {len(recorder.inputs)} ticks to {args.record} ({size} bytes)")
+        if args.hash_log:
+            game_manager.hash_log.save(args.hash_log)
+
     gui_manager = GUIManager(config)
+    game_manager.prefetcher.add_preparer(
+        "layer", lambda room_id, room_data: gui_manager.get_room_layer(room_id, room_data, game_manager.rooms_config))
     current_totals = game_manager.get_current_enemy_totals()
     gui_manager.enemy_counts = {t: current_totals.get(t, 0) for t in gui_manager.enemy_types}
 
@@ -62,10 +109,13 @@ def main():
             stop_bgm()
             play_bgm(bgm, 'game')
             gui_manager.current_screen = "game"
+            if recorder is not None:
+                recorder.event("start")
             game_manager.enemy_manager.activate_room(game_manager.player.current_room)
         
         def quit_game():
             stop_bgm()
+            save_recording()
             pg.quit()
             sys.exit()
         
@@ -82,6 +132,8 @@ def main():
         def restart_game():
             stop_bgm()
             play_bgm(bgm, 'game')
+            if recorder is not None:
+                recorder.event("restart")
             game_manager.restart_game()
             gui_manager.victory = False
             gui_manager.current_screen = "game"
@@ -100,7 +152,11 @@ def main():
                     play_bgm(bgm, 'win')
                 else:
                     play_bgm(bgm, 'die')
-            game_manager.randomize_enemies(counts)
+            # An explicit seed lets a recording reproduce the layout.
+            enemy_seed = random.getrandbits(64)
+            if recorder is not None:
+                recorder.event("randomize", counts=dict(counts), seed=enemy_seed)
+            game_manager.randomize_enemies(counts, enemy_seed)
             current_totals = game_manager.get_current_enemy_totals()
             gui_manager.enemy_counts.update(current_totals)
                 
@@ -125,47 +181,113 @@ def main():
 
     restart_game, quit_game, open_settings_from_end = setup_gui_callbacks()
     clock = pg.time.Clock()
+    sim_clock = FixedStepClock.from_config(config, speed=args.speed, render_every=args.render_every)
+    display_fps = config.get("simulation", {}).get("display_fps", 60)
+    interpolator = RenderInterpolator() if config.get("simulation", {}).get("interpolate", True) else None
     running = True
     play_bgm(bgm, 'start')
 
+    death_ticks = 0
+    spike_meter = SwitchSpikeMeter()
+
+    def show_death_screen():
+        stop_bgm()
+        play_bgm(bgm, 'die')
+        gui_manager.victory = False
+        gui_manager.show_end_buttons(
+            restart_action=restart_game,
+            quit_action=quit_game,
+            settings_action=open_settings_from_end
+        )
+        gui_manager.current_screen = "end"
+
     while running:
+        frame_start = time.perf_counter()
+        switches = game_manager.prefetcher.switches
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 running = False
             if event.type == pg.KEYDOWN and gui_manager.current_screen == "game":
                 if event.key == pg.K_SPACE:
                     game_manager.player.shoot()
+                    if recorder is not None:
+                        recorder.shoot()
+                elif event.key == pg.K_F5:
+                    game_manager.save_game()
+                    game_manager.show_tip("Game saved", 2)
+                elif event.key == pg.K_F9 and death_ticks == 0:
+                    if game_manager.load_game():
+                        if recorder is not None:
+                            recorder.load(game_manager.save_path)
+                        game_manager.show_tip("Game loaded", 2)
+                        if gui_manager.dirty_renderer is not None:
+                            gui_manager.dirty_renderer.request_full_repaint()
+                    else:
+                        game_manager.show_tip("No save game to load", 2)
             gui_manager.handle_events(event)
             game_manager.minimap.handle_events(event)
 
         if gui_manager.current_screen == "game":
-            game_manager.update()
-            if game_manager.check_chest_and_exit(gui_manager, restart_game, quit_game, open_settings_from_end):
-                stop_bgm()
-                play_bgm(bgm, 'win')
-                continue
-            if game_manager.is_player_dead():
-                game_manager.show_tip("You Died!", 1)
-                draw_game_frame(screen, game_manager, gui_manager)
-                pg.display.flip()
-                pg.time.wait(1000)
-                stop_bgm()
-                play_bgm(bgm, 'die')
-                gui_manager.victory = False
-                gui_manager.show_end_buttons(
-                    restart_action=restart_game,
-                    quit_action=quit_game,
-                    settings_action=open_settings_from_end
-                )
-                gui_manager.current_screen = "end"
+            won = False
+            keys = pg.key.get_pressed()
+            inputs = InputState.from_keys(keys) if recorder is not None else None
+            for _ in sim_clock.steps():
+                if death_ticks > 0:
+                    death_ticks -= 1
+                    if death_ticks == 0:
+                        show_death_screen()
+                        break
+                    continue
+                if interpolator is not None and sim_clock.last_step:
+                    interpolator.capture(game_manager)
+                if recorder is not None:
+                    recorder.tick(inputs)
+                game_manager.update(keys)
+                if game_manager.check_chest_and_exit(gui_manager, restart_game, quit_game, open_settings_from_end):
+                    stop_bgm()
+                    play_bgm(bgm, 'win')
+                    won = True
+                    break
+                if game_manager.is_player_dead():
+                    game_manager.show_tip("You Died!", 1)
+                    death_ticks = sim_clock.tick_rate
+                    break
+            if won:
                 continue
+        else:
+            sim_clock.reset()
 
-        draw_current_screen(screen, game_manager, gui_manager)
-        pg.display.flip()
-        clock.tick(60)
+        if sim_clock.should_render():
+            interpolate = (interpolator is not None and gui_manager.current_screen == "game"
+                           and death_ticks == 0)
+            if interpolate:
+                interpolator.apply(game_manager, sim_clock.alpha)
+            draw_current_screen(screen, game_manager, gui_manager)
+            if interpolate:
+                interpolator.restore()
+            gui_manager.present()
+        if gui_manager.current_screen == "game":
+            spike_meter.add(time.perf_counter() - frame_start, game_manager.prefetcher.switches != switches)
+            # Whatever is left of the frame goes to preparing the rooms the player is heading for.
+            game_manager.run_prefetch()
+        if not sim_clock.unthrottled:
+            clock.tick(display_fps)
     
     stop_bgm()
+    save_recording()
     game_manager.item_manager.save_state()
+    game_manager.writer.close()
+    writes = game_manager.writer.get_stats()
+    if writes["writes"] or writes["failures"]:
+        print(f"File writes: {writes['writes']} ({writes['coalesced']} coalesced, {writes['failures']} failed), "
+              f"{writes['avg_write_ms']:.1f} ms avg, {writes['max_latency_ms']:.1f} ms max latency off the main loop")
+    report = spike_meter.report()
+    if report:
+        prefetch = game_manager.prefetcher.get_stats()
+        print(f"{report}; {prefetch['prefetched']} of {prefetch['switches']} switches prefetched")
+    stats = assets.get_stats()
+    print(f"Asset cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, "
+          f"{stats['bytes'] // 1024} KiB resident")
     pg.quit()
 
 def draw_game_frame(screen, game_manager, gui_manager):
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+import pygame as pg
+
+# Centralized, process-wide image registry.
+# Usage: from src.assets import load_image
+#
+# Surfaces are keyed by (path, scale, convert mode, colorkey) and shared between
+# every caller that asks for the same combination, so a few hundred enemies of
+# the same type decode and scale their sprite exactly once. The returned
+# surfaces are shared: callers must not draw onto them. The decoded originals the
+# variants are built from count against the same memory budget and are evicted first.
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+_cache = OrderedDict()
+_raw_cache = OrderedDict()
+_memory_budget = DEFAULT_MEMORY_BUDGET
+_memory_used = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def _display_ready():
+    try:
+        return pg.display.get_init() and pg.display.get_surface() is not None
+    except Exception:
+        return False
+
+
+def _normalize_scale(scale):
+    if scale is None:
+        return None
+    if isinstance(scale, (list, tuple)):
+        return (int(scale[0]), int(scale[1]))
+    return float(scale)
+
+
+def _normalize_colorkey(colorkey):
+    if colorkey is None:
+        return None
+    return tuple(colorkey)
+
+
+def _convert(surface, convert):
+    if convert is None or not _display_ready():
+        return surface, convert is None
+    if convert == "alpha":
+        return surface.convert_alpha(), True
+    return surface.convert(), True
+
+
+def _load_raw(path):
+    global _memory_used
+    raw = _raw_cache.get(path)
+    if raw is None:
+        raw = pg.image.load(path)
+        _raw_cache[path] = raw
+        _memory_used += _surface_bytes(raw)
+    else:
+        _raw_cache.move_to_end(path)
+    return raw
+
+
+def _build(path, scale, convert, colorkey):
+    raw = _load_raw(path)
+    surface, converted = _convert(raw, convert)
+    if surface is raw:
+        # the original stays in _raw_cache and must not pick up this variant's colorkey
+        surface = raw.copy()
+    if isinstance(scale, tuple):
+        surface = pg.transform.scale(surface, scale)
+    elif scale is not None:
+        w, h = surface.get_size()
+        surface = pg.transform.scale(surface, (int(w * scale), int(h * scale)))
+    if colorkey is not None:
+        surface.set_colorkey(colorkey)
+    return surface, converted
+
+
+def _evict():
+    global _memory_used
+    # decoded originals are only needed to build new variants, so they go first
+    while _memory_used > _memory_budget and _raw_cache:
+        _, raw = _raw_cache.popitem(last=False)
+        _memory_used -= _surface_bytes(raw)
+        _stats["evictions"] += 1
+    while _memory_used > _memory_budget and len(_cache) > 1:
+        _, (surface, _converted) = _cache.popitem(last=False)
+        _memory_used -= _surface_bytes(surface)
+        _stats["evictions"] += 1
+
+
+def load_image(path, scale=None, convert="alpha", colorkey=None):
+    """Return a shared surface for an image file.
+
+    path: file to load
+    scale: None, a float factor applied to the original size, or a (w, h) size
+    convert: "alpha" for convert_alpha(), "opaque" for convert(), None to keep as loaded
+    colorkey: optional transparent color applied to the final surface
+    Raises the same errors as pygame.image.load when the file cannot be read.
+    """
+    global _memory_used
+    key = (path, _normalize_scale(scale), convert, _normalize_colorkey(colorkey))
+    entry = _cache.get(key)
+    if entry is not None:
+        surface, converted = entry
+        if converted or not _display_ready():
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return surface
+        # loaded before the display existed; rebuild now that it can be converted
+        _cache.pop(key)
+        _memory_used -= _surface_bytes(surface)
+
+    _stats["misses"] += 1
+    surface, converted = _build(path, key[1], convert, key[3])
+    _cache[key] = (surface, converted)
+    _memory_used += _surface_bytes(surface)
+    _evict()
+    return surface
+
+
+def set_memory_budget(budget_bytes):
+    """Set the cache budget in bytes and evict least recently used surfaces over it"""
+    global _memory_budget
+    _memory_budget = max(0, int(budget_bytes))
+    _evict()
+
+
+def get_stats():
+    """Return hit/miss/eviction counters and current memory usage, decoded originals included"""
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "evictions": _stats["evictions"],
+        "entries": len(_cache),
+        "raw_entries": len(_raw_cache),
+        "bytes": _memory_used,
+        "budget": _memory_budget,
+    }
+
+
+def clear():
+    """Drop every cached surface and reset the counters"""
+    global _memory_used
+    _cache.clear()
+    _raw_cache.clear()
+    _memory_used = 0
+    for k in _stats:
+        _stats[k] = 0
@@ -0,0 +1,184 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# Background writer for config and save files.
+# Usage:
+#   writer = AsyncWriter()
+#   writer.submit("config/items_state.json", state, json_bytes)   # returns at once; json_bytes(state) runs on the thread
+#   writer.remove("config/items_state.json")                       # ordered with the writes to the same path
+#   writer.flush()                                                 # wait until everything submitted is on disk
+#   writer.close()                                                 # flush and stop the thread (also run at exit)
+#
+# The data passed to submit must not be mutated afterwards: it is serialized later,
+# on the writer thread. Only the newest pending content of a path is kept, so saving
+# the same file several times before the thread gets to it costs a single write.
+# Files are written to a temporary file next to the target, fsynced and renamed over
+# it, so a crash leaves either the old file or the new one, never a truncated one.
+
+
+def json_bytes(data, indent=None):
+    """Serialize data as UTF-8 JSON"""
+    return json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def indented_json_bytes(data):
+    return json_bytes(data, indent=2)
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a fsynced temporary file and an atomic rename"""
+    directory = os.path.dirname(path) or "."
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if os.name == "posix":
+        # Make the rename itself durable; Windows has no directory handles to sync.
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class AsyncWriter:
+    """Serializes and writes files on a background thread, coalescing repeated writes to the same path"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._busy = False
+        self._closed = False
+        self._thread = None
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.write_time = 0.0
+        self.max_write_time = 0.0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        if enabled:
+            self._thread = threading.Thread(target=self._run, name="AsyncWriter", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def submit(self, path, data, serialize=json_bytes):
+        """Queue serialize(data) to be written to path; a write still pending for path is replaced"""
+        self._enqueue(path, (data, serialize))
+
+    def remove(self, path):
+        """Queue the deletion of path, after any write to it submitted before"""
+        self._enqueue(path, None)
+
+    def _enqueue(self, path, job):
+        submitted = time.perf_counter()
+        if not self.enabled or self._closed:
+            self._execute(path, job, submitted)
+            return
+        with self._cond:
+            previous = self._pending.pop(path, None)
+            if previous is not None:
+                self.coalesced += 1
+                # Keep the time of the oldest request, so latency covers the whole wait.
+                submitted = previous[1]
+            self._pending[path] = (job, submitted)
+            self._cond.notify_all()
+
+    def _execute(self, path, job, submitted):
+        start = time.perf_counter()
+        try:
+            if job is None:
+                remove_file(path)
+            else:
+                data, serialize = job
+                write_atomic(path, serialize(data))
+        except Exception as e:
+            self.failures += 1
+            print(f"AsyncWriter: failed to write {path}: {e}")
+            return
+        end = time.perf_counter()
+        self.writes += 1
+        self.write_time += end - start
+        self.max_write_time = max(self.max_write_time, end - start)
+        self.latency += end - submitted
+        self.max_latency = max(self.max_latency, end - submitted)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                job, submitted = self._pending.pop(path)
+                self._busy = True
+            try:
+                self._execute(path, job, submitted)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def pending(self):
+        """Return the number of paths waiting to be written"""
+        with self._cond:
+            return len(self._pending) + (1 if self._busy else 0)
+
+    def flush(self, timeout=None):
+        """Wait until every submitted write is on disk; returns False on timeout"""
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while (self._pending or self._busy) and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Finish the pending writes and stop the thread; later writes happen synchronously"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._thread = None
+            atexit.unregister(self.close)
+
+    def get_stats(self):
+        """Return write counts and timings in milliseconds; latency runs from submit to the data being on disk"""
+        return {
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "pending": self.pending(),
+            "avg_write_ms": 1000.0 * self.write_time / max(self.writes, 1),
+            "max_write_ms": 1000.0 * self.max_write_time,
+            "avg_latency_ms": 1000.0 * self.latency / max(self.writes, 1),
+            "max_latency_ms": 1000.0 * self.max_latency,
+        }
@@ -30,10 +30,10 @@ class Enemy(pygame.sprite.Sprite):
                 pass
             self.kill()
 
-    # This function draws the enemy's health bar above its sprite.
-    def draw_health_bar(self, surface: pygame.Surface) -> None:
+    # This function draws the enemy's health bar above its sprite and returns the bar area.
+    def draw_health_bar(self, surface: pygame.Surface):
         if not hasattr(self, 'hp') or not hasattr(self, 'max_hp'):
-            return
+            return None
 
         bar_width = max(24, self.rect.width)
         bar_height = 5
@@ -48,3 +48,4 @@ class Enemy(pygame.sprite.Sprite):
         pygame.draw.rect(surface, (0, 200, 0), fg_rect)
 
         pygame.draw.rect(surface, (0, 0, 0), bg_rect, 1)
+        return bg_rect
@@ -1,5 +1,6 @@
 import pygame as pg
 from .base_enemy import Enemy
+from src.assets import load_image
 
 SCALE_FACTOR = 0.2
 
@@ -9,12 +10,8 @@ class Bat(Enemy):
 
     # This function initializes the bat enemy with scaled image and base attributes.
     def __init__(self, x, y):
-        original_image = pg.image.load("assets/enemies/bat.png").convert()
-        original_image.set_colorkey(self.TRANSPARENT_COLOR)
-        original_w, original_h = original_image.get_size()
-        new_w = int(original_w * SCALE_FACTOR)
-        new_h = int(original_h * SCALE_FACTOR)
-        bat_image = pg.transform.scale(original_image, (new_w, new_h))
+        bat_image = load_image("assets/enemies/bat.png", SCALE_FACTOR, convert="opaque",
+                               colorkey=self.TRANSPARENT_COLOR)
         super().__init__(x, y, hp=30, speed=1, image=bat_image)
 
     # This function defines the bat's specific logic to follow the player.
@@ -1,10 +1,17 @@
+import numpy as np
 import pygame as pg
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from .slime import Slime
 from .bat import Bat
 from .wizard import Wizard
 from .guard import Guard
-from .projectiles.fireball import Fireball
+from .kinematics import EnemyKinematics, CHASE_TOPLEFT, CHASE_CENTER
+from src.projectile_pool import ProjectilePool, ProjectileView, PooledProjectile, OWNER_ENEMY
+from src.spatial_hash import SpatialHash, rect_arrays
+from src.room_registry import RoomRegistry
+from src.residency import RoomResidency
+from src.entity_arena import EntityArena
+from src.state_hash import room_hash, string_code, HASH_MASK, NONE_CODE
 
 ENEMY_MAPPING = {
     "slime": Slime,
@@ -13,20 +20,72 @@ ENEMY_MAPPING = {
     "guard": Guard,
 }
 
+# Enemy classes the vectorized engine can move, and how each one chases the player.
+CHASE_MODES = {
+    Slime: CHASE_TOPLEFT,
+    Bat: CHASE_CENTER,
+}
+
+# Per-class state kept when an evicted room's enemies are turned back into records.
+DEHYDRATED_FIELDS = ("attack_timer", "is_alert")
+
+# Enemy class -> the code its type name is hashed as, see EnemyManager.state_hash.
+_TYPE_CODES = {}
+
 class EnemyManager:
     # This class manages enemies and projectiles across rooms.
-    def __init__(self, rooms_config: Dict):
-        # Initialize enemy manager with room configuration.
+    def __init__(self, rooms_config: Dict, vectorized=False, vectorize_min_enemies: int = 0,
+                 projectile_pool: Optional[ProjectilePool] = None, cell_size: int = 64,
+                 max_resident_enemies: Optional[int] = None):
+        # Initialize enemy manager with room configuration; vectorized enables the NumPy chase engine.
+        # Projectiles of the active room live in projectile_pool, shared with the player's bullets.
+        # Active enemies are indexed in a spatial hash with cells of cell_size pixels for collision queries.
+        # Rooms are built on first activation; past max_resident_enemies sprites, the least recently
+        # visited rooms are dehydrated into records and rebuilt from them when visited again.
         self.rooms_config = rooms_config
+        self.vectorized = vectorized
+        self.vectorize_min_enemies = vectorize_min_enemies
+        self._kinematics: Optional[EnemyKinematics] = None
+        self._kinematics_index: Dict[int, int] = {}
+        self._static_enemies: List[pg.sprite.Sprite] = []
+        self.spatial = SpatialHash(cell_size)
+        self._spatial_enemies: List[pg.sprite.Sprite] = []
+        self._spatial_dirty = True
         self.enemy_types = ["slime", "bat", "wizard", "guard"]
+        self._enemy_sizes: Dict[str, Tuple[int, int]] = {}
         self.all_enemies: Dict[int, pg.sprite.Group] = {}
-        self.enemy_states: Dict[int, Dict] = {}
-        self.room_projectiles: Dict[int, pg.sprite.Group] = {}
+        # Every enemy lives in the arena under a stable handle, also kept on the sprite as entity_id.
+        self.arena = EntityArena()
+        self.residency = RoomResidency(max_resident_enemies)
+        self._dehydrated: Set[int] = set()
+        # Rooms of a loaded save game not built yet; _saved_records(room_id) decodes one on first use.
+        # _saved_room_ids keeps all of the save's rooms, for restoring a snapshot taken before one was built.
+        self._saved_rooms: Set[int] = set()
+        self._saved_room_ids: Set[int] = set()
+        self._saved_records = None
+        # Snapshot entries of the rooms left since the last reset, taken as the player leaves them,
+        # since enemies only change in the active room. Snapshots share the dict: it is copied before
+        # being changed once _frozen_shared is set.
+        self._frozen: Dict[int, Tuple] = {}
+        self._frozen_shared = False
+        # Sum of the hashes of the entries in _frozen, kept up to date so state_hash only reads the active room.
+        self._frozen_hash = 0
+        self._stale_hash = (None, 0)
         self.active_room_id: Optional[int] = None
         self.active_group: pg.sprite.Group = pg.sprite.Group()
-        self.projectiles: pg.sprite.Group = pg.sprite.Group()
+        self.projectiles = ProjectileView(projectile_pool or ProjectilePool(), OWNER_ENEMY)
 
-    # This function pre-loads enemy groups for all rooms.
+    # This property holds the level config; assigning a new one rebuilds the room registry.
+    @property
+    def rooms_config(self) -> Dict:
+        return self._rooms_config
+
+    @rooms_config.setter
+    def rooms_config(self, rooms_config: Dict) -> None:
+        self._rooms_config = rooms_config
+        self.room_registry = RoomRegistry(rooms_config)
+
+    # This function pre-loads enemy groups for all rooms; activate_room builds a room's group on demand otherwise.
     def load_all_rooms(self) -> None:
         for room in self.rooms_config.get("rooms", []):
             room_id = room.get("room_id")
@@ -37,39 +96,150 @@ class EnemyManager:
     # This function activates a room by ID and returns its enemy group.
     def activate_room(self, room_id: int) -> pg.sprite.Group:
         room_id = int(room_id)
+        self.sync_sprites()
         if self.active_room_id is not None:
-            self.save_enemy_states(self.active_room_id)
-            if self.active_room_id in self.room_projectiles:
-                for projectile in self.room_projectiles[self.active_room_id]:
-                    projectile.kill()
-                self.room_projectiles[self.active_room_id].empty()
+            self.projectiles.clear()
         if self.active_room_id == room_id:
             return self.active_group
+        if self.active_room_id is not None:
+            self._set_frozen(self.active_room_id, self._snapshot_entry(self.active_group))
         if room_id not in self.all_enemies:
-            room_data = next((r for r in self.rooms_config.get("rooms", []) if r.get("room_id") == room_id), None)
+            room_data = self.room_registry.get(room_id)
             self._ensure_room_group(room_id, room_data)
-        if room_id not in self.room_projectiles:
-            self.room_projectiles[room_id] = pg.sprite.Group()
         self.active_room_id = room_id
         self.active_group = self.all_enemies.get(room_id, pg.sprite.Group())
-        self.projectiles = self.room_projectiles[room_id]
-        self.restore_enemy_states(room_id)
+        self._rebuild_kinematics()
+        self.residency.touch(room_id, len(self.active_group.spritedict))
+        for victim in self.residency.victims(keep=(room_id,)):
+            self.dehydrate_room(victim)
         return self.active_group
 
+    # This function builds a room's enemies ahead of activation, without evicting the active room.
+    def prepare_room(self, room_id: int, room_data: Optional[Dict] = None) -> None:
+        room_id = int(room_id)
+        if room_id in self.all_enemies:
+            return
+        self._ensure_room_group(room_id, room_data if room_data is not None else self.room_registry.get(room_id))
+        self.residency.touch(room_id, len(self.all_enemies[room_id].spritedict))
+        for victim in self.residency.victims(keep=(room_id, self.active_room_id)):
+            self.dehydrate_room(victim)
+
+    # This function turns an inactive room's enemies into plain records in the arena and drops its sprites.
+    def dehydrate_room(self, room_id: int) -> None:
+        if room_id == self.active_room_id or room_id not in self.all_enemies:
+            return
+        live = set()
+        for e in self.all_enemies.pop(room_id):
+            handle = self._adopt(e, room_id)
+            self.arena.set(handle, self._enemy_record(e))
+            live.add(handle)
+        for handle in self.arena.room_handles(room_id):
+            if handle not in live:
+                self.arena.remove(handle)
+        self._dehydrated.add(room_id)
+        entry = self._frozen.get(room_id)
+        if entry and entry[0][0] is not None:
+            # Let the sprites go: restoring the room from its entry makes it dehydrated again.
+            self._set_frozen(room_id, tuple((None,) + row[1:] for row in entry))
+        self.residency.discard(room_id)
+
+    # This function gives an enemy a handle in the arena unless it already has one, and returns it.
+    def _adopt(self, enemy, room_id: int) -> int:
+        handle = getattr(enemy, 'entity_id', None)
+        if self.arena.get(handle) is not enemy:
+            handle = enemy.entity_id = self.arena.insert(enemy, room_id)
+        return handle
+
+    # This function returns the live enemy behind a handle, or None if it died or its room is dehydrated.
+    def get_enemy(self, entity_id: int):
+        enemy = self.arena.get(entity_id)
+        return enemy if isinstance(enemy, pg.sprite.Sprite) and enemy.alive() else None
+
+    # This function describes one enemy as a record that _rehydrate can rebuild it from.
+    def _enemy_record(self, enemy) -> Dict:
+        record = {
+            'type': enemy.__class__.__name__.lower(),
+            'pos': [enemy.rect.x, enemy.rect.y],
+            'hp': getattr(enemy, 'hp', 1),
+            'max_hp': getattr(enemy, 'max_hp', 1),
+            'speed': getattr(enemy, 'speed', 1)
+        }
+        for field in DEHYDRATED_FIELDS:
+            if hasattr(enemy, field):
+                record[field] = getattr(enemy, field)
+        return record
+
+    # This function rebuilds a dehydrated room's sprite group from its records, keeping their handles.
+    def _rehydrate(self, room_id: int) -> pg.sprite.Group:
+        group = pg.sprite.Group()
+        for handle in self.arena.room_handles(room_id):
+            record = self.arena.get(handle)
+            e = self._create_enemy_from_data(record)
+            if not e:
+                self.arena.remove(handle)
+                continue
+            for field, value in record.items():
+                if field not in ('type', 'pos'):
+                    setattr(e, field, value)
+            e.entity_id = handle
+            self.arena.set(handle, e)
+            group.add(e)
+        return group
+
+    # This function counts rooms by residency, for stats output.
+    def get_residency_stats(self) -> Dict:
+        stats = self.residency.get_stats()
+        stats["dehydrated"] = len(self._dehydrated)
+        return stats
+
+    # This function splits the active room into engine-driven chasers and per-sprite enemies.
+    def _rebuild_kinematics(self) -> None:
+        if self._kinematics is not None:
+            self._kinematics.sync_sprites()
+        self._kinematics = None
+        self._spatial_dirty = True
+        self._kinematics_index = {}
+        self._static_enemies = []
+        if not self.vectorized:
+            return
+        sprites = self.active_group.sprites()
+        chasers = [s for s in sprites if type(s) in CHASE_MODES]
+        if not chasers or len(chasers) < self.vectorize_min_enemies:
+            return
+        self._kinematics = EnemyKinematics(chasers, CHASE_MODES)
+        self._kinematics_index = {id(s): i for i, s in enumerate(chasers)}
+        self._static_enemies = [s for s in sprites if type(s) not in CHASE_MODES]
+
+    # This function rebuilds the engine if sprites were added or removed outside of it.
+    def _check_kinematics(self) -> None:
+        if self._kinematics is None:
+            return
+        if len(self.active_group) != len(self._kinematics) + len(self._static_enemies):
+            self._rebuild_kinematics()
+
+    # This function writes engine positions back to the sprite rects of the active room.
+    def sync_sprites(self) -> None:
+        if self._kinematics is not None:
+            self._kinematics.sync_sprites()
     # This function ensures that a sprite group exists for the given room and populates it.
     def _ensure_room_group(self, room_id: int, room_data: Optional[Dict]) -> None:
         room_id = int(room_id)
         if room_id in self.all_enemies:
             return
+        if room_id in self._saved_rooms:
+            self._load_saved_room(room_id)
+        if room_id in self._dehydrated:
+            self._dehydrated.discard(room_id)
+            self.all_enemies[room_id] = self._rehydrate(room_id)
+            return
         group = pg.sprite.Group()
         if room_data and room_data.get("enemies"):
             for enemy_data in room_data.get("enemies", []):
                 e = self._create_enemy_from_data(enemy_data)
                 if e:
+                    e.entity_id = self.arena.insert(e, room_id)
                     group.add(e)
         self.all_enemies[room_id] = group
-        if room_id not in self.room_projectiles:
-            self.room_projectiles[room_id] = pg.sprite.Group()
 
     # This function creates an enemy instance from configuration data.
     def _create_enemy_from_data(self, data: Dict):
@@ -93,40 +263,16 @@ class EnemyManager:
             print(f"EnemyManager: error creating enemy {data}: {e}")
             return None
 
-    # This function saves the current state of enemies in a room.
-    def save_enemy_states(self, room_id: int):
-        if room_id in self.all_enemies:
-            enemy_data = {}
-            for enemy in self.all_enemies[room_id]:
-                enemy_info = {
-                    'type': enemy.__class__.__name__.lower(),
-                    'pos': [enemy.rect.x, enemy.rect.y],
-                    'hp': getattr(enemy, 'hp', 1),
-                    'max_hp': getattr(enemy, 'max_hp', 1),
-                    'speed': getattr(enemy, 'speed', 1)
-                }
-                key = f"{enemy.rect.x}_{enemy.rect.y}"
-                enemy_data[key] = enemy_info
-            self.enemy_states[room_id] = enemy_data
-
-    # This function restores enemy states for a given room.
-    def restore_enemy_states(self, room_id: int):
-        if room_id in self.enemy_states:
-            saved_states = self.enemy_states[room_id]
-            current_enemies = list(self.all_enemies[room_id].sprites())
-            for enemy in current_enemies:
-                key = f"{enemy.rect.x}_{enemy.rect.y}"
-                if key in saved_states:
-                    state = saved_states[key]
-                    enemy.hp = state['hp']
-                    enemy.max_hp = state['max_hp']
-                    if enemy.hp <= 0 and state['hp'] > 0:
-                        enemy.hp = state['hp']
-
-    # This function updates active enemies and their projectiles.
-    def update(self, player_sprite) -> None:
-        self.projectiles.update()
-        for enemy in list(self.active_group.sprites()):
+    # This function updates active enemies and their projectiles; bounds (width, height) culls fireballs that left the screen.
+    def update(self, player_sprite, bounds: Optional[Tuple[int, int]] = None) -> None:
+        self.projectiles.step(bounds)
+        self._check_kinematics()
+        if self._kinematics is not None:
+            self._kinematics.step(player_sprite.rect)
+            enemies = list(self._static_enemies)
+        else:
+            enemies = list(self.active_group.sprites())
+        for enemy in enemies:
             try:
                 res = enemy.update(player_sprite)
             except TypeError:
@@ -134,28 +280,89 @@ class EnemyManager:
             except Exception as e:
                 print(f"EnemyManager: error updating enemy {enemy}: {e}")
                 res = None
-            if isinstance(res, Fireball) or (hasattr(res, 'rect') and isinstance(res, pg.sprite.Sprite)):
+            if isinstance(res, PooledProjectile):
                 self.projectiles.add(res)
-                if self.active_room_id in self.room_projectiles:
-                    self.room_projectiles[self.active_room_id].add(res)
+        self._spatial_dirty = True
+
+    # This function re-indexes the active enemies in the spatial hash once they moved or the room changed.
+    def _update_spatial(self) -> None:
+        self._check_kinematics()
+        if not self._spatial_dirty and len(self._spatial_enemies) == len(self.active_group.spritedict):
+            return
+        if self._kinematics is not None:
+            kin = self._kinematics
+            alive = np.flatnonzero(kin.alive)
+            enemies = [kin.sprites[i] for i in alive.tolist()] + list(self._static_enemies)
+            static = rect_arrays(e.rect for e in self._static_enemies)
+            boxes = [np.concatenate((values[alive], extra))
+                     for values, extra in zip((kin.x, kin.y, kin.w, kin.h), static)]
+        else:
+            enemies = self.active_group.sprites()
+            boxes = rect_arrays(e.rect for e in enemies)
+        self.spatial.rebuild(*boxes)
+        self._spatial_enemies = enemies
+        self._spatial_dirty = False
+
+    # This function returns the active enemies overlapping a rect, found through the spatial hash.
+    def enemies_colliding(self, rect: pg.Rect, first_only: bool = False) -> List[pg.sprite.Sprite]:
+        self._update_spatial()
+        hits = []
+        for index in self.spatial.query(rect).tolist():
+            enemy = self._spatial_enemies[index]
+            if not enemy.alive():
+                continue
+            kin_index = self._kinematics_index.get(id(enemy)) if self._kinematics is not None else None
+            if kin_index is not None:
+                self._kinematics.sync_sprite(kin_index)
+            hits.append(enemy)
+            if first_only:
+                break
+        return hits
+
+    # This function tests many boxes, given as x, y, width and height arrays, against the active enemies at once.
+    # It returns (box index, overlapping enemies) pairs for the boxes that hit any, in box and spatial hash order;
+    # enemies that die while the caller goes through the result are still listed, so check alive().
+    def enemies_colliding_boxes(self, x, y, w, h) -> List[Tuple[int, List[pg.sprite.Sprite]]]:
+        self._update_spatial()
+        boxes, entries = self.spatial.query_boxes(x, y, w, h)
+        if len(boxes) == 0:
+            return []
+        starts = np.flatnonzero(np.diff(boxes, prepend=-1))
+        enemies = self._spatial_enemies
+        return [(box, [enemies[i] for i in group.tolist()])
+                for box, group in zip(boxes[starts].tolist(), np.split(entries, starts[1:]))]
 
-    # This function draws all projectiles and enemies on the screen.
-    def draw(self, screen: pg.Surface) -> None:
-        self.projectiles.draw(screen)
+    # This function damages an enemy, keeping the vectorized engine's arrays consistent.
+    def damage_enemy(self, enemy, amount) -> None:
+        index = self._kinematics_index.get(id(enemy)) if self._kinematics is not None else None
+        if index is not None:
+            self._kinematics.damage(index, amount)
+        elif hasattr(enemy, 'take_damage'):
+            enemy.take_damage(amount)
+
+    # This function draws all projectiles and enemies on the screen and returns the areas drawn.
+    def draw(self, screen: pg.Surface) -> List[pg.Rect]:
+        self.sync_sprites()
+        rects = self.projectiles.draw(screen)
         self.active_group.draw(screen)
         for e in self.active_group:
+            rects.append(e.rect.copy())
             try:
                 if hasattr(e, 'draw_health_bar'):
-                    e.draw_health_bar(screen)
+                    bar = e.draw_health_bar(screen)
+                    if bar is not None:
+                        rects.append(bar)
             except Exception:
                 pass
+        return rects
 
     # This function returns the currently active enemy group.
     def get_active_enemies(self) -> pg.sprite.Group:
+        self.sync_sprites()
         return self.active_group
 
-    # This function returns the current projectile group.
-    def get_projectiles(self) -> pg.sprite.Group:
+    # This function returns the view of the active room's projectiles.
+    def get_projectiles(self) -> ProjectileView:
         return self.projectiles
 
     # This function clears all enemies and projectiles from a specific room.
@@ -164,12 +371,13 @@ class EnemyManager:
             for e in self.all_enemies[room_id]:
                 e.kill()
             del self.all_enemies[room_id]
-        if room_id in self.room_projectiles:
-            for p in self.room_projectiles[room_id]:
-                p.kill()
-            del self.room_projectiles[room_id]
-        if room_id in self.enemy_states:
-            del self.enemy_states[room_id]
+        if room_id == self.active_room_id:
+            self.projectiles.clear()
+        self.arena.clear_room(room_id)
+        self._dehydrated.discard(room_id)
+        self._saved_rooms.discard(room_id)
+        self._set_frozen(room_id, None)
+        self.residency.discard(room_id)
 
     # This function clears all enemies and projectiles from all rooms.
     def clear_all(self) -> None:
@@ -177,21 +385,226 @@ class EnemyManager:
             for e in g:
                 e.kill()
         self.all_enemies.clear()
-        for room_id, proj_group in self.room_projectiles.items():
-            for p in proj_group:
-                p.kill()
-        self.room_projectiles.clear()
-        self.enemy_states.clear()
-        for p in self.projectiles:
-            p.kill()
-        self.projectiles.empty()
+        self.arena.clear()
+        self._dehydrated.clear()
+        self._saved_rooms.clear()
+        self._saved_room_ids.clear()
+        self._frozen = {}
+        self._frozen_shared = False
+        self._frozen_hash = 0
+        self.residency.clear()
+        self.projectiles.clear()
+
+    # This function returns the sprite size of an enemy type, used to keep placed enemies clear of walls.
+    def enemy_size(self, enemy_type: str) -> Tuple[int, int]:
+        size = self._enemy_sizes.get(enemy_type)
+        if size is None:
+            size = self._enemy_sizes[enemy_type] = tuple(ENEMY_MAPPING[enemy_type](0, 0).rect.size)
+        return size
+
+    # This function returns the enemy records of every room whose enemies were built or loaded, by room id.
+    # Rooms missing from the result still match the level config.
+    def export_rooms(self) -> Dict[int, List[Dict]]:
+        self.sync_sprites()
+        rooms = {}
+        for room_id, group in self.all_enemies.items():
+            rooms[room_id] = [self._enemy_record(e) for e in group]
+        for room_id in self._dehydrated:
+            rooms[room_id] = list(self.arena.room_entries(room_id))
+        for room_id in self._saved_rooms:
+            rooms[room_id] = self._saved_records(room_id)
+        return rooms
+
+    # This function drops all enemies and takes those of a save game instead; saved_records(room_id)
+    # returns a room's records and is only called once the room is needed.
+    # frozen_rooms are the rooms left before saving: their entries are rebuilt from the save right away,
+    # so state_hash covers them just like in the game that was saved.
+    def load_saved_rooms(self, room_ids, saved_records, frozen_rooms=()) -> None:
+        self.reset_all_enemies()
+        self._saved_rooms = set(room_ids)
+        self._saved_room_ids = set(room_ids)
+        self._saved_records = saved_records
+        for room_id in frozen_rooms:
+            if room_id in self._saved_rooms:
+                self._set_frozen(room_id, tuple(self._record_row(record) for record in saved_records(room_id)))
+
+    # This function returns the IDs of the rooms left so far, whose entries state_hash sums up.
+    def frozen_room_ids(self) -> List[int]:
+        return list(self._frozen)
+
+    # This function turns an enemy record into a snapshot entry row without a sprite or handle.
+    @staticmethod
+    def _record_row(record: Dict) -> Tuple:
+        x, y = record['pos']
+        return (None, None, record['type'], x, y, record['hp'], record['max_hp'], record['speed'],
+                record.get('attack_timer'), record.get('is_alert'))
+
+    # This function puts a saved room's records into the arena as a dehydrated room.
+    def _load_saved_room(self, room_id: int) -> None:
+        self._saved_rooms.discard(room_id)
+        for record in self._saved_records(room_id) or []:
+            self.arena.insert(record, room_id)
+        self._dehydrated.add(room_id)
 
     # This function resets all enemies and related states across rooms.
+    # Rooms are rebuilt from the config when next activated, so this does not depend on the dungeon size.
     def reset_all_enemies(self):
-        self.all_enemies.clear()
-        self.projectiles.empty()
-        self.room_projectiles.clear()
-        self.enemy_states.clear()
+        self.all_enemies = {}
+        self.projectiles.clear()
+        self.arena.clear()
+        self._dehydrated = set()
+        self._saved_rooms = set()
+        self._saved_room_ids = set()
+        self._saved_records = None
+        self._frozen = {}
+        self._frozen_shared = False
+        self._frozen_hash = 0
+        self.residency.clear()
         self.active_group = pg.sprite.Group()
         self.active_room_id = None
-        self.load_all_rooms()
+        self._rebuild_kinematics()
+
+    # This function describes a room's enemies as one flat tuple per enemy, for snapshots.
+    def _snapshot_entry(self, group) -> Tuple:
+        return tuple((e, getattr(e, 'entity_id', None), e.__class__.__name__.lower(), e.rect.x, e.rect.y, e.hp, e.max_hp, e.speed,
+                      getattr(e, 'attack_timer', None), getattr(e, 'is_alert', None)) for e in group)
+
+    # This function sets or drops a room's frozen snapshot entry, copying the dict first if a snapshot holds it.
+    def _set_frozen(self, room_id: int, entry: Optional[Tuple]) -> None:
+        if entry is None and room_id not in self._frozen:
+            return
+        if self._frozen_shared:
+            self._frozen = dict(self._frozen)
+            self._frozen_shared = False
+        self._frozen_hash -= self._entry_hash(room_id, self._frozen.get(room_id))
+        if entry is None:
+            del self._frozen[room_id]
+        else:
+            self._frozen[room_id] = entry
+            self._frozen_hash += self._entry_hash(room_id, entry)
+        self._frozen_hash &= HASH_MASK
+
+    # This function hashes a room's snapshot entry; the sprite and handle do not count.
+    @staticmethod
+    def _entry_hash(room_id: int, entry: Optional[Tuple]) -> int:
+        return room_hash(room_id, (row[2:] for row in entry)) if entry else 0
+
+    # This function returns the hash of every room's enemies for GameManager.state_hashes.
+    # The rooms left are summed up in _frozen_hash already, so only the active room is read.
+    def state_hash(self) -> int:
+        room_id = self.active_room_id
+        if room_id is None:
+            return self._frozen_hash
+        self.sync_sprites()
+        # The active room's own entry, from when it was last left, is stale while it is active.
+        entry = self._frozen.get(room_id)
+        stale_entry, stale = self._stale_hash
+        if entry is not stale_entry:
+            stale = self._entry_hash(room_id, entry)
+            self._stale_hash = (entry, stale)
+        return (self._frozen_hash - stale + self._group_hash(room_id, self.active_group)) & HASH_MASK
+
+    # This function hashes a live group to the same value as _entry_hash of its snapshot entry, without building one.
+    @staticmethod
+    def _group_hash(room_id: int, group) -> int:
+        total = 0
+        for e in group:
+            cls = e.__class__
+            code = _TYPE_CODES.get(cls)
+            if code is None:
+                code = _TYPE_CODES[cls] = string_code(cls.__name__.lower())
+            attack_timer = getattr(e, 'attack_timer', None)
+            is_alert = getattr(e, 'is_alert', None)
+            total += hash((code, e.rect.x, e.rect.y, e.hp, e.max_hp, e.speed,
+                           NONE_CODE if attack_timer is None else attack_timer,
+                           NONE_CODE if is_alert is None else is_alert))
+        return hash((room_id, total & HASH_MASK)) & HASH_MASK if total else 0
+
+    # This function captures the enemies of every room for GameManager.snapshot.
+    # Only the active room is read; the other rooms come from their entries taken when they were left.
+    def snapshot(self) -> Tuple:
+        self.sync_sprites()
+        self._frozen_shared = True
+        kinematics = self._kinematics.capture() if self._kinematics is not None else None
+        return self._frozen, self._frozen_hash, self.active_room_id, self._snapshot_entry(self.active_group), kinematics
+
+    # This function puts the given rooms back to their state in a snapshot and activates its room.
+    # room_ids must hold every room that may have changed since the snapshot, including both active rooms.
+    def restore_snapshot(self, snapshot: Tuple, room_ids) -> None:
+        frozen, frozen_hash, active_room_id, active_entry, kinematics = snapshot
+        # Every sprite of the active room is rewritten below, so the engine is dropped without syncing it.
+        engine, self._kinematics = self._kinematics, None
+        in_place = False
+        for room_id in room_ids:
+            if room_id == active_room_id:
+                in_place = self._restore_room(room_id, active_entry)
+            else:
+                self._restore_room(room_id, frozen.get(room_id))
+        self._frozen = frozen
+        self._frozen_shared = True
+        self._frozen_hash = frozen_hash
+        self.active_room_id = active_room_id
+        self.active_group = self.all_enemies.get(active_room_id, pg.sprite.Group())
+        if in_place and engine is not None and kinematics is not None and kinematics[0] is engine:
+            # Same sprites and same engine as in the snapshot: put its arrays back instead of rebuilding it.
+            engine.restore(kinematics)
+            self._kinematics = engine
+            self._spatial_dirty = True
+        else:
+            self._rebuild_kinematics()
+        if active_room_id is not None:
+            self.residency.touch(active_room_id, len(self.active_group.spritedict))
+            for victim in self.residency.victims(keep=(active_room_id,)):
+                self.dehydrate_room(victim)
+
+    # This function replaces a room's enemies with a snapshot entry, or with its initial enemies if entry is None.
+    # It returns True if the room still held the entry's sprites and they were updated in place.
+    def _restore_room(self, room_id: int, entry: Optional[Tuple]) -> bool:
+        group = self.all_enemies.get(room_id)
+        in_place = bool(group is not None and entry and entry[0][0] is not None
+                        and group.sprites() == [row[0] for row in entry])
+        if not in_place:
+            if group is not None:
+                del self.all_enemies[room_id]
+                group.empty()
+            self._dehydrated.discard(room_id)
+            self.residency.discard(room_id)
+            if entry is None:
+                # The room was not entered yet when the snapshot was taken.
+                self.arena.clear_room(room_id)
+                if room_id in self._saved_room_ids:
+                    self._saved_rooms.add(room_id)
+                return False
+            self._saved_rooms.discard(room_id)
+            if entry and entry[0][0] is None:
+                records = []
+                for _, handle, enemy_type, x, y, hp, max_hp, speed, attack_timer, is_alert in entry:
+                    record = {'type': enemy_type, 'pos': [x, y], 'hp': hp, 'max_hp': max_hp, 'speed': speed}
+                    if attack_timer is not None:
+                        record['attack_timer'] = attack_timer
+                    if is_alert is not None:
+                        record['is_alert'] = is_alert
+                    records.append((handle, record))
+                self.arena.replace_room(room_id, records)
+                self._dehydrated.add(room_id)
+                return False
+        for e, _, _, x, y, hp, max_hp, speed, attack_timer, is_alert in entry:
+            rect = e.rect
+            rect.x = x
+            rect.y = y
+            e.hp = hp
+            e.max_hp = max_hp
+            e.speed = speed
+            if attack_timer is not None:
+                e.attack_timer = attack_timer
+            if is_alert is not None:
+                e.is_alert = is_alert
+        if not in_place:
+            # The group and its handles are kept on the in-place path, since it holds the same sprites.
+            sprites = [row[0] for row in entry]
+            handles = self.arena.replace_room(room_id, [(row[1], row[0]) for row in entry])
+            for e, handle in zip(sprites, handles):
+                e.entity_id = handle
+            self.all_enemies[room_id] = pg.sprite.Group(sprites)
+        self.residency.touch(room_id, len(entry))
+        return in_place
@@ -1,6 +1,7 @@
 from .base_enemy import Enemy
 import pygame as pg
 import numpy as np
+from src.assets import load_image
 
 SCALE_FACTOR = 0.4
 
@@ -12,12 +13,8 @@ class Guard(Enemy):
     
     def __init__(self, x, y):
         # Initialize the guard with scaled image and attributes.
-        original_image = pg.image.load("assets/enemies/guard.png").convert_alpha()
-        original_w, original_h = original_image.get_size()
-        new_w = int(original_w * SCALE_FACTOR)
-        new_h = int(original_h * SCALE_FACTOR)
-        guard_image = pg.transform.scale(original_image, (new_w, new_h))
-        
+        guard_image = load_image("assets/enemies/guard.png", SCALE_FACTOR)
+
         super().__init__(x, y, hp=150, speed=1.5, image=guard_image)
         self.is_alert = False
 
@@ -0,0 +1,86 @@
+import numpy as np
+import pygame as pg
+from typing import List
+
+# Type codes for enemies whose movement the engine integrates itself.
+CHASE_TOPLEFT = 0   # compares top-left corners, like Slime.update
+CHASE_CENTER = 1    # compares centers, like Bat.update
+
+
+def _round_like_rect(values: np.ndarray) -> np.ndarray:
+    # pygame.Rect rounds float assignments half away from zero
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+
+class EnemyKinematics:
+    # This class stores chasing enemies of one room as NumPy arrays and moves them all in one vectorized step.
+    def __init__(self, sprites: List[pg.sprite.Sprite], chase_modes: dict):
+        self.sprites = list(sprites)
+        n = len(self.sprites)
+        self.x = np.fromiter((s.rect.x for s in self.sprites), dtype=np.int64, count=n)
+        self.y = np.fromiter((s.rect.y for s in self.sprites), dtype=np.int64, count=n)
+        self.w = np.fromiter((s.rect.width for s in self.sprites), dtype=np.int64, count=n)
+        self.h = np.fromiter((s.rect.height for s in self.sprites), dtype=np.int64, count=n)
+        self.speed = np.fromiter((s.speed for s in self.sprites), dtype=np.float64, count=n)
+        self.hp = np.fromiter((s.hp for s in self.sprites), dtype=np.float64, count=n)
+        self.type_code = np.fromiter((chase_modes[type(s)] for s in self.sprites), dtype=np.int8, count=n)
+        self.alive = np.ones(n, dtype=bool)
+        self.alive_count = n
+        self._synced = True
+
+    def __len__(self) -> int:
+        return self.alive_count
+
+    # This function advances every living chaser one tick towards the player.
+    def step(self, player_rect: pg.Rect) -> None:
+        if self.alive_count == 0:
+            return
+        center = self.type_code == CHASE_CENTER
+        own_x = np.where(center, self.x + self.w // 2, self.x)
+        own_y = np.where(center, self.y + self.h // 2, self.y)
+        target_x = np.where(center, player_rect.centerx, player_rect.x)
+        target_y = np.where(center, player_rect.centery, player_rect.y)
+        dx = np.sign(target_x - own_x) * self.speed
+        dy = np.sign(target_y - own_y) * self.speed
+        moving = self.alive
+        self.x = np.where(moving & (dx != 0), _round_like_rect(self.x + dx), self.x)
+        self.y = np.where(moving & (dy != 0), _round_like_rect(self.y + dy), self.y)
+        self._synced = False
+
+    # This function applies damage to one chaser through its sprite, keeping the arrays in step.
+    def damage(self, index: int, amount) -> None:
+        sprite = self.sprites[index]
+        self.sync_sprite(index)
+        sprite.take_damage(amount)
+        self.hp[index] = sprite.hp
+        if not sprite.alive():
+            self.alive[index] = False
+            self.alive_count -= 1
+
+    # This function writes one chaser's array position back to its sprite rect.
+    def sync_sprite(self, index: int) -> None:
+        rect = self.sprites[index].rect
+        rect.x = int(self.x[index])
+        rect.y = int(self.y[index])
+
+    # This function writes all array positions back to the sprite rects, e.g. before drawing.
+    def sync_sprites(self) -> None:
+        if self._synced:
+            return
+        for sprite, x, y in zip(self.sprites, self.x.tolist(), self.y.tolist()):
+            sprite.rect.x = x
+            sprite.rect.y = y
+        self._synced = True
+
+    # This function copies the per-tick arrays so a snapshot can put them back without rebuilding the engine.
+    def capture(self) -> tuple:
+        return self, self.x.copy(), self.y.copy(), self.hp.copy(), self.alive.copy(), self.alive_count
+
+    # This function puts back arrays from capture; the sprites must already hold the matching positions.
+    def restore(self, state: tuple) -> None:
+        _, x, y, hp, alive, self.alive_count = state
+        self.x = x.copy()
+        self.y = y.copy()
+        self.hp = hp.copy()
+        self.alive = alive.copy()
+        self._synced = True
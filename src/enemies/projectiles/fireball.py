@@ -1,54 +1,79 @@
 import pygame as pg
 import math
+from src.assets import load_image
+from src.projectile_pool import PooledProjectile, ANCHOR_CENTER
 
 
-class Fireball(pg.sprite.Sprite):
-    # This class represents a projectile fired by the wizard.
+class Fireball(PooledProjectile, pg.sprite.Sprite):
+    # This class represents a projectile fired by the wizard; its motion is stepped by the shared projectile pool.
     def __init__(self, start_x, start_y, target_x, target_y):
         # Initialize the fireball with position, velocity, and appearance.
-        super().__init__()
+        pg.sprite.Sprite.__init__(self)
 
         try:
-            raw = pg.image.load("assets/fireball.png").convert_alpha()
             size = int(16 * 2.5)
-            self.image = pg.transform.scale(raw, (size, size))
+            self.image = load_image("assets/fireball.png", (size, size))
         except Exception:
             self.image = pg.Surface((16, 16), pg.SRCALPHA)
             pg.draw.circle(self.image, (255, 100, 0), (8, 8), 8)
 
-        self.rect = self.image.get_rect(center=(start_x, start_y))
-
         self.speed = 5.0
         self.damage = 10
-        self.lifetime = 180
-        self.timer = 0
-
-        self.x = float(start_x)
-        self.y = float(start_y)
 
         dx = target_x - start_x
         dy = target_y - start_y
         distance = math.hypot(dx, dy)
 
         if distance > 0:
-            self.vel_x = (dx / distance) * self.speed
-            self.vel_y = (dy / distance) * self.speed
+            vel_x = (dx / distance) * self.speed
+            vel_y = (dy / distance) * self.speed
         else:
-            self.vel_x, self.vel_y = 0.0, 0.0
+            vel_x, vel_y = 0.0, 0.0
 
-    # This function updates the fireball position and lifetime.
-    def update(self):
-        self.x += self.vel_x
-        self.y += self.vel_y
+        width, height = self.image.get_size()
+        PooledProjectile.__init__(self, start_x, start_y, vel_x, vel_y, lifetime=180,
+                                  w=width, h=height, anchor=ANCHOR_CENTER, margin=max(width, height) // 2)
+
+    # This function recreates a fireball from get_save_state; its position and motion come back with its pool slot.
+    @classmethod
+    def from_save_state(cls, state):
+        fireball = cls(0, 0, 0, 0)
+        fireball.speed = state["speed"]
+        fireball.damage = state["damage"]
+        return fireball
+
+    # This function returns the attributes a save game keeps besides the pool slot.
+    def get_save_state(self):
+        return {"speed": self.speed, "damage": self.damage}
 
-        self.rect.centerx = int(self.x)
-        self.rect.centery = int(self.y)
+    # This property returns the sprite rect, centered on the truncated position like before.
+    @property
+    def rect(self):
+        return self.get_rect()
+
+    # This function updates the fireball position and lifetime when it is not stepped by a pool.
+    def update(self):
+        self.x += self.vx
+        self.y += self.vy
 
         self.timer += 1
 
         if self.timer >= self.lifetime:
             self.kill()
 
+    # This function removes the fireball from its pool and any sprite groups.
+    def kill(self):
+        self.release()
+        pg.sprite.Sprite.kill(self)
+
+    # This function reports whether the fireball is still flying.
+    def alive(self):
+        return self._live
+
+    # This function draws the fireball and returns the drawn area.
+    def draw(self, screen):
+        return screen.blit(self.image, self.rect)
+
     # This function handles collision with the player and returns damage value.
     def hit_player(self, player):
         self.kill()
@@ -1,5 +1,6 @@
 from .base_enemy import Enemy
 import pygame as pg
+from src.assets import load_image
 
 SCALE_FACTOR = 0.4
 
@@ -7,11 +8,7 @@ class Slime(Enemy):
     # Enemy that slowly follows the player.
     def __init__(self, x, y):
         # Initialize the slime with scaled image and basic stats.
-        original_image = pg.image.load("assets/enemies/mummy.png").convert_alpha()
-        original_w, original_h = original_image.get_size()
-        new_w = int(original_w * SCALE_FACTOR)
-        new_h = int(original_h * SCALE_FACTOR)
-        slime_image = pg.transform.scale(original_image, (new_w, new_h))
+        slime_image = load_image("assets/enemies/mummy.png", SCALE_FACTOR)
         super().__init__(x, y, hp=50, speed=0.5, image=slime_image)
 
     def update(self, player):
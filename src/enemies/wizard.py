@@ -3,6 +3,7 @@ import pygame as pg
 import math
 from .projectiles.fireball import Fireball
 from src.audio import play_sound
+from src.assets import load_image
 
 ATTACK_COOLDOWN = 60 
 SCALE_FACTOR = 0.2
@@ -12,12 +13,8 @@ class Wizard(Enemy):
     TRANSPARENT_COLOR = (255, 255, 255)
     def __init__(self, x, y):
         # Initialize the wizard enemy with scaled image, stats, and attack properties.
-        original_image = pg.image.load("assets/enemies/wizard.png").convert()
-        original_image.set_colorkey(self.TRANSPARENT_COLOR)
-        original_w, original_h = original_image.get_size()
-        new_w = int(original_w * SCALE_FACTOR)
-        new_h = int(original_h * SCALE_FACTOR)
-        wizard_image = pg.transform.scale(original_image, (new_w, new_h))
+        wizard_image = load_image("assets/enemies/wizard.png", SCALE_FACTOR, convert="opaque",
+                                  colorkey=self.TRANSPARENT_COLOR)
         super().__init__(x, y, hp=75, speed=0.5, image=wizard_image)
         
         self.attack_timer = 0
@@ -0,0 +1,150 @@
+# Generational slot storage for game entities.
+# Usage:
+#   arena = EntityArena()
+#   handle = arena.insert(enemy, room_id)     # stable int handle, also stored as enemy.entity_id by callers
+#   arena.get(handle)                         # the entity, or None once it was removed
+#   arena.set(handle, record)                 # swap the live object for a compact record (and back)
+#
+# A handle packs a slot index with the slot's generation. Removing an entity bumps
+# the generation, so old handles stop resolving instead of silently pointing at
+# whatever reuses the slot. Each room keeps an ordered set of its slots, making a
+# room's entities a compact slice of the arena.
+
+INDEX_BITS = 24
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def make_handle(index, generation):
+    return (generation << INDEX_BITS) | index
+
+
+def handle_index(handle):
+    return handle & INDEX_MASK
+
+
+def handle_generation(handle):
+    return handle >> INDEX_BITS
+
+
+class EntityArena:
+    """Entities (live objects or dehydrated records) behind generational integer handles, grouped by room"""
+
+    def __init__(self):
+        self._next_generation = 0
+        self.clear()
+
+    def clear(self):
+        """Remove every entity; handles issued before stay stale"""
+        # New slots start past every generation handed out so far, so no old handle can match them.
+        self._base_generation = self._next_generation
+        self._entries = []
+        self._generations = []
+        self._rooms = []
+        self._free = []
+        self._room_slots = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, handle):
+        return self._slot(handle) is not None
+
+    def _slot(self, handle):
+        if handle is None or handle < 0:
+            return None
+        index = handle & INDEX_MASK
+        if index >= len(self._generations) or self._generations[index] != handle >> INDEX_BITS:
+            return None
+        return index if self._entries[index] is not None else None
+
+    def insert(self, entry, room_id=None):
+        """Store an entity and return its handle"""
+        if self._free:
+            index = self._free.pop()
+        else:
+            index = len(self._entries)
+            if index > INDEX_MASK:
+                raise OverflowError("EntityArena is full")
+            self._entries.append(None)
+            self._generations.append(self._base_generation)
+            self._rooms.append(None)
+        self._entries[index] = entry
+        self._rooms[index] = room_id
+        self._room_slots.setdefault(room_id, {})[index] = None
+        self._next_generation = max(self._next_generation, self._generations[index] + 1)
+        self._count += 1
+        return make_handle(index, self._generations[index])
+
+    def get(self, handle, default=None):
+        """Return the entity behind a handle, or default if it was removed"""
+        index = self._slot(handle)
+        return default if index is None else self._entries[index]
+
+    def set(self, handle, entry):
+        """Replace the entity behind a live handle, e.g. with its dehydrated record"""
+        index = self._slot(handle)
+        if index is None:
+            raise KeyError(f"stale entity handle {handle}")
+        self._entries[index] = entry
+
+    def room_of(self, handle):
+        index = self._slot(handle)
+        return None if index is None else self._rooms[index]
+
+    def remove(self, handle):
+        """Remove an entity, invalidating its handle; returns False for stale handles"""
+        index = self._slot(handle)
+        if index is None:
+            return False
+        room_id = self._rooms[index]
+        self._room_slots[room_id].pop(index, None)
+        self._entries[index] = None
+        self._rooms[index] = None
+        self._generations[index] += 1
+        self._next_generation = max(self._next_generation, self._generations[index] + 1)
+        self._free.append(index)
+        self._count -= 1
+        return True
+
+    def room_handles(self, room_id):
+        """Return the handles of a room's entities in insertion order"""
+        generations = self._generations
+        return [make_handle(index, generations[index]) for index in self._room_slots.get(room_id, ())]
+
+    def room_entries(self, room_id):
+        """Return a room's entities in insertion order"""
+        entries = self._entries
+        return [entries[index] for index in self._room_slots.get(room_id, ())]
+
+    def room_count(self, room_id):
+        return len(self._room_slots.get(room_id, ()))
+
+    def clear_room(self, room_id):
+        """Remove every entity of a room"""
+        for handle in self.room_handles(room_id):
+            self.remove(handle)
+        self._room_slots.pop(room_id, None)
+
+    def replace_room(self, room_id, entries):
+        """Make (handle, entity) pairs the entities of a room, in that order, and return their handles.
+
+        Pairs whose handle is still live keep it; the others get a new one. Every
+        other entity of the room is removed.
+        """
+        slots = {}
+        handles = []
+        for handle, entry in entries:
+            index = self._slot(handle)
+            if index is None or self._rooms[index] != room_id or index in slots:
+                handle = self.insert(entry, room_id)
+                index = handle & INDEX_MASK
+            else:
+                self._entries[index] = entry
+            slots[index] = None
+            handles.append(handle)
+        for index in list(self._room_slots.get(room_id, ())):
+            if index not in slots:
+                self.remove(make_handle(index, self._generations[index]))
+        self._room_slots[room_id] = slots
+        return handles
@@ -2,50 +2,151 @@ import pygame as pg
 import json
 import copy
 import random
-from src.enemies.enemy_manager import EnemyManager
+import time
+import numpy as np
+from collections import deque, namedtuple
+from src.enemies.enemy_manager import EnemyManager, ENEMY_MAPPING
 from src.player.player import Player
-from src.items.item_manager import ItemManager
+from src.player.bullet import Bullet
+from src.enemies.projectiles import Fireball
+from src.items.item_manager import ItemManager, ITEMS_STATE_PATH
 from src.gui.minimap import Minimap
+from src.input_state import InputState
+from src.projectile_pool import ProjectilePool, OWNER_PLAYER
+from src.room_collision import RoomCollisionCache
+from src.room_registry import RoomRegistry
+from src.room_graph import load_room_graph
+from src.level_format import load_level, plain_rooms_config, enemy_counts
+from src.level_state import LevelState
+from src.room_prefetch import RoomPrefetcher
+from src.placement import room_blocked_array, box_free, sample_positions
+from src.async_writer import AsyncWriter, indented_json_bytes
+from src.save_game import SaveGame, encode_save
+from src.state_hash import StateHashLog, value_hash, game_state_hash, projectile_hashes
+
+EXIT_ROOM_ID = 20
+ROOMS_CONFIG_PATH = 'config/rooms_config.json'
+SAVE_GAME_PATH = 'config/savegame.sav'
+
+# The whole simulation state at the start of a tick, see GameManager.snapshot.
+WorldSnapshot = namedtuple("WorldSnapshot", [
+    "epoch", "tick", "room", "room_log", "player", "game_state", "explored", "chests",
+    "projectiles", "enemies", "items",
+])
 
 class GameManager:
-    def __init__(self, config):
-        """Initialize the game manager with configuration and game state"""
+    def __init__(self, config, seed=None):
+        """Initialize the game manager with configuration and game state; seed fixes the rolled item layout"""
         self.config = config
+        self.seed = seed
+        self.writer = AsyncWriter(config.get("io", {}).get("async_writes", True))
+        save_config = config.get("save", {})
+        self.save_path = save_config.get("path", SAVE_GAME_PATH)
+        self.save_compress = save_config.get("compress", True)
         self.wall_width = config["game"]["wall_width"]
         self.screen_width = config["game"]["screen_width"]
         self.screen_height = config["game"]["screen_height"]
+        self.cell_size = config.get("collision", {}).get("cell_size", 64)
+        self.projectile_pool = ProjectilePool(cell_size=self.cell_size)
+        self.room_collision = RoomCollisionCache((self.screen_width, self.screen_height),
+                                                 config.get("level", {}).get("max_resident_masks"),
+                                                 keep=self.pinned_rooms)
         self.player, self.game_state, self.explored_rooms, self.room_minimap_pos = self.init_global_state()
+        self.tick = 0
+        self.events = []
+        # Snapshots of the last ticks for rewind(); the epoch changes whenever the world is reset or
+        # reloaded, which older snapshots cannot be restored across. The room log lists the rooms
+        # entered or restored, so a restore knows which rooms can differ from its snapshot.
+        self.world_epoch = 0
+        self._room_log = []
+        self._explored_snapshot = None
+        self.history = deque(maxlen=config.get("snapshots", {}).get("history", 0))
+        # Every tick's state_hashes() when set, to find where two runs part ways.
+        self.hash_log = StateHashLog() if config.get("hashing", {}).get("log", False) else None
         self.minimap = Minimap(config)
-        with open('config/rooms_config.json', 'r', encoding='utf-8') as f:
-            self.rooms_config = json.load(f)
-        self.rooms_config["rooms"] = [copy.deepcopy(room) for room in self.rooms_config["rooms"]]
-        for room in self.rooms_config.get("rooms", []):
-            for chest in room.get("chests", []):
-                try:
-                    chest["is_got"] = False
-                except Exception:
-                    pass
+        self.compiled_level = None
+        self.rooms_config = self.load_rooms_config()
         self.room_neighbors = self.rooms_config["room_neighbors"]
-        self.enemy_manager = EnemyManager(self.rooms_config)
-        self.item_manager = ItemManager(self.rooms_config)
-        self.enemy_manager.load_all_rooms()
+        self.room_registry = RoomRegistry(self.rooms_config)
+        self.level_state = LevelState(self.rooms_config, self.room_registry)
+        self.room_graph = self.load_room_graph()
+        enemy_config = config.get("enemies", {})
+        level_config = config.get("level", {})
+        self.enemy_manager = EnemyManager(
+            self.rooms_config,
+            vectorized=enemy_config.get("vectorized", False),
+            vectorize_min_enemies=enemy_config.get("vectorize_min_enemies", 0),
+            projectile_pool=self.projectile_pool,
+            cell_size=self.cell_size,
+            max_resident_enemies=level_config.get("max_resident_enemies")
+        )
+        self.item_manager = ItemManager(self.rooms_config, cell_size=self.cell_size,
+                                        room_collision=self.room_collision,
+                                        max_resident_items=level_config.get("max_resident_items"),
+                                        start_room=config["player"]["initial_room"],
+                                        screen_size=(self.screen_width, self.screen_height),
+                                        writer=self.writer, seed=seed, room_registry=self.room_registry)
         self.enemy_manager.activate_room(self.player.current_room)
+        prefetch_config = config.get("prefetch", {})
+        self.prefetcher = RoomPrefetcher(prefetch_config.get("distance", 120), prefetch_config.get("budget_ms", 4),
+                                         prefetch_config.get("enabled", True))
+        self.prefetcher.add_preparer("enemies", self.enemy_manager.prepare_room)
+        self.prefetcher.add_preparer("items", self.item_manager.prepare_room)
+        self.prefetcher.add_preparer("collision", self.prepare_room_collision)
 
     def init_global_state(self):
         """Initialize the global game state including player and explored rooms"""
         player = Player(
             self.config["player"]["initial_pos"][0],
-            self.config["player"]["initial_pos"][1]
+            self.config["player"]["initial_pos"][1],
+            projectile_pool=self.projectile_pool
         )
         player.current_room = self.config["player"]["initial_room"]
         player.just_switched = False
-        player.room_bullets = {}
         player.bullets = []
         game_state = {"has_treasure": False, "tip_text": "", "tip_timer": 0}
         explored_rooms = [self.config["player"]["initial_room"]]
         room_minimap_pos = {self.config["player"]["initial_room"]: (0, 0)}
         return player, game_state, explored_rooms, room_minimap_pos
 
+    def load_rooms_config(self):
+        """Load the level with every chest unopened, from the compiled binary level when enabled"""
+        level_config = self.config.get("level", {})
+        if self.compiled_level is not None:
+            self.compiled_level.close()
+            self.compiled_level = None
+        if level_config.get("binary", False):
+            try:
+                rooms_config = load_level(ROOMS_CONFIG_PATH, level_config.get("compiled_path", "config/rooms_config.bin"),
+                                          reset_chests=True)
+                self.compiled_level = rooms_config["rooms"].level
+                return rooms_config
+            except Exception as e:
+                print(f"Warning: failed to load compiled level, using {ROOMS_CONFIG_PATH}: {e}")
+        with open(ROOMS_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            rooms_config = json.load(f)
+        rooms_config["rooms"] = [copy.deepcopy(room) for room in rooms_config["rooms"]]
+        for room in rooms_config.get("rooms", []):
+            for chest in room.get("chests", []):
+                try:
+                    chest["is_got"] = False
+                except Exception:
+                    pass
+        return rooms_config
+
+    def load_room_graph(self):
+        """Analyze the level's room graph, reusing the cached analysis while the level is unchanged"""
+        exit_room = self.room_registry.get(EXIT_ROOM_ID)
+        exit_rooms = [EXIT_ROOM_ID] if exit_room and exit_room.get("is_exit") else []
+        graph = load_room_graph(self.rooms_config, self.config["player"]["initial_room"], exit_rooms,
+                                cache_dir=self.config.get("room_graph", {}).get("cache_dir"),
+                                registry=self.room_registry)
+        if graph.unreachable:
+            print(f"Warning: rooms unreachable from the start room: {graph.unreachable}")
+        if graph.layout_conflicts:
+            print(f"Warning: room doors that do not fit a grid layout: {graph.layout_conflicts}")
+        return graph
+
     def get_player_rect(self):
         """Get the player's collision rectangle"""
         if hasattr(self.player, 'get_rect'):
@@ -55,6 +156,12 @@ class GameManager:
                           self.player["pos"][1] - self.player["radius"],
                           self.player["radius"] * 2, self.player["radius"] * 2)
 
+    def emit(self, event_type, **data):
+        """Record a simulation event for the current tick"""
+        data["type"] = event_type
+        data["tick"] = self.tick
+        self.events.append(data)
+
     def show_tip(self, text, duration=None):
         """Display a tip message on screen for specified duration"""
         if duration is None:
@@ -66,36 +173,24 @@ class GameManager:
         self.game_state["tip_text"] = text
         self.game_state["tip_timer"] = duration * 60
 
+    def update_tip(self):
+        """Count down the tip timer and clear the tip when it expires"""
+        if self.game_state.get("tip_timer", 0) > 0:
+            self.game_state["tip_timer"] -= 1
+            if self.game_state["tip_timer"] == 0:
+                self.game_state["tip_text"] = ""
+
     def check_wall_collision(self, new_pos):
         """Check if player would collide with walls at the given position"""
-        current_room_data = self.get_current_room()
+        room = self.room_collision.get(self.get_current_room())
         player_rect = pg.Rect(new_pos[0] - self.player.radius, new_pos[1] - self.player.radius,
                               self.player.radius * 2, self.player.radius * 2)
-        for wall in current_room_data["walls"]:
-            wall_rect = pg.Rect(wall[0], wall[1], wall[2], wall[3])
-            in_gap = False
-            for gap_dir, gap_info in current_room_data.get("gaps", {}).items():
-                if gap_dir in ["left", "right"]:
-                    gap_x, gap_y_min, gap_y_max = gap_info
-                    if gap_dir == "right" and wall_rect.x == gap_x and gap_y_min <= new_pos[1] <= gap_y_max:
-                        in_gap = True
-                    elif gap_dir == "left" and (wall_rect.x + wall_rect.width) == gap_x and gap_y_min <= new_pos[1] <= gap_y_max:
-                        in_gap = True
-                elif gap_dir in ["top", "bottom"]:
-                    gap_x_min, gap_x_max, gap_y = gap_info
-                    if gap_dir == "top" and (wall_rect.y + wall_rect.height) == gap_y and gap_x_min <= new_pos[0] <= gap_x_max:
-                        in_gap = True
-                    elif gap_dir == "bottom" and wall_rect.y == gap_y and gap_x_min <= new_pos[0] <= gap_x_max:
-                        in_gap = True
-                if in_gap:
-                    break
-            if not in_gap and player_rect.colliderect(wall_rect):
-                return True
-        return False
+        return room.rect_blocked(player_rect, center=new_pos)
 
-    def handle_input(self):
+    def handle_input(self, keys=None):
         """Handle player input and movement with collision detection"""
-        keys = pg.key.get_pressed()
+        if keys is None:
+            keys = pg.key.get_pressed()
         self.player.update(keys, self.screen_width, self.screen_height)
         if self.check_wall_collision([self.player.x, self.player.y]):
             if keys[pg.K_w] or keys[pg.K_UP]:
@@ -121,7 +216,7 @@ class GameManager:
                 gap_x, gap_y_min, gap_y_max = gap_info
             elif gap_dir in ["top", "bottom"]:
                 gap_x_min, gap_x_max, gap_y = gap_info
-            target_room_id = self.room_neighbors.get(str(self.player.current_room), {}).get(gap_dir)
+            target_room_id = self.room_registry.neighbor(self.player.current_room, gap_dir)
             if target_room_id is None:
                 continue
             switch_triggered = False
@@ -139,6 +234,7 @@ class GameManager:
                 new_player_pos[1] = self.wall_width + pr
                 switch_triggered = True
             if switch_triggered:
+                switch_start = time.perf_counter()
                 prev_room_id = self.player.current_room
                 self.player.x, self.player.y = new_player_pos
                 self.player.switch_room(target_room_id)
@@ -147,7 +243,10 @@ class GameManager:
                     self.explored_rooms.append(target_room_id)
                     prev_x, prev_y = self.room_minimap_pos[prev_room_id]
                     cell_size = self.minimap.cell_size
-                    if gap_dir == "left":
+                    grid_pos = self.room_graph.grid_pos(target_room_id)
+                    if grid_pos is not None:
+                        new_x, new_y = grid_pos[0] * cell_size, grid_pos[1] * cell_size
+                    elif gap_dir == "left":
                         new_x, new_y = prev_x - cell_size, prev_y
                     elif gap_dir == "right":
                         new_x, new_y = prev_x + cell_size, prev_y
@@ -157,46 +256,82 @@ class GameManager:
                         new_x, new_y = prev_x, prev_y + cell_size
                     self.room_minimap_pos[target_room_id] = (new_x, new_y)
                 self.enemy_manager.activate_room(target_room_id)
+                self._room_log.append(target_room_id)
+                self.prefetcher.record_switch(target_room_id, time.perf_counter() - switch_start)
+                self.emit("room_switch", from_room=prev_room_id, to_room=target_room_id)
                 return
 
+    def pinned_rooms(self):
+        """Return the rooms whose prepared data must stay resident: the room in play and those being prefetched"""
+        return (self.player.current_room, *self.prefetcher.prefetched_rooms())
+
+    def prepare_room_collision(self, room_id, room_data=None):
+        """Compile a room's walls ahead of a visit"""
+        self.room_collision.warm(room_data if room_data is not None else self.level_state.room(room_id))
+
+    def run_prefetch(self, budget=None):
+        """Prepare queued neighbor rooms for up to budget seconds (the configured budget by default)"""
+        return self.prefetcher.run(budget, self.level_state.get)
+
     def update_enemies(self):
         """Update all active enemies in the current room"""
         player_sprite = pg.sprite.Sprite()
         player_sprite.rect = self.get_player_rect()
-        self.enemy_manager.update(player_sprite)
+        self.enemy_manager.update(player_sprite, (self.screen_width, self.screen_height))
 
     def handle_bullet_collisions(self):
-        """Handle collisions between player bullets and enemies"""
-        for bullet in self.player.bullets[:]:
-            bullet_rect = bullet.get_rect()
-            hit_enemy = False
-            for enemy in self.enemy_manager.get_active_enemies():
-                if bullet_rect.colliderect(enemy.rect):
-                    if hasattr(enemy, 'take_damage'):
-                        enemy.take_damage(bullet.damage)
-                        try:
-                            from src.audio import play_sound
-                            play_sound('enemy_hurt')
-                        except Exception:
-                            pass
-                    hit_enemy = True
-                    break
-            if hit_enemy:
-                bullet.active = False
-                self.player.bullets.remove(bullet)
+        """Handle collisions between player bullets and enemies, testing all bullets against the enemies at once"""
+        bullets = self.player.bullets
+        slots, x, y, w, h = bullets.hit_arrays()
+        if len(slots) == 0:
+            return
+        handles = bullets.pool.handles
+        slots = slots.tolist()
+        for index, enemies in self.enemy_manager.enemies_colliding_boxes(x, y, w, h):
+            # Bullets are resolved in spawn order, so an earlier one may have killed this one's first enemy.
+            enemy = next((e for e in enemies if e.alive()), None)
+            if enemy is None:
+                continue
+            bullet = handles[slots[index]]
+            if hasattr(enemy, 'take_damage'):
+                self.enemy_manager.damage_enemy(enemy, bullet.damage)
+                self.emit("enemy_hit", enemy=enemy.__class__.__name__.lower(),
+                          damage=bullet.damage, killed=enemy.hp <= 0)
+                try:
+                    from src.audio import play_sound
+                    play_sound('enemy_hurt')
+                except Exception:
+                    pass
+            bullet.active = False
 
     def handle_enemy_collisions(self):
         """Handle collisions between player and enemies"""
-        for enemy in self.enemy_manager.get_active_enemies():
-            if self.get_player_rect().colliderect(enemy.rect):
-                self.player.take_damage(10)
+        for enemy in self.enemy_manager.enemies_colliding(self.get_player_rect()):
+            if self.player.take_damage(10):
+                self.emit("player_hit", source=enemy.__class__.__name__.lower(), damage=10)
 
     def handle_fireball_collisions(self):
         """Handle collisions between player and enemy fireballs"""
-        for fireball in self.enemy_manager.get_projectiles():
-            if self.get_player_rect().colliderect(fireball.rect):
-                damage = fireball.hit_player(self.player)
-                self.player.take_damage(damage)
+        for fireball in self.enemy_manager.get_projectiles().overlapping(self.get_player_rect()):
+            damage = fireball.hit_player(self.player)
+            if self.player.take_damage(damage):
+                self.emit("player_hit", source="fireball", damage=damage)
+
+    def get_collision_stats(self):
+        """Get spatial hash counters per collision layer: candidate pairs tested versus actual hits"""
+        return {
+            "enemies": self.enemy_manager.spatial.get_stats(),
+            "projectiles": self.projectile_pool.get_collision_stats(),
+            "items": self.item_manager.get_collision_stats(),
+        }
+
+    def get_residency_stats(self):
+        """Get how many rooms and entities are materialized per manager, and how many rooms were dehydrated"""
+        return {
+            "enemies": self.enemy_manager.get_residency_stats(),
+            "items": self.item_manager.get_residency_stats(),
+            "collision": self.room_collision.get_residency_stats(),
+        }
 
     def update_items(self):
         """Update items and check for player collisions with items"""
@@ -205,29 +340,45 @@ class GameManager:
             if not isinstance(item_message, str):
                 item_message = str(item_message)
             self.show_tip(item_message, 2)
+            self.emit("item", message=item_message)
         self.item_manager.update_traps()
 
     def get_current_room(self):
         """Get the configuration data for the current room"""
-        return next(r for r in self.rooms_config["rooms"] if r["room_id"] == self.player.current_room)
+        return self.level_state.room(self.player.current_room)
 
     def check_chest_and_exit(self, gui_manager, restart_action, quit_action, settings_action):
         """Check for chest collection and exit conditions"""
+        if self.update_chest_and_exit():
+            gui_manager.victory = True
+            gui_manager.show_end_buttons(
+                restart_action=restart_action,
+                quit_action=quit_action,
+                settings_action=settings_action
+            )
+            gui_manager.current_screen = "end"
+            return True
+        return False
+
+    def update_chest_and_exit(self):
+        """Collect chests the player touches and return True once the player escapes with the treasure"""
         player_rect = self.get_player_rect()
         current_room_data = self.get_current_room()
-        for chest in current_room_data.get("chests", []):
+        for index, chest in enumerate(current_room_data.get("chests", [])):
             if not chest["is_got"]:
                 chest_rect = pg.Rect(chest["pos"][0] - 15, chest["pos"][1] - 15, 30, 30)
                 if player_rect.colliderect(chest_rect):
-                    chest["is_got"] = True
+                    room = self.level_state.mutable_room(self.player.current_room, "chests")
+                    room["chests"][index]["is_got"] = True
                     self.game_state["has_treasure"] = True
+                    self.emit("treasure", room=self.player.current_room)
                     self.show_tip("Found the treasure! You can go to the exit!", 3)
                     try:
                         from src.audio import play_sound
                         play_sound('treasure')
                     except Exception:
                         pass
-        if self.player.current_room == 20 and current_room_data.get("is_exit"):
+        if self.player.current_room == EXIT_ROOM_ID and current_room_data.get("is_exit"):
             exit_area = self.rooms_config["exit_detection"]
             exit_rect = pg.Rect(
                 exit_area["x_min"],
@@ -237,136 +388,350 @@ class GameManager:
             )
             if player_rect.colliderect(exit_rect):
                 if self.game_state.get("has_treasure"):
-                    gui_manager.victory = True
                     self.show_tip("You win!", 2)
-                    gui_manager.show_end_buttons(
-                        restart_action=restart_action,
-                        quit_action=quit_action,
-                        settings_action=settings_action
-                    )
-                    gui_manager.current_screen = "end"
+                    self.emit("victory")
                     return True
                 else:
                     self.show_tip("Treasure not found yet!", 2)
         return False
 
-    def update(self):
+    def update(self, keys=None):
         """Update all game systems including input, collisions, and entities"""
-        self.handle_input()
+        if self.history.maxlen:
+            self.history.append(self.snapshot())
+        self.tick += 1
+        self.events = []
+        self.handle_input(keys)
         self.handle_room_switch()
+        self.prefetcher.update(self.player.current_room, self.get_current_room(), self.player.x, self.player.y,
+                               self.player.radius, self.room_registry.neighbor)
         self.update_enemies()
         self.handle_bullet_collisions()
         self.handle_enemy_collisions()
         self.handle_fireball_collisions()
         self.update_items()
+        self.update_tip()
+        if self.hash_log is not None:
+            self.hash_log.append(self.tick, self.state_hashes())
+
+    def step(self, action=None):
+        """Advance the simulation one tick from scripted input without touching the display or sleeping.
+
+        action: an InputState, a dict like {"right": True, "shoot": True}, a sequence of action names or None
+        Returns (observation, events) where events lists what happened during the tick.
+        """
+        inputs = InputState.from_action(action)
+        done = self.is_player_dead() or self.game_state.get("victory", False)
+        if done:
+            self.events = []
+            return self.get_observation(), []
+        if inputs.shoot:
+            self.player.shoot()
+        self.update(inputs)
+        self.run_prefetch()
+        events = self.events
+        if self.update_chest_and_exit():
+            self.game_state["victory"] = True
+            events = self.events
+        elif self.is_player_dead():
+            self.emit("death")
+        return self.get_observation(), events
+
+    def get_observation(self):
+        """Summarize the simulation state as plain data"""
+        observation = self.player.get_state()
+        observation.update({
+            "tick": self.tick,
+            "has_treasure": self.game_state.get("has_treasure", False),
+            "victory": self.game_state.get("victory", False),
+            "explored_rooms": len(self.explored_rooms),
+            "enemies": len(self.enemy_manager.active_group),
+            "projectiles": len(self.enemy_manager.get_projectiles()),
+            "distance_to_treasure": self.room_graph.distance_to_treasure(self.player.current_room),
+            "distance_to_exit": self.room_graph.distance_to_exit(self.player.current_room),
+        })
+        observation["done"] = observation["victory"] or not observation["alive"]
+        return observation
 
     def is_player_dead(self):
         """Check if the player is dead"""
         return not self.player.health_system.is_alive
 
-    def restart_game(self):
-        """Restart the game by resetting all game state"""
-        import os
-        if os.path.exists('config/items_state.json'):
-            os.remove('config/items_state.json')
+    def restart_game(self, remove_item_state=True):
+        """Restart the game by resetting all game state.
+
+        remove_item_state=False keeps items_state.json, e.g. when replaying a recording.
+        """
+        if remove_item_state:
+            self.writer.remove(ITEMS_STATE_PATH)
         self.player, self.game_state, self.explored_rooms, self.room_minimap_pos = self.init_global_state()
-        with open('config/rooms_config.json', 'r', encoding='utf-8') as f:
-            self.rooms_config = json.load(f)
-        self.rooms_config["rooms"] = [copy.deepcopy(room) for room in self.rooms_config["rooms"]]
-        for room in self.rooms_config["rooms"]:
-            for chest in room.get("chests", []):
-                chest["is_got"] = False
-        self.enemy_manager.clear_all()
-        self.enemy_manager.rooms_config = self.rooms_config
-        self.enemy_manager.load_all_rooms()
+        # The level template is never modified during play, so dropping the run's changes resets it.
+        self.level_state.reset()
+        self.enemy_manager.reset_all_enemies()
         self.enemy_manager.activate_room(self.player.current_room)
-        self.item_manager = ItemManager(self.rooms_config)
+        self.item_manager.reset()
+        self.prefetcher.reset()
         if hasattr(self.player, 'clear_all_bullets'):
             self.player.clear_all_bullets()
         self.game_state = {"has_treasure": False, "tip_text": "", "tip_timer": 0}
+        self.tick = 0
+        self.events = []
+        self.new_world_epoch()
         print("Game restarted - all enemies and items reset")
     
-    def randomize_enemies(self, enemy_counts):
-        """Randomize enemy distribution across rooms with specified counts"""
-        desired = {k.lower(): (None if v is None else int(v)) for k, v in (enemy_counts or {}).items()}
+    def capture_world(self):
+        """Return the global game state kept in a save game; per-room state comes from the managers"""
+        return {
+            "tick": self.tick,
+            "room_count": len(self.room_registry),
+            "player": self.player.get_save_state(),
+            "game_state": dict(self.game_state),
+            "explored_rooms": list(self.explored_rooms),
+            "room_minimap_pos": [[room_id, x, y] for room_id, (x, y) in self.room_minimap_pos.items()],
+            "chests": [[room_id, list(flags)] for room_id, flags in self.chest_flags()],
+            # Rooms whose items were never rolled are left out of the save and rolled from this on load.
+            "item_seed": self.item_manager.layout_seed,
+            # Bullets and fireballs in flight: their pool values in spawn order, then their own attributes.
+            "projectiles": [[*values, handle.get_save_state()]
+                            for values, handle in self.projectile_pool.export_live()],
+            # Rooms left so far; loading rebuilds their snapshot entries, so the state hashes match this game's.
+            "frozen_rooms": {"enemies": self.enemy_manager.frozen_room_ids(),
+                             "items": self.item_manager.frozen_room_ids()},
+        }
 
-        def generate_random_position():
-            """Generate random position within room boundaries"""
-            margin = 80
-            x = random.randint(self.wall_width + margin, self.screen_width - self.wall_width - margin)
-            y = random.randint(self.wall_width + margin, self.screen_height - self.wall_width - margin)
-            return [x, y]
-
-        def is_valid_position(pos, existing_positions, min_distance=40):
-            """Check if position is valid and not too close to other enemies"""
-            for existing_pos in existing_positions:
-                distance = ((pos[0] - existing_pos[0]) ** 2 + (pos[1] - existing_pos[1]) ** 2) ** 0.5
-                if distance < min_distance:
-                    return False
-            return True
+    def chest_flags(self):
+        """Return (room_id, is_got flags) pairs for the rooms whose chests changed during the run"""
+        return [(room_id, tuple(chest.get("is_got", False)
+                                for chest in self.level_state.room(room_id).get("chests", [])))
+                for room_id in self.level_state.modified_rooms]
 
-        for room in self.rooms_config.get("rooms", []):
-            room["enemies"] = []
-        for etype, target_count in desired.items():
-            if target_count is None or target_count <= 0:
-                continue
-            room_positions = {}
-            for room in self.rooms_config.get("rooms", []):
-                room_id = room["room_id"]
-                room_positions[room_id] = []
-                for enemy in room.get("enemies", []):
-                    if "pos" in enemy:
-                        room_positions[room_id].append(enemy["pos"])
-            enemies_to_place = target_count
-            max_attempts_per_enemy = 10
-            while enemies_to_place > 0:
-                room = random.choice(self.rooms_config["rooms"])
-                room_id = room["room_id"]
-                position_found = False
-                for attempt in range(max_attempts_per_enemy):
-                    new_pos = generate_random_position()
-                    if is_valid_position(new_pos, room_positions[room_id]):
-                        room.setdefault("enemies", []).append({
-                            "type": etype,
-                            "pos": new_pos,
-                            "hp": 1,
-                            "speed": 1
-                        })
-                        room_positions[room_id].append(new_pos)
-                        position_found = True
-                        break
-                if not position_found:
-                    new_pos = generate_random_position()
-                    room.setdefault("enemies", []).append({
-                        "type": etype,
-                        "pos": new_pos,
-                        "hp": 1,
-                        "speed": 1
-                    })
-                    room_positions[room_id].append(new_pos)
-                    print(f"Warning: Could not find ideal position for {etype} in room {room_id}")
-                enemies_to_place -= 1
+    def snapshot(self):
+        """Capture the whole simulation state in memory; restore(snapshot) puts the game back to it.
+
+        Rooms only change while the player is in them, so the room in play is
+        the only one read: the managers keep an entry for each room as it is
+        left, and every snapshot shares those. A snapshot is only good until the
+        game is restarted, loaded or its enemies are randomized.
+        """
+        return WorldSnapshot(
+            epoch=self.world_epoch,
+            tick=self.tick,
+            room=self.player.current_room,
+            room_log=len(self._room_log),
+            player=self.player.get_snapshot(),
+            game_state=dict(self.game_state),
+            explored=self.explored_snapshot(),
+            chests=self.chest_flags(),
+            projectiles=self.projectile_pool.snapshot(),
+            enemies=self.enemy_manager.snapshot(),
+            items=self.item_manager.snapshot(self.player.current_room),
+        )
+
+    def restore(self, snapshot):
+        """Put the simulation back to a snapshot taken since the world was last reset or loaded"""
+        if snapshot.epoch != self.world_epoch:
+            raise ValueError("snapshot was taken before the game was restarted or loaded")
+        # Only the rooms entered or restored since the snapshot, and the two rooms in play, can differ from it.
+        rooms = set(self._room_log[snapshot.room_log:])
+        rooms.add(snapshot.room)
+        rooms.add(self.player.current_room)
+        self.projectile_pool.restore(snapshot.projectiles)
+        self.player.apply_snapshot(snapshot.player)
+        self.enemy_manager.restore_snapshot(snapshot.enemies, rooms)
+        self.item_manager.restore_snapshot(snapshot.items, rooms)
+        if len(self._room_log) > snapshot.room_log:
+            # Snapshots taken after this one, in the timeline just undone, may differ in these rooms too.
+            self._room_log.extend(rooms)
+        self.game_state = dict(snapshot.game_state)
+        explored_rooms, room_minimap_pos = self._explored_snapshot = snapshot.explored
+        self.explored_rooms = list(explored_rooms)
+        self.room_minimap_pos = dict(room_minimap_pos)
+        chests = dict(snapshot.chests)
+        for room_id in self.level_state.modified_rooms:
+            if room_id not in chests:
+                self.level_state.revert_room(room_id)
+        for room_id, flags in snapshot.chests:
+            room = self.level_state.mutable_room(room_id, "chests")
+            for chest, is_got in zip(room.get("chests", []), flags):
+                chest["is_got"] = is_got
+        self.tick = snapshot.tick
+        self.events = []
+
+    def state_hashes(self):
+        """Hash the simulation state, one 64-bit value per subsystem in state_hash.SUBSYSTEMS.
+
+        Only the room in play and the live projectiles are read; the enemy and
+        item managers keep the hashes of the other rooms as they are left.
+        """
+        bullets, projectiles = projectile_hashes(self.projectile_pool)
+        fields, health = self.player.get_snapshot()
+        return (
+            value_hash(fields + health),
+            bullets,
+            self.enemy_manager.state_hash(),
+            projectiles,
+            self.item_manager.state_hash(self.player.current_room),
+            game_state_hash(self.game_state),
+        )
+
+    def explored_snapshot(self):
+        """Return the explored rooms and their minimap positions, copied again only once a room was added"""
+        cached = self._explored_snapshot
+        if cached is None or len(cached[0]) != len(self.explored_rooms):
+            cached = self._explored_snapshot = (tuple(self.explored_rooms), dict(self.room_minimap_pos))
+        return cached
+
+    def rewind(self, ticks=1):
+        """Go back the given number of ticks using the snapshot history; returns False if it does not reach that far"""
+        if ticks <= 0 or ticks > len(self.history):
+            return False
+        snapshot = self.history[-ticks]
+        for _ in range(ticks):
+            self.history.pop()
+        self.restore(snapshot)
+        return True
+
+    def new_world_epoch(self):
+        """Invalidate every snapshot taken so far, after the world was reset or reloaded"""
+        self.world_epoch += 1
+        self._room_log = []
+        self._explored_snapshot = None
+        self.history.clear()
+
+    def save_game(self, path=None):
+        """Snapshot the whole game into a binary save file, written in the background; returns its size in bytes"""
+        data = encode_save(self.capture_world(), self.enemy_manager.export_rooms(), self.item_manager.export_rooms(),
+                           compress=self.save_compress)
+        self.writer.submit(path or self.save_path, data, bytes)
+        return len(data)
+
+    def load_game(self, path=None, data=None):
+        """Restore the game from a save file, or the bytes of one, decoding each room when it is first needed.
+
+        The rooms the player had left are decoded right away, as the state hashes sum them up.
+
+        Returns False on failure.
+        """
+        path = path or self.save_path
+        self.writer.flush()
         try:
-            with open('config/rooms_config.json', 'w', encoding='utf-8') as wf:
-                json.dump(self.rooms_config, wf, ensure_ascii=False, indent=2)
+            save = SaveGame(data) if data is not None else SaveGame.read(path)
+            world = save.world
+            if world.get("room_count") != len(self.room_registry):
+                raise ValueError("it was made for a different level")
+        except FileNotFoundError:
+            return False
         except Exception as e:
-            print(f"Failed to write rooms_config.json: {e}")
-        self.enemy_manager.rooms_config = self.rooms_config
-        self.enemy_manager.all_enemies.clear()
-        self.enemy_manager.projectiles.empty()
-        self.enemy_manager.room_projectiles.clear()
-        self.enemy_manager.enemy_states.clear()
-        self.enemy_manager.active_group = pg.sprite.Group()
-        self.enemy_manager.active_room_id = None
-        self.enemy_manager.load_all_rooms()
+            print(f"Warning: Could not load save game {path}: {e}")
+            return False
+        self.player, self.game_state, self.explored_rooms, self.room_minimap_pos = self.init_global_state()
+        self.player.apply_save_state(world["player"])
+        self.game_state.update(world["game_state"])
+        self.explored_rooms = list(world["explored_rooms"])
+        self.room_minimap_pos = {room_id: (x, y) for room_id, x, y in world["room_minimap_pos"]}
+        self.level_state.reset()
+        for room_id, flags in world["chests"]:
+            room = self.level_state.mutable_room(room_id, "chests")
+            for chest, is_got in zip(room.get("chests", []), flags):
+                chest["is_got"] = is_got
+        frozen_rooms = world.get("frozen_rooms", {})
+        self.enemy_manager.load_saved_rooms(save.enemy_room_ids(), save.enemy_records, frozen_rooms.get("enemies", ()))
+        self.item_manager.load_saved_rooms(save.item_room_ids(), save.item_records, world.get("item_seed"),
+                                           frozen_rooms.get("items", ()))
+        self.enemy_manager.activate_room(self.player.current_room)
+        # Mark the room in play as entered for the items too, so leaving it freezes its entry like in the saved game.
+        self.item_manager.get_room_items(self.player.current_room)
+        self.load_projectiles(world.get("projectiles", []))
+        self.prefetcher.reset()
+        self.tick = world["tick"]
+        self.events = []
+        self.new_world_epoch()
+        return True
+
+    def load_projectiles(self, rows):
+        """Respawn the bullets and fireballs of a save game, in the order they were fired"""
+        for *values, state in rows:
+            projectile_type = Bullet if values[-1] == OWNER_PLAYER else Fireball
+            self.projectile_pool.spawn_saved(projectile_type.from_save_state(state), values)
+
+    def randomize_enemies(self, enemy_counts, rng=None, write_config=True):
+        """Randomize enemy distribution across rooms with specified counts.
+
+        rng is a NumPy Generator or a seed; without one a seed is drawn from the global random module.
+        write_config=False leaves rooms_config.json alone, e.g. when replaying a recording.
+        """
+        desired = {k.lower(): (None if v is None else int(v)) for k, v in (enemy_counts or {}).items()}
+        rng = np.random.default_rng(random.getrandbits(64) if rng is None else rng)
+        types = [etype for etype, count in desired.items() if count for _ in range(max(count, 0))]
+        rng.shuffle(types)
+        rooms = self.rooms_config.get("rooms", [])
+        for room in rooms:
+            room["enemies"] = []
+        if types and rooms:
+            # One pass: every enemy picks a room uniformly, then each room is sampled once for all of its
+            # enemies. A room too cramped for its share hands the rest on to the next room.
+            demand = np.bincount(rng.integers(len(rooms), size=len(types)), minlength=len(rooms)).tolist()
+            sizes = [self.enemy_manager.enemy_size(etype) for etype in set(types) if etype in ENEMY_MAPPING]
+            box = (max(w for w, _ in sizes), max(h for _, h in sizes)) if sizes else (1, 1)
+            placed = 0
+            carry = 0
+            for room, count in zip(rooms, demand):
+                count += carry
+                if count <= 0:
+                    continue
+                positions = self.sample_enemy_positions(room, count, box, rng)
+                carry = count - len(positions)
+                for x, y in positions.tolist():
+                    room["enemies"].append({"type": types[placed], "pos": [x, y], "hp": 1, "speed": 1})
+                    placed += 1
+            if carry:
+                print(f"Warning: no free space left for {carry} enemies, they were not placed")
+        if write_config:
+            self.write_rooms_config()
+        self.enemy_manager.reset_all_enemies()
         self.enemy_manager.activate_room(self.player.current_room)
+        self.new_world_epoch()
+
+    def sample_enemy_positions(self, room, count, box, rng, min_distance=40, margin=80):
+        """Return up to count enemy top-left positions in a room, clear of walls, gap approaches and the exit"""
+        rects = self.placement_blocked_rects(room)
+        blocked = room_blocked_array(self.room_collision.get(room), (self.screen_width, self.screen_height), rects)
+        inset = self.wall_width + margin
+        region = (inset, inset, self.screen_width - inset + 1, self.screen_height - inset + 1)
+        free = box_free(blocked, box[0], box[1], region)
+        return sample_positions(free, count, min_distance, rng, region)
+
+    def placement_blocked_rects(self, room, clearance=120):
+        """Return the rects of a room nothing should be placed in: the approach to each gap and the exit area"""
+        rects = []
+        for gap_dir, gap_info in room.get("gaps", {}).items():
+            if gap_dir == "left":
+                rects.append((gap_info[0], gap_info[1], clearance, gap_info[2] - gap_info[1]))
+            elif gap_dir == "right":
+                rects.append((gap_info[0] - clearance, gap_info[1], clearance, gap_info[2] - gap_info[1]))
+            elif gap_dir == "top":
+                rects.append((gap_info[0], gap_info[2], gap_info[1] - gap_info[0], clearance))
+            elif gap_dir == "bottom":
+                rects.append((gap_info[0], gap_info[2] - clearance, gap_info[1] - gap_info[0], clearance))
+        if room.get("is_exit") and "exit_detection" in self.rooms_config:
+            exit_area = self.rooms_config["exit_detection"]
+            rects.append((exit_area["x_min"], exit_area["y_min"], self.screen_width - exit_area["x_min"],
+                          exit_area["y_max"] - exit_area["y_min"]))
+        return rects
+
+    def write_rooms_config(self):
+        """Queue the level config to be written back to rooms_config.json in the background"""
+        # Room fields are replaced rather than edited in place (play changes go to the level state
+        # overlay), so copying the room dicts is enough to freeze what the writer serializes.
+        rooms_config = plain_rooms_config(self.rooms_config)
+        snapshot = dict(rooms_config, rooms=[dict(room) for room in rooms_config.get("rooms", [])])
+        self.writer.submit(ROOMS_CONFIG_PATH, snapshot, indented_json_bytes)
 
     def get_current_enemy_totals(self):
-        """Get total count of each enemy type across all rooms"""
+        """Get total count of each enemy type across all rooms, without decoding the rooms of a compiled level"""
         totals = {t: 0 for t in self.enemy_manager.enemy_types}
-        for room in self.rooms_config.get("rooms", []):
-            for e in room.get("enemies", []):
-                et = (e.get("type") or "").lower()
-                if et in totals:
-                    totals[et] += 1
+        for name, count in enemy_counts(self.rooms_config.get("rooms", [])).items():
+            et = name.lower()
+            if et in totals:
+                totals[et] += count
         return totals
\ No newline at end of file
@@ -0,0 +1,73 @@
+import pygame as pg
+from typing import Iterable, List, Optional
+
+
+class DirtyRectRenderer:
+    # This class tracks which screen areas changed between frames so only those get presented.
+    def __init__(self, screen_size, full_repaint_ratio: float = 0.6):
+        self.screen_rect = pg.Rect(0, 0, screen_size[0], screen_size[1])
+        self.full_repaint_ratio = full_repaint_ratio
+        self._previous: List[pg.Rect] = []
+        self._current: List[pg.Rect] = []
+        self._scene_key = None
+        self._full = True
+        self.frames = 0
+        self.full_frames = 0
+        self.pixels_presented = 0
+
+    # This function forces the next frame to repaint and present the whole screen.
+    def request_full_repaint(self) -> None:
+        self._full = True
+
+    # This function restores the background under last frame's sprites, or repaints it all on a scene change.
+    def begin_frame(self, screen: pg.Surface, background: pg.Surface, scene_key) -> None:
+        if scene_key != self._scene_key:
+            self._full = True
+            self._scene_key = scene_key
+        if self._full:
+            screen.blit(background, (0, 0))
+        else:
+            for rect in self._previous:
+                screen.blit(background, rect.topleft, rect)
+        self._current = []
+
+    # This function records an area drawn during the current frame.
+    def mark(self, rect) -> None:
+        if rect is not None:
+            self._current.append(pg.Rect(rect))
+
+    # This function records several areas drawn during the current frame.
+    def mark_all(self, rects: Optional[Iterable]) -> None:
+        if rects:
+            for rect in rects:
+                self.mark(rect)
+
+    # This function ends the frame and returns the rects to present, or None when a full flip is needed.
+    def end_frame(self) -> Optional[List[pg.Rect]]:
+        current = [r.clip(self.screen_rect) for r in self._current]
+        current = [r for r in current if r.width > 0 and r.height > 0]
+        full = self._full
+        self._full = False
+        dirty = self._previous + current
+        self._previous = current
+        self.frames += 1
+
+        if not full:
+            area = sum(r.width * r.height for r in dirty)
+            if area > self.full_repaint_ratio * self.screen_rect.width * self.screen_rect.height:
+                full = True
+        if full:
+            self.full_frames += 1
+            self.pixels_presented += self.screen_rect.width * self.screen_rect.height
+            return None
+        self.pixels_presented += sum(r.width * r.height for r in dirty)
+        return dirty
+
+    # This function returns the average share of the screen presented per frame.
+    def get_stats(self):
+        total = self.screen_rect.width * self.screen_rect.height * max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "full_frames": self.full_frames,
+            "presented_ratio": self.pixels_presented / total,
+        }
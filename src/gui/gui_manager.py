@@ -1,5 +1,9 @@
 import pygame as pg
 from src.audio import play_sound
+from src.assets import load_image
+from src.gui.room_layer import RoomLayerCache
+from src.gui.dirty_rects import DirtyRectRenderer
+from src.gui.text_cache import TextCache, HudValue
 from typing import Dict, List, Tuple
 
 class GUIManager:
@@ -26,30 +30,25 @@ class GUIManager:
         self.previous_screen = None
 
         self.backgrounds = {}
-        self.backgrounds["start"] = pg.image.load("assets/ui/start_background.jpg").convert()
-        self.backgrounds["start"] = pg.transform.scale(self.backgrounds["start"], (self.screen_width, self.screen_height))
-        self.backgrounds["end"] = pg.image.load("assets/ui/end_background.jpg").convert()
-        self.backgrounds["end"] = pg.transform.scale(self.backgrounds["end"], (self.screen_width, self.screen_height))
-
-        self.backgrounds["settings"] = pg.image.load("assets/ui/settings_background.jpg").convert()
-        self.backgrounds["settings"] = pg.transform.scale(self.backgrounds["settings"], (self.screen_width, self.screen_height))
+        screen_size = (self.screen_width, self.screen_height)
+        self.backgrounds["start"] = load_image("assets/ui/start_background.jpg", screen_size, convert="opaque")
+        self.backgrounds["end"] = load_image("assets/ui/end_background.jpg", screen_size, convert="opaque")
+        self.backgrounds["settings"] = load_image("assets/ui/settings_background.jpg", screen_size, convert="opaque")
 
         try:
             self.icons = {
-                "health": pg.image.load("assets/ui/heart_icon.png").convert_alpha(),
-                "treasure": pg.image.load("assets/ui/treasure_icon.png").convert_alpha(),
+                "health": load_image("assets/ui/heart_icon.png", (20, 20)),
+                "treasure": load_image("assets/ui/treasure_icon.png", (20, 20)),
             }
-            for key in self.icons:
-                self.icons[key] = pg.transform.scale(self.icons[key], (20, 20))
         except:
             self.icons = {}  
 
        
-        self.raider_raw = pg.image.load("assets/raider.png").convert_alpha()
-        self.treasure_raw = pg.image.load("assets/treasure.png").convert_alpha()
+        self.raider_raw = load_image("assets/raider.png")
+        self.treasure_raw = load_image("assets/treasure.png")
 
         try:
-            self.treasure_find_raw = pg.image.load("assets/treasure_find.png").convert_alpha()
+            self.treasure_find_raw = load_image("assets/treasure_find.png")
         except Exception:
             self.treasure_find_raw = None
 
@@ -68,21 +67,44 @@ class GUIManager:
         self._settings_action = None
 
         self._get_current_enemy_totals = lambda: {t: 0 for t in self.enemy_types}
-    # This function draws the game scene including walls, player, enemies, items, and room features.
-    def draw_game_screen(self, screen: pg.Surface, player, current_room_data, minimap, room_neighbors, room_minimap_pos, rooms_config, item_manager, enemy_manager=None):
-        screen.fill(self.colors["WHITE"])
 
-        for wall in current_room_data["walls"]:
-            pg.draw.rect(screen, self.colors["BROWN"], (wall[0], wall[1], wall[2], wall[3]))
+        self.text_cache = TextCache(
+            config["ui"]["fonts"].get("text_cache_size", 256),
+            config["ui"]["fonts"].get("fallback_fonts", [])
+        )
+        main_font = self.fonts["main"]
+        self.hud_widgets = {
+            "health": HudValue(self.text_cache, main_font, lambda v: f"HP: {v[0]}/{v[1]}", self.colors["BLACK"]),
+            "ammo": HudValue(self.text_cache, main_font, lambda v: f"Ammo: {v}", self.colors["BLACK"]),
+            "room": HudValue(self.text_cache, main_font, lambda v: f"Room: {v}/20", self.colors["BLACK"]),
+            "treasure": HudValue(self.text_cache, main_font,
+                                 lambda v: "Treasure Found" if v else "Treasure Not Found"),
+            "tip": HudValue(self.text_cache, main_font, lambda v: v, self.colors["BROWN"]),
+        }
+        self._overlay = pg.Surface((self.screen_width, self.screen_height), pg.SRCALPHA)
+        self._overlay.fill((0, 0, 0, 128))
 
-        current_room_id = self._get_player_room_id(player)
-        
-        if current_room_id == 1:
+        render_config = config.get("render", {})
+        self.room_layers = RoomLayerCache(render_config.get("room_layer_cache_size", 8))
+        self.dirty_renderer = None
+        if render_config.get("dirty_rects", False):
+            self.dirty_renderer = DirtyRectRenderer((self.screen_width, self.screen_height))
+
+    # This function bakes the static part of a room (floor, walls, labels, chests) onto a layer surface.
+    def _build_room_layer(self, surface: pg.Surface, room_data: Dict, rooms_config: Dict) -> None:
+        surface.fill(self.colors["WHITE"])
+
+        for wall in room_data["walls"]:
+            pg.draw.rect(surface, self.colors["BROWN"], (wall[0], wall[1], wall[2], wall[3]))
+
+        room_id = room_data.get("room_id")
+
+        if room_id == 1:
             entrance_rect = pg.Rect(0, 250, self.wall_width, 100)
-            pg.draw.rect(screen, self.colors["GREEN"], entrance_rect, 3)
-            screen.blit(self.fonts["label"].render("Entrance", True, self.colors["GREEN"]), (5, 280))
+            pg.draw.rect(surface, self.colors["GREEN"], entrance_rect, 3)
+            surface.blit(self.text_cache.render(self.fonts["label"], "Entrance", self.colors["GREEN"]), (5, 280))
 
-        for chest in current_room_data.get("chests", []):
+        for chest in room_data.get("chests", []):
             color = self.colors["BLUE"] if chest["is_got"] else self.colors["YELLOW"]
             img_to_use = None
             if chest.get("is_got"):
@@ -94,26 +116,49 @@ class GUIManager:
                 try:
                     img = pg.transform.scale(img_to_use, (30, 30))
                     img_rect = img.get_rect(center=chest["pos"])
-                    screen.blit(img, img_rect.topleft)
+                    surface.blit(img, img_rect.topleft)
                 except Exception:
-                    pg.draw.circle(screen, color, chest["pos"], 15)
+                    pg.draw.circle(surface, color, chest["pos"], 15)
             else:
-                pg.draw.circle(screen, color, chest["pos"], 15)
+                pg.draw.circle(surface, color, chest["pos"], 15)
 
-        if current_room_id == 20:
+        if room_id == 20:
             exit_area = rooms_config["exit_detection"]
-            pg.draw.rect(screen, self.colors["GREEN"],
+            pg.draw.rect(surface, self.colors["GREEN"],
                          (exit_area["x_min"], exit_area["y_min"],
                           self.screen_width - exit_area["x_min"], exit_area["y_max"] - exit_area["y_min"]), 3)
-            screen.blit(self.fonts["label"].render("EXIT", True, self.colors["GREEN"]),
-                        (exit_area["x_min"] + 10, exit_area["y_min"] + 10))
-        
+            surface.blit(self.text_cache.render(self.fonts["label"], "EXIT", self.colors["GREEN"]),
+                         (exit_area["x_min"] + 10, exit_area["y_min"] + 10))
+
+    # This function returns the cached static layer of a room, baking it on first use or after a chest change.
+    def get_room_layer(self, room_id: int, room_data: Dict, rooms_config: Dict) -> pg.Surface:
+        return self.room_layers.get(
+            room_id, room_data,
+            lambda surface, data: self._build_room_layer(surface, data, rooms_config),
+            (self.screen_width, self.screen_height)
+        )
+
+    # This function draws the game scene including walls, player, enemies, items, and room features.
+    def draw_game_screen(self, screen: pg.Surface, player, current_room_data, minimap, room_neighbors, room_minimap_pos, rooms_config, item_manager, enemy_manager=None):
+        current_room_id = self._get_player_room_id(player)
+        layer = self.get_room_layer(current_room_id, current_room_data, rooms_config)
+        dirty = self.dirty_renderer
+        if dirty is not None:
+            dirty.begin_frame(screen, layer, self.room_layers.layer_key(current_room_id, current_room_data))
+        else:
+            screen.blit(layer, (0, 0))
+
         if item_manager is not None:
-            item_manager.draw_room_items(screen, current_room_id)
+            item_rects = item_manager.draw_room_items(screen, current_room_id)
+            if dirty is not None:
+                dirty.mark_all(item_rects)
 
         if hasattr(player, 'draw'):
-            player.draw(screen)
-            player.draw_bullets(screen)
+            player_rect = player.draw(screen)
+            bullet_rects = player.draw_bullets(screen)
+            if dirty is not None:
+                dirty.mark(player_rect)
+                dirty.mark_all(bullet_rects)
         else:
             if self.raider_raw is not None:
                 try:
@@ -126,11 +171,18 @@ class GUIManager:
                     pg.draw.circle(screen, self.colors["GREEN"], player["pos"], player["radius"])
             else:
                 pg.draw.circle(screen, self.colors["GREEN"], player["pos"], player["radius"])
+            if dirty is not None:
+                dirty.request_full_repaint()
 
-        minimap.draw(screen, room_minimap_pos, room_neighbors, player)
+        minimap_rect = minimap.draw(screen, room_minimap_pos, room_neighbors, player)
         
         if enemy_manager is not None:
-            enemy_manager.draw(screen)
+            enemy_rects = enemy_manager.draw(screen)
+            if dirty is not None:
+                dirty.mark_all(enemy_rects)
+
+        if dirty is not None:
+            dirty.mark(minimap_rect)
 
     # This function retrieves the player's rectangular area in a unified way.
     def _get_player_rect(self, player):
@@ -290,11 +342,9 @@ class GUIManager:
         else:
             screen.fill(self.colors["DARK_BROWN"])
 
-        overlay = pg.Surface((self.screen_width, self.screen_height), pg.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+        screen.blit(self._overlay, (0, 0))
 
-        title = self.fonts["title"].render("Tomb Raider: Maze Adventure", True, self.colors["GOLD"])
+        title = self.text_cache.render(self.fonts["title"], "Tomb Raider: Maze Adventure", self.colors["GOLD"])
         screen.blit(title, (self.screen_width//2 - title.get_width()//2, 150))
 
         for btn in self.buttons:
@@ -302,18 +352,19 @@ class GUIManager:
                 color = self.colors["LIGHT_BROWN"] if btn["hover"] else self.colors["BROWN"]
                 pg.draw.rect(screen, color, btn["rect"], border_radius=10)
                 pg.draw.rect(screen, self.colors["BLACK"], btn["rect"], 2, border_radius=10)
-                text_surf = self.fonts["label"].render(btn["text"], True, self.colors["WHITE"])
+                text_surf = self.text_cache.render(self.fonts["label"], btn["text"], self.colors["WHITE"])
                 screen.blit(text_surf, text_surf.get_rect(center=btn["rect"].center))
 
         tips = ["Arrow keys to move | Space to shoot | Mouse to move minimap", "Find the treasure and reach the exit to win"]
         for i, tip in enumerate(tips):
-            text = self.fonts["label"].render(tip, True, self.colors["WHITE"])
+            text = self.text_cache.render(self.fonts["label"], tip, self.colors["WHITE"])
             screen.blit(text, (self.screen_width//2 - text.get_width()//2, 500 + i*30))
 
-    # This function draws the in-game HUD displaying health, ammo, room info, and temporary tips.
-    def draw_hud(self, screen: pg.Surface, player, game_state: Dict) -> None:
+    # This function draws the in-game HUD displaying health, ammo, room info, and temporary tips, and returns the areas drawn.
+    def draw_hud(self, screen: pg.Surface, player, game_state: Dict) -> List[pg.Rect]:
         if player is None or game_state is None:
-            return
+            return []
+        rects = []
 
         tip_text_content = game_state.get("tip_text", "")
         if tip_text_content is None:
@@ -321,50 +372,43 @@ class GUIManager:
         elif not isinstance(tip_text_content, str):
             tip_text_content = str(tip_text_content)
 
-        try:
-            if game_state.get("tip_timer", 0) > 0:
-                game_state["tip_timer"] = max(0, game_state.get("tip_timer", 0) - 1)
-                if game_state["tip_timer"] == 0:
-                    game_state["tip_text"] = ""
-        except Exception:
-            pass
-            
         health_bg = pg.Rect(20, 10, 200, 8)
-        pg.draw.rect(screen, self.colors["RED"], health_bg)
+        rects.append(pg.draw.rect(screen, self.colors["RED"], health_bg))
 
         if hasattr(player, 'health_system') and player.health_system is not None:
             health_percentage = player.health_system.current_health / player.health_system.max_health
             pg.draw.rect(screen, self.colors["GREEN"], 
                         (20, 10, 200 * health_percentage, 8))
 
-            health_text = self.fonts["main"].render(
-                f"HP: {player.health_system.current_health}/{player.health_system.max_health}", 
-                True, self.colors["BLACK"])
-            screen.blit(health_text, (230, 8))
+            health_text = self.hud_widgets["health"].surface(
+                (player.health_system.current_health, player.health_system.max_health))
+            rects.append(screen.blit(health_text, (230, 8)))
         else:
 
-            health_text = self.fonts["main"].render("Health:  ?/?", True, self.colors["BLACK"])
-            screen.blit(health_text, (230, 0))
+            health_text = self.text_cache.render(self.fonts["main"], "Health:  ?/?", self.colors["BLACK"])
+            rects.append(screen.blit(health_text, (230, 0)))
 
         ammo_count = getattr(player, 'ammo', 0)
-        ammo_text = self.fonts["main"].render(f"Ammo: {ammo_count}", True, self.colors["BLACK"])
-        screen.blit(ammo_text, (20, 25))
+        ammo_text = self.hud_widgets["ammo"].surface(ammo_count)
+        rects.append(screen.blit(ammo_text, (20, 25)))
 
-        room_text = self.fonts["main"].render(
-            f"Room: {getattr(player, 'current_room', '?')}/20", True, self.colors["BLACK"])
-        screen.blit(room_text, (120, 25))  
+        room_text = self.hud_widgets["room"].surface(getattr(player, 'current_room', '?'))
+        rects.append(screen.blit(room_text, (120, 25)))
 
-        treasure_text = "Treasure Found" if game_state.get("has_treasure", False) else "Treasure Not Found"
-        treasure_color = self.colors["GOLD"] if game_state.get("has_treasure", False) else self.colors["RED"]
-        screen.blit(self.fonts["main"].render(treasure_text, True, treasure_color), (480, 18))
+        has_treasure = bool(game_state.get("has_treasure", False))
+        treasure_color = self.colors["GOLD"] if has_treasure else self.colors["RED"]
+        rects.append(screen.blit(self.hud_widgets["treasure"].surface(has_treasure, treasure_color), (480, 18)))
 
         if game_state.get("tip_timer", 0) > 0:
             tip_bg = pg.Rect(200, 300, 400, 50)
             pg.draw.rect(screen, self.colors["WHITE"], tip_bg)
             pg.draw.rect(screen, self.colors["BROWN"], tip_bg, 2)
 
-            tip_surface = self.fonts["main"].render(tip_text_content, True, self.colors["BROWN"])
+            tip_surface = self.hud_widgets["tip"].surface(tip_text_content)
             screen.blit(tip_surface, tip_surface.get_rect(center=tip_bg.center))
+            rects.append(tip_bg.union(tip_surface.get_rect(center=tip_bg.center)))
+
+        return rects
 
     # This function draws the end screen with victory/defeat message and buttons.
     def draw_end_screen(self, screen: pg.Surface) -> None:
@@ -373,13 +417,11 @@ class GUIManager:
         else:
             screen.fill(self.colors["DARK_BROWN"])
 
-        overlay = pg.Surface((self.screen_width, self.screen_height), pg.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+        screen.blit(self._overlay, (0, 0))
 
         result = "Victory! Successfully escaped!" if self.victory else "Defeat! Try again!"
         result_color = self.colors["GOLD"] if self.victory else self.colors["RED"]
-        result_text = self.fonts["title"].render(result, True, result_color)
+        result_text = self.text_cache.render(self.fonts["title"], result, result_color)
         screen.blit(result_text, (self.screen_width//2 - result_text.get_width()//2, 150))
 
         for btn in self.buttons:
@@ -387,13 +429,15 @@ class GUIManager:
                 color = self.colors["LIGHT_BROWN"] if btn["hover"] else self.colors["BROWN"]
                 pg.draw.rect(screen, color, btn["rect"], border_radius=10)
                 pg.draw.rect(screen, self.colors["BLACK"], btn["rect"], 2, border_radius=10)
-                text_surf = self.fonts["label"].render(btn["text"], True, self.colors["WHITE"])
+                text_surf = self.text_cache.render(self.fonts["label"], btn["text"], self.colors["WHITE"])
                 screen.blit(text_surf, text_surf.get_rect(center=btn["rect"].center))
     # This function draws the appropriate screen based on the current screen state.
     def draw(self, screen: pg.Surface, player=None, game_state=None, 
          current_room_data=None, minimap=None, room_neighbors=None, 
          room_minimap_pos=None, rooms_config=None, item_manager=None, 
          enemy_manager=None) -> None:
+        if self.current_screen != "game" and self.dirty_renderer is not None:
+            self.dirty_renderer.request_full_repaint()
         if self.current_screen == "start":
             self.draw_start_screen(screen)
         elif self.current_screen == "settings":
@@ -406,10 +450,12 @@ class GUIManager:
                                     item_manager, enemy_manager)
             
             if player is not None and game_state is not None:
-                self.draw_hud(screen, player, game_state)
+                hud_rects = self.draw_hud(screen, player, game_state)
+                if self.dirty_renderer is not None:
+                    self.dirty_renderer.mark_all(hud_rects)
             else:
                 screen.fill(self.colors["WHITE"])
-                warning_text = self.fonts["main"].render("Loading game...", True, self.colors["BLACK"])
+                warning_text = self.text_cache.render(self.fonts["main"], "Loading game...", self.colors["BLACK"])
                 screen.blit(warning_text, (self.screen_width//2 - warning_text.get_width()//2, self.screen_height//2))
         elif self.current_screen == "end":
             self.draw_end_screen(screen)
@@ -422,11 +468,9 @@ class GUIManager:
         else:
             screen.fill(self.colors["DARK_BROWN"])
 
-        overlay = pg.Surface((self.screen_width, self.screen_height), pg.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+        screen.blit(self._overlay, (0, 0))
         
-        title = self.fonts["title"].render("Settings", True, self.colors["GOLD"])
+        title = self.text_cache.render(self.fonts["title"], "Settings", self.colors["GOLD"])
         screen.blit(title, (self.screen_width//2 - title.get_width()//2, 80))
 
         start_x = 220
@@ -441,7 +485,7 @@ class GUIManager:
 
             display_name = self.enemy_display.get(t, t).capitalize()
             label_text = f"{display_name}: {val_text}"
-            label = self.fonts["label"].render(label_text, True, self.colors["WHITE"])
+            label = self.text_cache.render(self.fonts["label"], label_text, self.colors["WHITE"])
             screen.blit(label, (start_x, y))
 
         # total count display
@@ -453,7 +497,7 @@ class GUIManager:
                 except Exception:
                     pass
 
-        total_surf = self.fonts["main"].render(f"Total enemies: {total}", True, self.colors["WHITE"])
+        total_surf = self.text_cache.render(self.fonts["main"], f"Total enemies: {total}", self.colors["WHITE"])
         screen.blit(total_surf, (start_x, start_y + len(self.enemy_types) * row_h + 80))
 
         # draw settings buttons
@@ -462,9 +506,19 @@ class GUIManager:
                 color = self.colors["LIGHT_BROWN"] if btn["hover"] else self.colors["BROWN"]
                 pg.draw.rect(screen, color, btn["rect"], border_radius=6)
                 pg.draw.rect(screen, self.colors["BLACK"], btn["rect"], 2, border_radius=6)
-                text_surf = self.fonts["label"].render(btn["text"], True, self.colors["WHITE"])
+                text_surf = self.text_cache.render(self.fonts["label"], btn["text"], self.colors["WHITE"])
                 screen.blit(text_surf, text_surf.get_rect(center=btn["rect"].center))
 
+    # This function presents the finished frame, updating only dirty areas when dirty-rect mode is on.
+    def present(self) -> None:
+        rects = None
+        if self.dirty_renderer is not None and self.current_screen == "game":
+            rects = self.dirty_renderer.end_frame()
+        if rects is None:
+            pg.display.flip()
+        elif rects:
+            pg.display.update(rects)
+
     # This function sets the callback for enemy randomization settings.
     def set_settings_callback(self, callback):
         self.settings_callback = callback
@@ -0,0 +1,61 @@
+from typing import Dict, List, Tuple
+
+
+class RenderInterpolator:
+    # This class blends entity positions between the last two simulation ticks for smooth rendering.
+    def __init__(self):
+        self._room = None
+        self._player = None
+        self._enemies: Dict[int, Tuple[int, int]] = {}
+        self._projectiles: Dict[int, Tuple[float, float]] = {}
+        self._bullets: Dict[int, Tuple[float, float]] = {}
+        self._restore: List = []
+
+    # This function records positions right before the last simulation tick of a frame.
+    def capture(self, game_manager) -> None:
+        player = game_manager.player
+        self._room = player.current_room
+        self._player = (player.x, player.y)
+        self._enemies = {id(e): e.rect.topleft for e in game_manager.enemy_manager.get_active_enemies()}
+        self._projectiles = {id(p): (p.x, p.y) for p in game_manager.enemy_manager.get_projectiles()}
+        self._bullets = {id(b): (b.x, b.y) for b in player.bullets}
+
+    # This function moves entities to their blended positions; call restore() once drawing is done.
+    def apply(self, game_manager, alpha: float) -> None:
+        self._restore = []
+        player = game_manager.player
+        if self._player is None or alpha >= 1.0 or player.current_room != self._room:
+            return
+
+        def lerp(a, b):
+            return a + (b - a) * alpha
+
+        self._restore.append((player, "xy", (player.x, player.y)))
+        player.x, player.y = lerp(self._player[0], player.x), lerp(self._player[1], player.y)
+
+        for bullet in player.bullets:
+            prev = self._bullets.get(id(bullet))
+            if prev is not None:
+                self._restore.append((bullet, "xy", (bullet.x, bullet.y)))
+                bullet.x, bullet.y = lerp(prev[0], bullet.x), lerp(prev[1], bullet.y)
+
+        for enemy in game_manager.enemy_manager.get_active_enemies():
+            prev = self._enemies.get(id(enemy))
+            if prev is not None and prev != enemy.rect.topleft:
+                self._restore.append((enemy.rect, "topleft", enemy.rect.topleft))
+                enemy.rect.topleft = (round(lerp(prev[0], enemy.rect.x)), round(lerp(prev[1], enemy.rect.y)))
+
+        for projectile in game_manager.enemy_manager.get_projectiles():
+            prev = self._projectiles.get(id(projectile))
+            if prev is not None:
+                self._restore.append((projectile, "xy", (projectile.x, projectile.y)))
+                projectile.x, projectile.y = lerp(prev[0], projectile.x), lerp(prev[1], projectile.y)
+
+    # This function puts every entity moved by apply() back at its simulated position.
+    def restore(self) -> None:
+        for target, attr, value in reversed(self._restore):
+            if attr == "xy":
+                target.x, target.y = value
+            else:
+                setattr(target, attr, value)
+        self._restore = []
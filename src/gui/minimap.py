@@ -17,6 +17,8 @@ class Minimap:
         self.drag_off_x = 0
         self.drag_off_y = 0
 
+        self.reset()
+
     # This function handles minimap dragging events
     def handle_events(self, event: pg.event.Event) -> None:
         if event.type == pg.MOUSEBUTTONDOWN:
@@ -33,51 +35,131 @@ class Minimap:
             self.x = max(0, min(new_x, self.config["game"]["screen_width"] - self.w))
             self.y = max(0, min(new_y, self.config["game"]["screen_height"] - self.h))
 
-    # This function draws the minimap including explored rooms, current room, and room connections
+    # This function drops the cached map so it is rebuilt from the next positions dict it sees
+    def reset(self) -> None:
+        self._source = None
+        self._known = {}
+        self._bounds = None
+        self._origin = (0, 0)
+        self._cells = None
+        self._lines = None
+
+    # This function grows the cached layers so that a cell at the given map position fits
+    def _ensure_capacity(self, rel_x: int, rel_y: int) -> None:
+        cs = self.cell_size
+        if self._cells is None:
+            size = cs * 8
+            self._origin = (rel_x - size // 2, rel_y - size // 2)
+            self._cells = pg.Surface((size, size), pg.SRCALPHA)
+            self._lines = pg.Surface((size, size), pg.SRCALPHA)
+        ox, oy = self._origin
+        w, h = self._cells.get_size()
+        if ox <= rel_x - 2 and oy <= rel_y - 2 and rel_x + cs + 2 <= ox + w and rel_y + cs + 2 <= oy + h:
+            return
+        new_w, new_h = w, h
+        new_ox, new_oy = ox, oy
+        while new_ox > rel_x - 2:
+            new_ox -= new_w
+            new_w *= 2
+        while rel_x + cs + 2 > new_ox + new_w:
+            new_w *= 2
+        while new_oy > rel_y - 2:
+            new_oy -= new_h
+            new_h *= 2
+        while rel_y + cs + 2 > new_oy + new_h:
+            new_h *= 2
+        for name in ("_cells", "_lines"):
+            grown = pg.Surface((new_w, new_h), pg.SRCALPHA)
+            grown.blit(getattr(self, name), (ox - new_ox, oy - new_oy))
+            setattr(self, name, grown)
+        self._origin = (new_ox, new_oy)
+
+    # This function returns the rect of a room cell in cached-layer coordinates
+    def _local_rect(self, room_id: int) -> pg.Rect:
+        rel_x, rel_y = self._known[room_id]
+        return pg.Rect(rel_x - self._origin[0], rel_y - self._origin[1], self.cell_size, self.cell_size)
+
+    # This function draws the connection line from one explored room towards a neighbor
+    def _draw_connection(self, room_id: int, direction: str, neighbor_id: int) -> None:
+        curr_rect = self._local_rect(room_id)
+        neighbor_rect = self._local_rect(neighbor_id)
+        if direction == "right":
+            pg.draw.line(self._lines, self.colors["BLACK"], curr_rect.midright, neighbor_rect.midleft, 2)
+        elif direction == "left":
+            pg.draw.line(self._lines, self.colors["BLACK"], curr_rect.midleft, neighbor_rect.midright, 2)
+        elif direction == "top":
+            pg.draw.line(self._lines, self.colors["BLACK"], curr_rect.midtop, neighbor_rect.midbottom, 2)
+        elif direction == "bottom":
+            pg.draw.line(self._lines, self.colors["BLACK"], curr_rect.midbottom, neighbor_rect.midtop, 2)
+
+    # This function patches a newly explored room and its connections into the cached layers
+    def add_room(self, room_id: int, pos: Tuple[int, int], room_neighbors: Dict[str, Dict[str, int]]) -> None:
+        room_id = int(room_id)
+        rel_x, rel_y = pos
+        self._ensure_capacity(rel_x, rel_y)
+        self._known[room_id] = (rel_x, rel_y)
+        if self._bounds is None:
+            self._bounds = [rel_x, rel_x, rel_y, rel_y]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], rel_x), max(b[1], rel_x)
+            b[2], b[3] = min(b[2], rel_y), max(b[3], rel_y)
+
+        room_rect = self._local_rect(room_id)
+        pg.draw.rect(self._cells, self.colors["LIGHT_GRAY"], room_rect)
+        pg.draw.rect(self._cells, self.colors["BLACK"], room_rect, 1)
+
+        for direction, neighbor_id in room_neighbors.get(str(room_id), {}).items():
+            if neighbor_id not in self._known:
+                continue
+            self._draw_connection(room_id, direction, neighbor_id)
+            for back_direction, back_id in room_neighbors.get(str(neighbor_id), {}).items():
+                if back_id == room_id:
+                    self._draw_connection(neighbor_id, back_direction, room_id)
+
+    # This function brings the cached layers up to date with the explored-room positions
+    def sync(self, room_minimap_pos: Dict[int, Tuple[int, int]], room_neighbors: Dict[str, Dict[str, int]]) -> None:
+        if room_minimap_pos is not self._source or len(room_minimap_pos) < len(self._known):
+            self.reset()
+            self._source = room_minimap_pos
+        missing = len(room_minimap_pos) - len(self._known)
+        if missing <= 0:
+            return
+        # positions are only ever appended, so the new rooms are the last entries
+        new_rooms = []
+        for room_id in reversed(room_minimap_pos):
+            if len(new_rooms) == missing:
+                break
+            new_rooms.append(room_id)
+        for room_id in reversed(new_rooms):
+            self.add_room(room_id, room_minimap_pos[room_id], room_neighbors)
+
+    # This function draws the minimap including explored rooms, current room, and room connections, and returns the area drawn
     def draw(self, screen: pg.Surface, room_minimap_pos: Dict[int, Tuple[int, int]], 
-             room_neighbors: Dict[str, Dict[str, int]], player: Any) -> None:
+             room_neighbors: Dict[str, Dict[str, int]], player: Any) -> pg.Rect:
         minimap_rect = pg.Rect(self.x, self.y, self.w, self.h)
         pg.draw.rect(screen, self.colors["GRAY"], minimap_rect)
         pg.draw.rect(screen, self.colors["BLACK"], minimap_rect, 2)
 
         if not room_minimap_pos:
-            return
+            return minimap_rect
 
-        all_x = [pos[0] for pos in room_minimap_pos.values()]
-        all_y = [pos[1] for pos in room_minimap_pos.values()]
-        min_x, max_x = min(all_x), max(all_x)
-        min_y, max_y = min(all_y), max(all_y)
+        self.sync(room_minimap_pos, room_neighbors)
+        min_x, max_x, min_y, max_y = self._bounds
 
         offset_x = self.x + (self.w - (max_x - min_x + self.cell_size)) // 2
         offset_y = self.y + (self.h - (max_y - min_y + self.cell_size)) // 2
 
-        room_rects = {}
-        for room_id, (rel_x, rel_y) in room_minimap_pos.items():
-            draw_x = offset_x + (rel_x - min_x)
-            draw_y = offset_y + (rel_y - min_y)
-            room_rect = pg.Rect(draw_x, draw_y, self.cell_size, self.cell_size)
-            pg.draw.rect(screen, self.colors["LIGHT_GRAY"], room_rect)
-            pg.draw.rect(screen, self.colors["BLACK"], room_rect, 1)
-            room_rects[room_id] = room_rect
-
-        for curr_room_id, connections in room_neighbors.items():
-            curr_room_id = int(curr_room_id)
-            if curr_room_id not in room_rects:
-                continue
-            for direction, neighbor_id in connections.items():
-                if neighbor_id not in room_rects:
-                    continue
-                curr_rect = room_rects[curr_room_id]
-                neighbor_rect = room_rects[neighbor_id]
-                if direction == "right":
-                    pg.draw.line(screen, self.colors["BLACK"], curr_rect.midright, neighbor_rect.midleft, 2)
-                elif direction == "left":
-                    pg.draw.line(screen, self.colors["BLACK"], curr_rect.midleft, neighbor_rect.midright, 2)
-                elif direction == "top":
-                    pg.draw.line(screen, self.colors["BLACK"], curr_rect.midtop, neighbor_rect.midbottom, 2)
-                elif direction == "bottom":
-                    pg.draw.line(screen, self.colors["BLACK"], curr_rect.midbottom, neighbor_rect.midtop, 2)
+        layer_pos = (offset_x + self._origin[0] - min_x, offset_y + self._origin[1] - min_y)
+        map_area = pg.Rect(min_x - self._origin[0] - 1, min_y - self._origin[1] - 1,
+                           max_x - min_x + self.cell_size + 2, max_y - min_y + self.cell_size + 2)
+        drawn = screen.blit(self._cells, (layer_pos[0] + map_area.x, layer_pos[1] + map_area.y), map_area)
+        screen.blit(self._lines, (layer_pos[0] + map_area.x, layer_pos[1] + map_area.y), map_area)
 
         current_room_id = player.current_room if hasattr(player, 'current_room') else player["current_room"]
-        if current_room_id in room_rects:
-            pg.draw.circle(screen, self.colors["RED"], room_rects[current_room_id].center, 3)
\ No newline at end of file
+        if current_room_id in self._known:
+            rel_x, rel_y = self._known[current_room_id]
+            center = (offset_x + rel_x - min_x + self.cell_size // 2, offset_y + rel_y - min_y + self.cell_size // 2)
+            pg.draw.circle(screen, self.colors["RED"], center, 3)
+
+        return minimap_rect.union(drawn).inflate(2, 2)
@@ -0,0 +1,60 @@
+import pygame as pg
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class RoomLayerCache:
+    # This class keeps pre-rendered static room backgrounds (walls, labels, chests) with an LRU cap.
+    def __init__(self, max_layers: int = 8):
+        self.max_layers = max(1, int(max_layers))
+        self._layers: "OrderedDict[int, Dict]" = OrderedDict()
+        self.builds = 0
+        self.hits = 0
+
+    # This function computes the part of the room state that changes the static layer.
+    @staticmethod
+    def _signature(room_data: Dict):
+        return tuple(bool(chest.get("is_got")) for chest in room_data.get("chests", []))
+
+    # This function returns the cached layer for a room, rebuilding it when the room state changed.
+    def get(self, room_id: int, room_data: Dict, build: Callable[[pg.Surface, Dict], None],
+            size) -> pg.Surface:
+        signature = self._signature(room_data)
+        entry = self._layers.get(room_id)
+        if entry is not None and entry["room_data"] is room_data and entry["signature"] == signature:
+            self._layers.move_to_end(room_id)
+            self.hits += 1
+            return entry["surface"]
+
+        surface = entry["surface"] if entry is not None and entry["surface"].get_size() == tuple(size) else None
+        if surface is None:
+            surface = pg.Surface(size)
+            if pg.display.get_surface() is not None:
+                surface = surface.convert()
+        build(surface, room_data)
+        self.builds += 1
+        self._layers[room_id] = {"surface": surface, "room_data": room_data, "signature": signature}
+        self._layers.move_to_end(room_id)
+        while len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+        return surface
+
+    # This function returns a key that changes whenever the layer of a room would be rebuilt.
+    def layer_key(self, room_id: int, room_data: Dict):
+        return (room_id, id(room_data), self._signature(room_data))
+
+    # This function reports whether a room already has an up-to-date layer.
+    def is_ready(self, room_id: int, room_data: Dict) -> bool:
+        entry = self._layers.get(room_id)
+        return (entry is not None and entry["room_data"] is room_data
+                and entry["signature"] == self._signature(room_data))
+
+    # This function drops the layer of one room, or of every room when no ID is given.
+    def invalidate(self, room_id: Optional[int] = None) -> None:
+        if room_id is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(room_id, None)
+
+    def __len__(self) -> int:
+        return len(self._layers)
@@ -0,0 +1,160 @@
+import pygame as pg
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Font families tried, in order, for characters the primary font has no glyph for.
+FALLBACK_FONT_NAMES = [
+    "notosanscjksc", "notosanscjk", "notosanssc", "sourcehansanssc", "wenquanyimicrohei",
+    "wenquanyizenhei", "microsoftyahei", "simhei", "pingfangsc", "arialunicodems",
+]
+
+# A code point no font defines; its rendering is the font's "missing glyph" box.
+_MISSING_PROBE = "\uffff"
+
+
+class TextCache:
+    # This class caches rendered text surfaces keyed by (font, string, color, antialias) with LRU eviction.
+    def __init__(self, max_entries: int = 256, fallback_fonts: Optional[Sequence[str]] = None):
+        self.max_entries = max(1, int(max_entries))
+        self._surfaces: "OrderedDict[Tuple, pg.Surface]" = OrderedDict()
+        self._glyph_missing: Dict[Tuple, bool] = {}
+        self._missing_box: Dict[pg.font.Font, bytes] = {}
+        self._fallback: Dict[pg.font.Font, Optional[pg.font.Font]] = {}
+        self._fallback_fonts = set()
+        self._fallback_paths = list(fallback_fonts or [])
+        self._fallback_path: Optional[str] = None
+        self._fallback_resolved = False
+        self.hits = 0
+        self.misses = 0
+
+    # This function returns a rendered surface for the text, rendering it only on a cache miss.
+    def render(self, font: pg.font.Font, text: str, color, antialias: bool = True) -> pg.Surface:
+        if text is None:
+            text = ""
+        elif not isinstance(text, str):
+            text = str(text)
+        key = (font, text, tuple(color), bool(antialias))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._render_with_fallback(font, text, key[2], key[3])
+        self._surfaces[key] = surface
+        while len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    # This function drops every cached surface.
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    # This function splits the text into runs of characters the primary font can and cannot draw.
+    def _split_runs(self, font: pg.font.Font, text: str) -> List[Tuple[bool, str]]:
+        runs: List[Tuple[bool, str]] = []
+        for ch in text:
+            missing = self._is_missing(font, ch)
+            if runs and runs[-1][0] == missing:
+                runs[-1] = (missing, runs[-1][1] + ch)
+            else:
+                runs.append((missing, ch))
+        return runs
+
+    # This function checks once per character whether the font would draw its missing-glyph box.
+    def _is_missing(self, font: pg.font.Font, ch: str) -> bool:
+        if ord(ch) < 0x80:
+            return False
+        key = (font, ch)
+        missing = self._glyph_missing.get(key)
+        if missing is None:
+            box = self._missing_box.get(font)
+            if box is None:
+                box = pg.image.tostring(font.render(_MISSING_PROBE, False, (255, 255, 255), (0, 0, 0)), "RGB")
+                self._missing_box[font] = box
+            glyph = pg.image.tostring(font.render(ch, False, (255, 255, 255), (0, 0, 0)), "RGB")
+            missing = glyph == box
+            self._glyph_missing[key] = missing
+        return missing
+
+    # This function finds a font file able to draw CJK glyphs, trying configured paths before system fonts.
+    def _resolve_fallback_path(self) -> Optional[str]:
+        if not self._fallback_resolved:
+            self._fallback_resolved = True
+            candidates = list(self._fallback_paths)
+            try:
+                matched = pg.font.match_font(FALLBACK_FONT_NAMES)
+            except Exception:
+                matched = None
+            if matched:
+                candidates.append(matched)
+            for path in candidates:
+                try:
+                    pg.font.Font(path, 12)
+                except Exception:
+                    continue
+                self._fallback_path = path
+                break
+            if self._fallback_path is None:
+                print("TextCache: no CJK fallback font found, missing glyphs will render as boxes")
+        return self._fallback_path
+
+    # This function returns the fallback font matching the primary font's size.
+    def _fallback_font(self, font: pg.font.Font) -> Optional[pg.font.Font]:
+        if font not in self._fallback:
+            path = self._resolve_fallback_path()
+            fallback = None
+            if path is not None:
+                try:
+                    fallback = pg.font.Font(path, font.get_height())
+                    self._fallback_fonts.add(fallback)
+                except Exception:
+                    fallback = None
+            self._fallback[font] = fallback
+        return self._fallback[font]
+
+    # This function renders a string, drawing runs without glyphs in the primary font with the fallback font.
+    def _render_with_fallback(self, font: pg.font.Font, text: str, color, antialias: bool) -> pg.Surface:
+        if font in self._fallback_fonts:
+            return font.render(text, antialias, color)
+        runs = self._split_runs(font, text)
+        fallback = self._fallback_font(font) if any(missing for missing, _ in runs) else None
+        if fallback is None:
+            return font.render(text, antialias, color)
+
+        parts = []
+        for missing, run in runs:
+            run_font = fallback if missing else font
+            parts.append(self.render(run_font, run, color, antialias))
+        width = sum(p.get_width() for p in parts)
+        height = max(p.get_height() for p in parts)
+        surface = pg.Surface((width, height), pg.SRCALPHA)
+        x = 0
+        for part in parts:
+            surface.blit(part, (x, (height - part.get_height()) // 2))
+            x += part.get_width()
+        return surface
+
+
+class HudValue:
+    # This class is a retained HUD label that formats and renders its text only when its value changes.
+    def __init__(self, cache: TextCache, font: pg.font.Font, formatter: Callable[..., str], color=None):
+        self.cache = cache
+        self.font = font
+        self.formatter = formatter
+        self.color = color
+        self._value = object()
+        self._color = None
+        self._surface: Optional[pg.Surface] = None
+        self.renders = 0
+
+    # This function returns the label surface for the value, reusing the last one if nothing changed.
+    def surface(self, value, color=None) -> pg.Surface:
+        color = self.color if color is None else color
+        if self._surface is None or value != self._value or color != self._color:
+            self._value = value
+            self._color = color
+            self._surface = self.cache.render(self.font, self.formatter(value), color)
+            self.renders += 1
+        return self._surface
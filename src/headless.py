@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import random
+
+# Headless simulation helpers.
+# Usage:
+#   from src.headless import create_headless_game
+#   game = create_headless_game()
+#   observation, events = game.step({"right": True, "shoot": True})
+# or from the repo root: python -m src.headless --ticks 10000
+
+
+def init_headless_pygame():
+    """Initialize pygame with the SDL dummy drivers so no window or audio device is opened"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame as pg
+    if not pg.display.get_init():
+        pg.display.init()
+    return pg
+
+
+def load_config(path='config/game_config.json'):
+    """Load game configuration from JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_headless_game(config=None, seed=None):
+    """Create a GameManager that can be stepped without a display; seed fixes the rolled item layout"""
+    init_headless_pygame()
+    from src.game_manager import GameManager
+    return GameManager(config if config is not None else load_config(), seed=seed)
+
+
+def random_policy(seed=0, hold_ticks=30, shoot_every=10):
+    """Return an action function that wanders randomly and shoots periodically"""
+    rng = random.Random(seed)
+    state = {"action": {}}
+
+    def policy(tick):
+        if tick % hold_ticks == 0:
+            state["action"] = {rng.choice(["up", "down", "left", "right"]): True}
+        action = dict(state["action"])
+        action["shoot"] = tick % shoot_every == 0
+        return action
+
+    return policy
+
+
+def run(game, ticks, policy=None):
+    """Step the game for a number of ticks or until it ends, returning (observation, events, elapsed seconds)"""
+    policy = policy or random_policy()
+    all_events = []
+    observation = game.get_observation()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        observation, events = game.step(policy(tick))
+        all_events.extend(events)
+        if observation["done"]:
+            break
+    return observation, all_events, time.perf_counter() - start
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the game simulation headless as fast as possible")
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    game = create_headless_game()
+    observation, events, elapsed = run(game, args.ticks, random_policy(args.seed))
+    ticks = observation["tick"]
+    print(f"{ticks} ticks in {elapsed:.3f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"room {observation['current_room']}, health {observation['health']}, "
+          f"explored {observation['explored_rooms']}, events {len(events)}")
+    for layer, stats in game.get_collision_stats().items():
+        print(f"collisions/{layer}: {stats.get('queries', 0)} queries, "
+              f"{stats.get('candidates', 0)} candidate pairs, {stats.get('hits', 0)} hits")
+    prefetch = game.prefetcher.get_stats()
+    print(f"room switches: {prefetch['switches']} ({prefetch['prefetched']} prefetched), "
+          f"{prefetch['avg_switch_ms']:.3f} ms avg, {prefetch['max_switch_ms']:.3f} ms max; "
+          f"prefetch {prefetch['tasks']} tasks in {prefetch['prepare_ms']:.1f} ms")
+    for layer, stats in game.get_residency_stats().items():
+        print(f"residency/{layer}: {stats['rooms']} rooms live ({stats['entities']} entities), "
+              f"{stats.get('dehydrated', 0)} dehydrated, {stats['evictions']} evictions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import pygame as pg
+
+# Key codes that count as each movement action, matching Player.handle_input.
+ACTION_KEYS = {
+    "up": (pg.K_w, pg.K_UP),
+    "down": (pg.K_s, pg.K_DOWN),
+    "left": (pg.K_a, pg.K_LEFT),
+    "right": (pg.K_d, pg.K_RIGHT),
+}
+# Bit of each action in the one-byte masks input recordings store per tick.
+ACTION_BITS = {"up": 1, "down": 2, "left": 4, "right": 8, "shoot": 16}
+
+
+class InputState:
+    """Per-tick player input that can stand in for pg.key.get_pressed().
+
+    Indexing with a pygame key code answers whether the action bound to that key
+    is held, so Player.handle_input and GameManager.handle_input work unchanged
+    whether input comes from the keyboard or from a script.
+    """
+
+    __slots__ = ("up", "down", "left", "right", "shoot")
+
+    def __init__(self, up=False, down=False, left=False, right=False, shoot=False):
+        self.up = bool(up)
+        self.down = bool(down)
+        self.left = bool(left)
+        self.right = bool(right)
+        self.shoot = bool(shoot)
+
+    @classmethod
+    def from_action(cls, action):
+        """Build an input state from a dict such as {"right": True, "shoot": True}, a sequence of action names or None"""
+        if action is None:
+            return cls()
+        if isinstance(action, cls):
+            return action
+        if isinstance(action, dict):
+            return cls(**{name: action.get(name, False) for name in cls.__slots__})
+        return cls(**{name: True for name in action})
+
+    @classmethod
+    def from_keys(cls, keys, shoot=False):
+        """Capture the actions held in a pg.key.get_pressed() result"""
+        state = cls(shoot=shoot)
+        for name, codes in ACTION_KEYS.items():
+            setattr(state, name, any(keys[code] for code in codes))
+        return state
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Decode an action bitmask made by to_mask()"""
+        return cls(**{name: mask & bit for name, bit in ACTION_BITS.items()})
+
+    def to_mask(self):
+        mask = 0
+        for name, bit in ACTION_BITS.items():
+            if getattr(self, name):
+                mask |= bit
+        return mask
+
+    def __getitem__(self, key):
+        for name, codes in ACTION_KEYS.items():
+            if key in codes:
+                return getattr(self, name)
+        return False
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
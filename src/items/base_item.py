@@ -1,6 +1,7 @@
 import pygame as pg
 import random
 from abc import ABC, abstractmethod
+from src.assets import load_image
 
 class Item(ABC):
     def __init__(self, name, rarity, image_path=None):
@@ -27,10 +28,7 @@ class Item(ABC):
             return None
             
         try:
-            image = pg.image.load(image_path)
-            image = image.convert_alpha()
-            image = pg.transform.scale(image, (30, 30))
-            return image
+            return load_image(image_path, (30, 30))
             
         except Exception as e:
             return None
@@ -59,6 +57,7 @@ class Item(ABC):
             }
             border_color = border_colors.get(self.rarity, (255, 255, 255))
             pg.draw.circle(screen, border_color, self.position, 15, 2)
+        return self.get_rect()
     
     @abstractmethod
     def apply_effect(self, player):
@@ -4,8 +4,55 @@ import json
 import os
 import sys
 import copy
+import numpy as np
 from abc import ABC, abstractmethod
 from src.audio import play_sound
+from src.assets import load_image
+from src.spatial_hash import SpatialHash, merge_stats
+from src.room_collision import RoomCollisionCache
+from src.room_registry import RoomRegistry
+from src.residency import RoomResidency
+from src.entity_arena import EntityArena
+from src.placement import room_blocked_array, block_any, box_fields, sample_positions
+from src.async_writer import write_atomic, json_bytes
+from src.state_hash import room_hash, HASH_MASK
+
+ITEMS_STATE_PATH = 'config/items_state.json'
+
+# Item class names as saved in items_state.json, and the create_item keys they map to.
+ITEM_TYPE_KEYS = {
+    'Food': 'food',
+    'Medkit': 'medkit',
+    'Gun': 'gun',
+    'Ammo': 'ammo',
+    'ExtendedMagazine': 'magazine',
+    'EnhancedBullets': 'enhanced_bullets',
+    'FallingRocksTrap': 'trap'
+}
+ITEM_CLASS_NAMES = {key: name for name, key in ITEM_TYPE_KEYS.items()}
+
+# Item placement: items are 30x30 boxes around their position, kept this far from the screen edge
+# and from each other; an open area has this much clearance around the item on every side.
+# Positions are picked on a lattice of ITEM_GRID pixels; the sizes above being multiples of it
+# keeps the downsampled wall test exact.
+ITEM_GRID = 5
+ITEM_HALF_SIZE = 15
+ITEM_EDGE_MARGIN = 40
+ITEM_SPACING = 50
+ITEM_OPEN_CLEARANCE = 40
+# Where the player walks into the start room; items placed there would be picked up on arrival.
+ENTRANCE_RECT = (0, 250, 50, 100)
+
+# Relative odds of each item type in a rolled layout.
+ITEM_WEIGHTS = {
+    "food": 30,
+    "ammo": 25,
+    "trap": 20,
+    "medkit": 10,
+    "gun": 0,
+    "magazine": 4,
+    "enhanced_bullets": 3
+}
 
 class Item(ABC):
     def __init__(self, name, rarity, image_path=None):
@@ -26,8 +73,7 @@ class Item(ABC):
         self.image = None
         if image_path:
             try:
-                self.image = pg.image.load(image_path).convert_alpha()
-                self.image = pg.transform.scale(self.image, (30, 30))
+                self.image = load_image(image_path, (30, 30))
             except:
                 self.image = None
     
@@ -43,6 +89,7 @@ class Item(ABC):
         else:
             color = self.default_colors.get(self.name, (255, 255, 255))
             pg.draw.circle(screen, color, self.position, 15)
+        return self.get_rect()
     
     @abstractmethod
     def apply_effect(self, player):
@@ -149,8 +196,8 @@ class FallingRocksTrap(Item):
         if self.activated and self.activation_timer > 0:
             pg.draw.circle(screen, (255, 0, 0), self.position, 15)
             self.activation_timer -= 1
-        else:
-            super().draw(screen)
+            return self.get_rect()
+        return super().draw(screen)
     
     def update(self):
         """Update trap activation timer"""
@@ -158,206 +205,326 @@ class FallingRocksTrap(Item):
             self.activation_timer -= 1
 
 class ItemManager:
-    def __init__(self, rooms_config, auto_load=True):
+    def __init__(self, rooms_config, auto_load=True, cell_size=64, room_collision=None, max_resident_items=None,
+                 start_room=1, screen_size=(800, 600), writer=None, seed=None, room_registry=None):
         self.rooms_config = rooms_config
+        self.room_registry = room_registry if room_registry is not None else RoomRegistry(rooms_config)
+        # Seed of the item layout; None rolls it from the global random module.
+        self.seed = seed
+        self.layout_seed = None
+        self.writer = writer
+        self.start_room = start_room
+        self.screen_size = screen_size
+        self.item_records = {}
+        # Rooms of a loaded save game whose layout was not read yet; see load_saved_rooms.
+        self._saved_rooms = set()
+        self._saved_records = None
         self.room_items = {}
+        self.residency = RoomResidency(max_resident_items)
+        self.arena = EntityArena()
+        self.cell_size = cell_size
+        self.room_collision = room_collision or RoomCollisionCache()
+        self._item_grids = {}
         self.initialize_items()
 
-    def is_valid_position(self, x, y, room_data):
-        """Check if position is valid (not colliding with walls or special areas)"""
-        item_rect = pg.Rect(x - 15, y - 15, 30, 30)
-        
-        for wall in room_data["walls"]:
-            wall_rect = pg.Rect(wall[0], wall[1], wall[2], wall[3])
-            if item_rect.colliderect(wall_rect):
-                return False
-        
-        room_id = room_data["room_id"]
-        
-        if room_id == 20:
+    def placement_rects(self, room_data):
+        """Return the areas of a room items must stay out of: the exit area and the start room's entrance"""
+        rects = []
+        if room_data.get("is_exit") and "exit_detection" in self.rooms_config:
             exit_area = self.rooms_config["exit_detection"]
-            exit_rect = pg.Rect(
+            rects.append(pg.Rect(
                 exit_area["x_min"],
                 exit_area["y_min"],
-                800 - exit_area["x_min"],
+                self.screen_size[0] - exit_area["x_min"],
                 exit_area["y_max"] - exit_area["y_min"]
-            )
-            if item_rect.colliderect(exit_rect):
-                return False
-        
-        if room_id == 1:
-            entrance_rect = pg.Rect(0, 250, 50, 100)
-            if item_rect.colliderect(entrance_rect):
-                return False
-        
-        if x < 40 or x > 760 or y < 40 or y > 560:
+            ))
+        if room_data["room_id"] == self.start_room:
+            rects.append(pg.Rect(ENTRANCE_RECT))
+        return rects
+
+    def is_valid_position(self, x, y, room_data):
+        """Check if position is valid (not colliding with walls or special areas)"""
+        item_rect = pg.Rect(x - ITEM_HALF_SIZE, y - ITEM_HALF_SIZE, 2 * ITEM_HALF_SIZE, 2 * ITEM_HALF_SIZE)
+        if self.room_collision.get(room_data).rect_blocked(item_rect):
             return False
-            
-        return True
-    
-    def get_room_safe_zones(self, room_data):
-        """Generate safe zones for item placement in a room"""
-        safe_zones = []
-        room_id = room_data["room_id"]
-        
-        room_safe_areas = {
-            1: [(100, 100), (300, 100), (500, 100), (700, 100), 
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            2: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            3: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            4: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            5: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            6: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            7: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            8: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            9: [(100, 100), (300, 100), (500, 100), (700, 100),
-                (100, 300), (300, 300), (500, 300), (700, 300),
-                (100, 500), (300, 500), (500, 500), (700, 500)],
-            10: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            11: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            12: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            13: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            14: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            15: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            16: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            17: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            18: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            19: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)],
-            20: [(100, 100), (300, 100), (500, 100), (700, 100),
-                 (100, 300), (300, 300), (500, 300), (700, 300),
-                 (100, 500), (300, 500), (500, 500), (700, 500)]
-        }
-        
-        if room_id in room_safe_areas:
-            for pos in room_safe_areas[room_id]:
-                if self.is_valid_position(pos[0], pos[1], room_data):
-                    safe_zones.append(pos)
-        
-        if len(safe_zones) < 8:
-            for _ in range(20):
-                x = random.randint(60, 740)
-                y = random.randint(60, 540)
-                if self.is_valid_position(x, y, room_data):
-                    too_close = False
-                    for existing_pos in safe_zones:
-                        if (abs(existing_pos[0] - x) < 50 and 
-                            abs(existing_pos[1] - y) < 50):
-                            too_close = True
-                            break
-                    if not too_close:
-                        safe_zones.append((x, y))
-                        if len(safe_zones) >= 12:
-                            break
-        
-        return safe_zones
-    
-    def analyze_room_layout(self, room_data):
-        """Analyze room layout to find open areas for item placement"""
-        walls = room_data["walls"]
-        
-        open_areas = []
-        
-        test_points = [
-            (200, 150), (400, 150), (600, 150),
-            (200, 300), (400, 300), (600, 300), 
-            (200, 450), (400, 450), (600, 450)
-        ]
-        
-        for point in test_points:
-            if self.is_valid_position(point[0], point[1], room_data):
-                open_count = 0
-                for dx in [-40, 0, 40]:
-                    for dy in [-40, 0, 40]:
-                        if self.is_valid_position(point[0] + dx, point[1] + dy, room_data):
-                            open_count += 1
-                
-                if open_count >= 5:
-                    open_areas.append(point)
-        
-        return open_areas
-    
+        if item_rect.collidelist(self.placement_rects(room_data)) != -1:
+            return False
+        width, height = self.screen_size
+        return ITEM_EDGE_MARGIN <= x <= width - ITEM_EDGE_MARGIN and ITEM_EDGE_MARGIN <= y <= height - ITEM_EDGE_MARGIN
+
+    def room_free_space(self, room_data):
+        """Return (free, open) bool arrays over item centers on the placement lattice.
+
+        free marks where an item fits, open where it also has ITEM_OPEN_CLEARANCE
+        around it; cell (i, j) stands for the center (i, j) * ITEM_GRID.
+        """
+        width, height = self.screen_size
+        blocked = room_blocked_array(self.room_collision.get(room_data), self.screen_size,
+                                     self.placement_rects(room_data))
+        margin = ITEM_EDGE_MARGIN // ITEM_GRID
+        region = (margin, margin, (width - ITEM_EDGE_MARGIN) // ITEM_GRID + 1,
+                  (height - ITEM_EDGE_MARGIN) // ITEM_GRID + 1)
+        item = 2 * ITEM_HALF_SIZE // ITEM_GRID
+        clear = item + 2 * ITEM_OPEN_CLEARANCE // ITEM_GRID
+        free, open_area = box_fields(block_any(blocked, ITEM_GRID), [(item, item), (clear, clear)], region,
+                                     centered=True)
+        return free, open_area
+
+    def get_room_safe_zones(self, room_data, count=12, rng=None):
+        """Pick up to count spread-out item positions in a room, preferring open areas away from walls.
+
+        rng is a NumPy Generator or a seed; without one a seed is drawn from the global random module.
+        """
+        rng = np.random.default_rng(random.getrandbits(64) if rng is None else rng)
+        free, open_area = self.room_free_space(room_data)
+        spacing = ITEM_SPACING / ITEM_GRID
+        positions = sample_positions(open_area, count, spacing, rng, min_radius=spacing)
+        if len(positions) < count:
+            positions = sample_positions(free, count, spacing, rng)
+        return [tuple(pos) for pos in (positions * ITEM_GRID).tolist()]
+
     def initialize_items(self):
-        """Initialize items for all rooms based on configuration"""
-        item_weights = {
-            "food": 30,
-            "ammo": 25,
-            "trap": 20,
-            "medkit": 10,
-            "gun": 0,
-            "magazine": 4,
-            "enhanced_bullets": 3
-        }
-        
-        for room in self.rooms_config["rooms"]:
-            room_id = room["room_id"]
-            self.room_items[room_id] = []
-            
-            if room_id in [1, 20]:
-                num_items = random.randint(1, 2)
-            elif room_id in [5, 10, 15]:
-                num_items = random.randint(2, 4)
-            else:
-                num_items = random.randint(1, 3)
-            
-            safe_zones = self.get_room_safe_zones(room)
-            open_areas = self.analyze_room_layout(room)
-            
-            all_safe_positions = list(set(safe_zones + open_areas))
-            
-            if not all_safe_positions:
-                continue
-            
-            random.shuffle(all_safe_positions)
-            
-            items_placed = 0
-            for i in range(min(num_items, len(all_safe_positions))):
-                item_type = random.choices(
-                    list(item_weights.keys()), 
-                    weights=list(item_weights.values())
-                )[0]
-                
-                item = self.create_item(item_type)
+        """Start a new item layout; each room's items are rolled when the room is first used"""
+        self.item_records = {}
+        self._saved_rooms = set()
+        self.reset()
+        # With a seed the layout only depends on it, so a recorded game can be replayed.
+        self.layout_seed = random.getrandbits(64) if self.seed is None else self.seed
+
+    def roll_room(self, room_id):
+        """Roll a room's item layout as (type, position) records.
+
+        The rolls only depend on the layout seed and the room id, so a room comes
+        out the same whenever and in whatever order rooms are first used.
+        """
+        room = self.room_registry.get(room_id)
+        if room is None:
+            return []
+        rng = np.random.default_rng(np.random.SeedSequence((self.layout_seed, room_id)))
+        if room_id == self.start_room or room.get("is_exit"):
+            num_items = int(rng.integers(1, 2, endpoint=True))
+        elif room_id in [5, 10, 15]:
+            num_items = int(rng.integers(2, 4, endpoint=True))
+        else:
+            num_items = int(rng.integers(1, 3, endpoint=True))
+
+        positions = self.get_room_safe_zones(room, num_items, rng)
+        types = list(ITEM_WEIGHTS)
+        weights = np.array(list(ITEM_WEIGHTS.values()), dtype=float)
+        picks = rng.choice(len(types), size=len(positions), p=weights / weights.sum())
+        return [(types[pick], position) for pick, position in zip(picks.tolist(), positions)]
+
+    def reset(self):
+        """Put every room's items back to the rolled layout, e.g. on restart"""
+        self.room_items = {}
+        self._item_grids = {}
+        self.arena.clear()
+        self._dehydrated = set()
+        self._last_room = None
+        # Snapshot entries of the rooms the player left, shared with snapshots like EnemyManager._frozen.
+        self._frozen = {}
+        self._frozen_shared = False
+        self._frozen_hash = 0
+        self._stale_hash = (None, 0)
+        self.residency.clear()
+
+    def _materialize(self, room_id):
+        """Return the live items of the room in play, creating them from its records on first use"""
+        items = self._room_items(room_id)
+        if room_id != self._last_room:
+            # Items only change in the room in play, so the room just left is final until revisited.
+            if self._last_room is not None:
+                self._set_frozen(self._last_room, self._snapshot_entry(self._last_room))
+            self._last_room = room_id
+            self._touch(room_id, items)
+        return items
+
+    def _room_items(self, room_id):
+        """Return the live items of a room, creating them without marking the room as visited"""
+        items = self.room_items.get(room_id)
+        if items is None:
+            items = self.room_items[room_id] = []
+            if room_id in self._dehydrated:
+                # Dehydrated items keep their arena handles; the records are swapped for objects.
+                self._dehydrated.discard(room_id)
+                for handle in self.arena.room_handles(room_id):
+                    item = self._item_from_record(self.arena.get(handle))
+                    if item:
+                        item.entity_id = handle
+                        self.arena.set(handle, item)
+                        items.append(item)
+                    else:
+                        self.arena.remove(handle)
+                return items
+            for record in self._layout(room_id):
+                item = self._item_from_record(record)
                 if item:
-                    x, y = all_safe_positions[i]
-                    item.set_position(x, y)
-                    self.room_items[room_id].append(item)
-                    items_placed += 1
+                    item.entity_id = self.arena.insert(item, room_id)
+                    items.append(item)
+        return items
+
+    def _item_from_record(self, record):
+        item_type, (x, y) = record
+        item = self.create_item(item_type)
+        if item:
+            item.set_position(x, y)
+        return item
+
+    def _item_record(self, item):
+        return self.get_type_key(item.__class__.__name__), tuple(item.position)
+
+    def get_item(self, entity_id):
+        """Return the live item behind a handle, or None if it was collected or its room is dehydrated"""
+        item = self.arena.get(entity_id)
+        return item if isinstance(item, Item) else None
+
+    def _touch(self, room_id, items, keep=()):
+        self.residency.touch(room_id, len(items))
+        for victim in self.residency.victims(keep=(room_id,) + keep):
+            self.dehydrate_room(victim)
+
+    def prepare_room(self, room_id, room_data=None):
+        """Create a room's items and item grid ahead of a visit, keeping the room in play resident"""
+        if room_id in self.room_items:
+            return
+        self._touch(room_id, self._room_items(room_id), keep=(self._last_room,))
+        self.get_room_grid(room_id)
+
+    def dehydrate_room(self, room_id):
+        """Turn a room's remaining items back into (type, position) records and drop the objects"""
+        items = self.room_items.pop(room_id, None)
+        if items is None:
+            return
+        live = set()
+        for item in items:
+            handle = getattr(item, 'entity_id', None)
+            if self.arena.get(handle) is not item:
+                handle = item.entity_id = self.arena.insert(item, room_id)
+            self.arena.set(handle, self._item_record(item))
+            live.add(handle)
+        # Items dropped from the list without going through check_collisions leave with the objects.
+        for handle in self.arena.room_handles(room_id):
+            if handle not in live:
+                self.arena.remove(handle)
+        self._dehydrated.add(room_id)
+        self._item_grids.pop(room_id, None)
+        self.residency.discard(room_id)
+        if room_id == self._last_room:
+            self._last_room = None
+
+    def _room_records(self, room_id):
+        """Return a room's items as (type, position) records without materializing them"""
+        items = self.room_items.get(room_id)
+        if items is not None:
+            return [self._item_record(item) for item in items]
+        if room_id in self._dehydrated:
+            return self.arena.room_entries(room_id)
+        return self._layout(room_id)
+
+    def _layout(self, room_id):
+        """Return a room's item layout, reading it from a loaded save game or rolling it on first use"""
+        records = self.item_records.get(room_id)
+        if records is None:
+            if room_id in self._saved_rooms:
+                self._saved_rooms.discard(room_id)
+                records = self._saved_records(room_id) or []
+            else:
+                records = self.roll_room(room_id)
+            self.item_records[room_id] = records
+        return records
+
+    def export_rooms(self):
+        """Return the current (type, position) item records of every room, by room id"""
+        room_ids = dict.fromkeys([*self.item_records, *self._saved_rooms, *self._dehydrated, *self.room_items])
+        return {room_id: list(self._room_records(room_id)) for room_id in room_ids}
+
+    def load_saved_rooms(self, room_ids, saved_records, layout_seed=None, frozen_rooms=()):
+        """Replace every room's items with those of a save game; saved_records(room_id) is called on first use.
+
+        The saved items become the layout, so a restart after loading puts them back.
+        Rooms not in the save were never rolled and are rolled from layout_seed.
+        frozen_rooms are the rooms left before saving; their entries are rebuilt
+        right away, so state_hash covers them like in the game that was saved.
+        """
+        self.item_records = {}
+        self.reset()
+        self._saved_rooms = set(room_ids)
+        self._saved_records = saved_records
+        if layout_seed is not None:
+            self.layout_seed = layout_seed
+        for room_id in frozen_rooms:
+            if room_id in self._saved_rooms:
+                self._set_frozen(room_id, tuple((None, record) for record in saved_records(room_id)))
+
+    def frozen_room_ids(self):
+        """Return the rooms left so far whose entries state_hash sums up"""
+        return [room_id for room_id, entry in self._frozen.items() if entry is not None]
     
+    def _snapshot_entry(self, room_id):
+        """Return a room's items as (handle, record) pairs, or None if the room still has its rolled layout"""
+        items = self.room_items.get(room_id)
+        if items is not None:
+            return tuple((getattr(item, 'entity_id', None), self._item_record(item)) for item in items)
+        if room_id in self._dehydrated:
+            return tuple(zip(self.arena.room_handles(room_id), self.arena.room_entries(room_id)))
+        return None
+
+    def _set_frozen(self, room_id, entry):
+        if self._frozen_shared:
+            self._frozen = dict(self._frozen)
+            self._frozen_shared = False
+        old = self._frozen.get(room_id)
+        self._frozen[room_id] = entry
+        self._frozen_hash = (self._frozen_hash - self._entry_hash(room_id, old)
+                             + self._entry_hash(room_id, entry)) & HASH_MASK
+
+    @staticmethod
+    def _entry_hash(room_id, entry):
+        """Hash a room's snapshot entry; the handles do not count"""
+        return room_hash(room_id, ((item_type, *position) for _, (item_type, position) in entry)) if entry else 0
+
+    def state_hash(self, room_id):
+        """Return the hash of every room's items for GameManager.state_hashes; room_id is the room in play.
+
+        The rooms left are summed up in _frozen_hash as they are frozen, so only the room in play is read.
+        """
+        entry = self._frozen.get(room_id)
+        stale_entry, stale = self._stale_hash
+        if entry is not stale_entry:
+            stale = self._entry_hash(room_id, entry)
+            self._stale_hash = (entry, stale)
+        live = room_hash(room_id, ((item_type, *position) for item_type, position in self._room_records(room_id)))
+        return (self._frozen_hash - stale + live) & HASH_MASK
+
+    def snapshot(self, room_id):
+        """Capture the items of every room for GameManager.snapshot; room_id is the room in play.
+
+        An item's type and position are its whole state: a trap only runs its
+        timer once triggered, and it is picked up on that same tick.
+        """
+        self._frozen_shared = True
+        return self._frozen, self._frozen_hash, room_id, self._snapshot_entry(room_id)
+
+    def restore_snapshot(self, snapshot, room_ids):
+        """Put the given rooms back to their items in a snapshot; room_ids must hold every room changed since"""
+        frozen, frozen_hash, play_room, play_entry = snapshot
+        for room_id in room_ids:
+            entry = play_entry if room_id == play_room else frozen.get(room_id)
+            self.room_items.pop(room_id, None)
+            self._item_grids.pop(room_id, None)
+            self.residency.discard(room_id)
+            if entry is None:
+                self.arena.clear_room(room_id)
+                self._dehydrated.discard(room_id)
+            else:
+                # Restored rooms come back as records; their items are recreated when next used.
+                self.arena.replace_room(room_id, entry)
+                self._dehydrated.add(room_id)
+        self._frozen = frozen
+        self._frozen_shared = True
+        self._frozen_hash = frozen_hash
+        self._last_room = None
+
     def create_item(self, item_type):
         """Create item instance based on type"""
         if item_type == "food":
@@ -378,16 +545,38 @@ class ItemManager:
     
     def get_room_items(self, room_id):
         """Get list of items in specified room"""
-        return self.room_items.get(room_id, [])
+        return self._materialize(room_id)
     
+    def get_room_grid(self, room_id):
+        """Get the spatial hash of a room's items, rebuilt whenever the room's item list changed"""
+        items = self._room_items(room_id)
+        cached = self._item_grids.get(room_id)
+        if cached is None or cached[1] is not items or cached[2] != len(items):
+            grid = cached[0] if cached else SpatialHash(self.cell_size)
+            grid.rebuild_rects(item.get_rect() for item in items)
+            cached = self._item_grids[room_id] = (grid, items, len(items))
+        return cached[0]
+
+    def get_residency_stats(self):
+        """Get counts of rooms with live items versus rooms held as records"""
+        stats = self.residency.get_stats()
+        stats["dehydrated"] = len(self._dehydrated)
+        return stats
+
+    def get_collision_stats(self):
+        """Get summed spatial hash counters of all room item grids"""
+        return merge_stats(*(grid.get_stats() for grid, _, _ in self._item_grids.values()))
+
     def check_collisions(self, player, current_room_id):
         """Check for collisions between player and items"""
         player_rect = player.get_rect()
         collected_items = []
         message = None
+        room_items = self._materialize(current_room_id)
         
-        for item in self.room_items.get(current_room_id, []):
-            if not item.collected and player_rect.colliderect(item.get_rect()):
+        for index in self.get_room_grid(current_room_id).query(player_rect).tolist():
+            item = room_items[index]
+            if not item.collected:
                 result = item.collect(player)
                 if result:
                     if not isinstance(result, str):
@@ -396,15 +585,15 @@ class ItemManager:
                     collected_items.append(item)
         
         for item in collected_items:
-            if item in self.room_items[current_room_id]:
-                self.room_items[current_room_id].remove(item)
+            if item in room_items:
+                room_items.remove(item)
+                self.arena.remove(getattr(item, 'entity_id', None))
             
         return message
     
     def draw_room_items(self, screen, current_room_id):
-        """Draw all items in current room"""
-        for item in self.room_items.get(current_room_id, []):
-            item.draw(screen)
+        """Draw all items in current room and return the screen areas they cover"""
+        return [item.draw(screen) for item in self._materialize(current_room_id)]
     
     def update_traps(self):
         """Update state of all traps"""
@@ -416,48 +605,42 @@ class ItemManager:
     def save_state(self):
         """Save item states to file"""
         state = {}
-        for room_id, items in self.room_items.items():
+        for room_id, records in self.export_rooms().items():
             state[room_id] = []
-            for item in items:
+            for item_type, position in records:
                 state[room_id].append({
-                    'type': item.__class__.__name__,
-                    'position': item.position,
-                    'collected': item.collected
+                    'type': ITEM_CLASS_NAMES.get(item_type, 'Food'),
+                    'position': list(position),
+                    'collected': False
                 })
         
+        if self.writer is not None:
+            self.writer.submit(ITEMS_STATE_PATH, state)
+            return
         try:
-            with open('config/items_state.json', 'w') as f:
-                json.dump(state, f)
-        except:
-            pass
+            write_atomic(ITEMS_STATE_PATH, json_bytes(state))
+        except Exception as e:
+            print(f"Warning: Could not save item state: {e}")
     
     def load_state(self):
         """Load item states from file"""
+        if self.writer is not None:
+            self.writer.flush()
         try:
-            with open('config/items_state.json', 'r') as f:
+            with open(ITEMS_STATE_PATH, 'r') as f:
                 state = json.load(f)
+            self.reset()
+            self._saved_rooms = set()
             for room_id, items_data in state.items():
                 room_id = int(room_id)
-                self.room_items[room_id] = []
                 for item_data in items_data:
-                    item_type = item_data['type']
-                    item = self.create_item(self.get_type_key(item_type))
-                    if item:
-                        item.position = item_data['position']
-                        item.collected = item_data['collected']
-                        self.room_items[room_id].append(item)
+                    if not item_data['collected']:
+                        record = (self.get_type_key(item_data['type']), tuple(item_data['position']))
+                        self.arena.insert(record, room_id)
+                self._dehydrated.add(room_id)
         except:
             self.initialize_items()
 
     def get_type_key(self, class_name):
         """Map class name back to type key"""
-        mapping = {
-            'Food': 'food',
-            'Medkit': 'medkit', 
-            'Gun': 'gun',
-            'Ammo': 'ammo',
-            'ExtendedMagazine': 'magazine',
-            'EnhancedBullets': 'enhanced_bullets',
-            'FallingRocksTrap': 'trap'
-        }
-        return mapping.get(class_name, 'food')
+        return ITEM_TYPE_KEYS.get(class_name, 'food')
@@ -22,8 +22,8 @@ class FallingRocksTrap(Item):
         if self.activated and self.activation_timer > 0:
             pg.draw.circle(screen, (255, 0, 0), self.position, 15)
             self.activation_timer -= 1
-        else:
-            super().draw(screen)
+            return self.get_rect()
+        return super().draw(screen)
     
     def update(self):
         """Update trap activation timer"""
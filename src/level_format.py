@@ -0,0 +1,459 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import numpy as np
+
+# Compiled binary levels.
+# Usage:
+#   rooms_config = load_level("config/rooms_config.json", "config/rooms_config.bin")
+#   room = rooms_config["rooms"][slot]          # decoded from the memory map on first access
+# or from the repo root: python -m src.level_format config/rooms_config.json
+#
+# rooms_config.json stays the authoring source. It is compiled into fixed-width tables
+# (a room index with door links, then walls, gaps, enemies and chests) that are
+# memory-mapped at runtime, so startup only reads the header and index and each room is
+# decoded the first time it is visited. Anything the tables cannot represent exactly is
+# kept as JSON next to the room, so decoding always reproduces the source. The compiled
+# file records the size and mtime of the JSON it came from and is rebuilt when they change.
+
+MAGIC = b"TRLV"
+FORMAT_VERSION = 1
+NO_ROOM = -1
+
+DIRECTIONS = ("left", "right", "top", "bottom")
+DIRECTION_CODES = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+# magic, version, room count, source size, source mtime (ns), then offset and length of
+# the index, walls, gaps, enemies, chests, per-room JSON and level JSON sections
+HEADER = struct.Struct("<4sHIqq14Q")
+
+ROOM_FLAG_IS_EXIT = 1         # the room has an "is_exit" key
+ROOM_FLAG_EXIT_VALUE = 2      # ...and it is true
+ROOM_FLAG_NEIGHBORS = 4       # room_neighbors has an entry for the room
+ROOM_FLAG_WALLS = 8           # the room's walls/gaps/chests/enemies live in the tables
+ROOM_FLAG_GAPS = 16
+ROOM_FLAG_CHESTS = 32
+ROOM_FLAG_ENEMIES = 64
+
+ENEMY_FLAG_HP = 1
+ENEMY_FLAG_SPEED = 2
+ENEMY_FLAG_HP_INT = 4
+ENEMY_FLAG_SPEED_INT = 8
+
+INDEX_DTYPE = np.dtype([
+    ("room_id", "<i4"), ("flags", "<u4"),
+    ("wall_start", "<u4"), ("wall_count", "<u4"),
+    ("gap_start", "<u4"), ("gap_count", "<u4"),
+    ("enemy_start", "<u4"), ("enemy_count", "<u4"),
+    ("chest_start", "<u4"), ("chest_count", "<u4"),
+    ("neighbors", "<i4", (4,)),
+    ("extra_start", "<u4"), ("extra_length", "<u4"),
+])
+WALL_DTYPE = np.dtype([("rect", "<i4", (4,))])
+GAP_DTYPE = np.dtype([("direction", "<u4"), ("values", "<i4", (3,))])
+ENEMY_DTYPE = np.dtype([("type", "<u2"), ("flags", "<u2"), ("x", "<i4"), ("y", "<i4"),
+                        ("hp", "<f8"), ("speed", "<f8")])
+CHEST_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4"), ("is_got", "<u4")])
+
+_SECTION_DTYPES = (INDEX_DTYPE, WALL_DTYPE, GAP_DTYPE, ENEMY_DTYPE, CHEST_DTYPE)
+
+
+def _is_i32(value):
+    return type(value) is int and -2 ** 31 <= value < 2 ** 31
+
+
+def _is_number(value):
+    return type(value) in (int, float)
+
+
+def _tabular_walls(walls):
+    return isinstance(walls, list) and all(
+        isinstance(w, list) and len(w) == 4 and all(_is_i32(v) for v in w) for w in walls)
+
+
+def _tabular_gaps(gaps):
+    return isinstance(gaps, dict) and all(
+        k in DIRECTION_CODES and isinstance(v, list) and len(v) == 3 and all(_is_i32(n) for n in v)
+        for k, v in gaps.items())
+
+
+def _tabular_enemy(enemy):
+    if not isinstance(enemy, dict) or not set(enemy) <= {"type", "pos", "hp", "speed"}:
+        return False
+    if list(enemy)[:2] != ["type", "pos"] or not isinstance(enemy["type"], str):
+        return False
+    pos = enemy["pos"]
+    if not (isinstance(pos, list) and len(pos) == 2 and all(_is_i32(v) for v in pos)):
+        return False
+    if list(enemy)[2:] not in ([], ["hp"], ["speed"], ["hp", "speed"]):
+        return False
+    return all(_is_number(enemy[k]) for k in ("hp", "speed") if k in enemy)
+
+
+def _tabular_chest(chest):
+    return (isinstance(chest, dict) and list(chest) == ["pos", "is_got"]
+            and isinstance(chest["pos"], list) and len(chest["pos"]) == 2
+            and all(_is_i32(v) for v in chest["pos"]) and type(chest["is_got"]) is bool)
+
+
+def compile_level(rooms_config, source_size=0, source_mtime_ns=0):
+    """Compile a rooms_config dict into the binary level format and return the bytes"""
+    rooms = rooms_config.get("rooms", [])
+    neighbors = rooms_config.get("room_neighbors", {})
+    index = np.zeros(len(rooms), dtype=INDEX_DTYPE)
+    walls, gaps, enemies, chests = [], [], [], []
+    extra = bytearray()
+    enemy_types = []
+    type_codes = {}
+    linked = set()
+
+    for slot, room in enumerate(rooms):
+        room_id = room.get("room_id")
+        if not _is_i32(room_id):
+            raise ValueError(f"room at position {slot} needs an integer room_id")
+        record = index[slot]
+        record["room_id"] = room_id
+        flags = 0
+        leftover = {}
+        tabular = {"room_id"}
+
+        if "walls" in room and _tabular_walls(room["walls"]):
+            record["wall_start"], record["wall_count"] = len(walls), len(room["walls"])
+            walls.extend((tuple(w),) for w in room["walls"])
+            tabular.add("walls")
+            flags |= ROOM_FLAG_WALLS
+        if "gaps" in room and _tabular_gaps(room["gaps"]):
+            record["gap_start"], record["gap_count"] = len(gaps), len(room["gaps"])
+            gaps.extend((DIRECTION_CODES[k], tuple(v)) for k, v in room["gaps"].items())
+            tabular.add("gaps")
+            flags |= ROOM_FLAG_GAPS
+        if "enemies" in room and isinstance(room["enemies"], list) and all(map(_tabular_enemy, room["enemies"])):
+            record["enemy_start"], record["enemy_count"] = len(enemies), len(room["enemies"])
+            for enemy in room["enemies"]:
+                code = type_codes.setdefault(enemy["type"], len(type_codes))
+                if code == len(enemy_types):
+                    enemy_types.append(enemy["type"])
+                eflags = 0
+                hp, speed = enemy.get("hp", 0), enemy.get("speed", 0)
+                if "hp" in enemy:
+                    eflags |= ENEMY_FLAG_HP | (ENEMY_FLAG_HP_INT if type(hp) is int else 0)
+                if "speed" in enemy:
+                    eflags |= ENEMY_FLAG_SPEED | (ENEMY_FLAG_SPEED_INT if type(speed) is int else 0)
+                enemies.append((code, eflags, enemy["pos"][0], enemy["pos"][1], hp, speed))
+            tabular.add("enemies")
+            flags |= ROOM_FLAG_ENEMIES
+        if "chests" in room and isinstance(room["chests"], list) and all(map(_tabular_chest, room["chests"])):
+            record["chest_start"], record["chest_count"] = len(chests), len(room["chests"])
+            chests.extend((c["pos"][0], c["pos"][1], int(c["is_got"])) for c in room["chests"])
+            tabular.add("chests")
+            flags |= ROOM_FLAG_CHESTS
+        if type(room.get("is_exit")) is bool:
+            flags |= ROOM_FLAG_IS_EXIT | (ROOM_FLAG_EXIT_VALUE if room["is_exit"] else 0)
+            tabular.add("is_exit")
+
+        # Keys the tables cannot hold, plus the original key order, travel as JSON.
+        for key, value in room.items():
+            if key not in tabular:
+                leftover[key] = value
+        if leftover or list(room) != _canonical_order(room):
+            blob = json.dumps({"order": list(room), "values": leftover}, ensure_ascii=False).encode("utf-8")
+            record["extra_start"], record["extra_length"] = len(extra), len(blob)
+            extra.extend(blob)
+
+        links = neighbors.get(str(room_id))
+        record["neighbors"] = NO_ROOM
+        if isinstance(links, dict) and list(links) == [d for d in DIRECTIONS if d in links] \
+                and all(_is_i32(v) for v in links.values()):
+            flags |= ROOM_FLAG_NEIGHBORS
+            for direction, target in links.items():
+                record["neighbors"][DIRECTION_CODES[direction]] = target
+            linked.add(str(room_id))
+        record["flags"] = flags
+
+    level = {key: value for key, value in rooms_config.items() if key != "rooms"}
+    level["room_neighbors"] = {key: value for key, value in neighbors.items() if key not in linked}
+    level["room_neighbors_order"] = list(neighbors)
+    level["enemy_types"] = enemy_types
+    level_blob = json.dumps(level, ensure_ascii=False).encode("utf-8")
+
+    sections = [
+        index.tobytes(),
+        np.array(walls, dtype=WALL_DTYPE).tobytes() if walls else b"",
+        np.array(gaps, dtype=GAP_DTYPE).tobytes() if gaps else b"",
+        np.array(enemies, dtype=ENEMY_DTYPE).tobytes() if enemies else b"",
+        np.array(chests, dtype=CHEST_DTYPE).tobytes() if chests else b"",
+        bytes(extra),
+        level_blob,
+    ]
+    layout = []
+    offset = HEADER.size
+    for section in sections:
+        layout.extend((offset, len(section)))
+        offset += len(section)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(rooms), source_size, source_mtime_ns, *layout)
+    return header + b"".join(sections)
+
+
+def _canonical_order(room):
+    # Order in which decode_room emits tabular keys when no order was recorded.
+    return [k for k in ("room_id", "walls", "gaps", "chests", "is_exit", "enemies") if k in room]
+
+
+class CompiledLevel:
+    """Memory-mapped compiled level with per-room decoding"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        fields = HEADER.unpack_from(self._map, 0)
+        magic, version, self.room_count, self.source_size, self.source_mtime_ns = fields[:5]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled level")
+        layout = fields[5:]
+        tables = []
+        for i, dtype in enumerate(_SECTION_DTYPES):
+            offset, length = layout[2 * i], layout[2 * i + 1]
+            tables.append(np.frombuffer(self._map, dtype=dtype, count=length // dtype.itemsize, offset=offset))
+        self.index, self.walls, self.gaps, self.enemies, self.chests = tables
+        self._extra_offset = layout[10]
+        level_offset, level_length = layout[12], layout[13]
+        self.level = json.loads(self._map[level_offset:level_offset + level_length].decode("utf-8"))
+        self.room_ids = self.index["room_id"].tolist()
+
+    def close(self):
+        """Release the memory map; rooms decoded so far stay usable"""
+        self.index = self.walls = self.gaps = self.enemies = self.chests = None
+        if getattr(self, "_map", None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # numpy views still reference the map; it is released with them
+                pass
+            self._map = None
+        self._file.close()
+
+    def room_neighbors(self):
+        """Rebuild the string-keyed room_neighbors dict of the source config"""
+        table = {}
+        flags = self.index["flags"]
+        links = self.index["neighbors"].tolist()
+        for slot in np.flatnonzero(flags & ROOM_FLAG_NEIGHBORS).tolist():
+            table[str(self.room_ids[slot])] = {DIRECTIONS[d]: t for d, t in enumerate(links[slot]) if t != NO_ROOM}
+        table.update(self.level.get("room_neighbors", {}))
+        order = self.level.get("room_neighbors_order")
+        return {key: table[key] for key in order} if order is not None else table
+
+    def room_flags(self):
+        """Return (room_id, has chests, is exit) for every room from the index, without decoding the rooms"""
+        result = []
+        for record, room_id in zip(self.index, self.room_ids):
+            flags = int(record["flags"])
+            extra = self._extra(record)
+            values = extra["values"] if extra is not None else {}
+            chests = int(record["chest_count"]) > 0 if flags & ROOM_FLAG_CHESTS else bool(values.get("chests"))
+            is_exit = bool(flags & ROOM_FLAG_EXIT_VALUE) if flags & ROOM_FLAG_IS_EXIT else bool(values.get("is_exit"))
+            result.append((room_id, chests, is_exit))
+        return result
+
+    def enemy_counts(self, slots):
+        """Count the enemies of each type in the given room slots from the enemy table, without decoding the rooms"""
+        records = self.index[np.asarray(slots, dtype=np.int64)]
+        counts = {}
+        tabular = records[(records["flags"] & ROOM_FLAG_ENEMIES) != 0]
+        lengths = tabular["enemy_count"].astype(np.int64)
+        if lengths.sum():
+            # Row numbers of every listed room's enemies: each room's start, then counting up within the room.
+            offsets = np.repeat(tabular["enemy_start"].astype(np.int64) - (np.cumsum(lengths) - lengths), lengths)
+            rows = offsets + np.arange(int(lengths.sum()))
+            codes = np.bincount(self.enemies["type"][rows], minlength=len(self.level["enemy_types"]))
+            for name, count in zip(self.level["enemy_types"], codes.tolist()):
+                if count:
+                    counts[name] = counts.get(name, 0) + count
+        for record in records[records["extra_length"] > 0]:
+            _count_enemies([self._extra(record)["values"]], counts)
+        return counts
+
+    def decode_room(self, slot, reset_chests=False):
+        """Decode one room into the dict rooms_config.json holds for it"""
+        record = self.index[slot]
+        room = {"room_id": int(record["room_id"])}
+        flags = int(record["flags"])
+        if flags & ROOM_FLAG_WALLS:
+            rows = self._rows(self.walls, record, "wall")
+            room["walls"] = rows["rect"].tolist()
+        if flags & ROOM_FLAG_GAPS:
+            rows = self._rows(self.gaps, record, "gap")
+            room["gaps"] = {DIRECTIONS[d]: v for d, v in zip(rows["direction"].tolist(), rows["values"].tolist())}
+        if flags & ROOM_FLAG_CHESTS:
+            rows = self._rows(self.chests, record, "chest")
+            room["chests"] = [{"pos": [x, y], "is_got": False if reset_chests else bool(got)}
+                              for x, y, got in zip(rows["x"].tolist(), rows["y"].tolist(), rows["is_got"].tolist())]
+        if flags & ROOM_FLAG_IS_EXIT:
+            room["is_exit"] = bool(flags & ROOM_FLAG_EXIT_VALUE)
+        if flags & ROOM_FLAG_ENEMIES:
+            rows = self._rows(self.enemies, record, "enemy")
+            room["enemies"] = [self._decode_enemy(row) for row in rows.tolist()]
+
+        extra = self._extra(record)
+        if extra is not None:
+            room.update(extra["values"])
+            room = {key: room[key] for key in extra["order"]}
+            if reset_chests:
+                for chest in room.get("chests", []):
+                    if isinstance(chest, dict):
+                        chest["is_got"] = False
+        return room
+
+    def _extra(self, record):
+        length = int(record["extra_length"])
+        if not length:
+            return None
+        start = self._extra_offset + int(record["extra_start"])
+        return json.loads(self._map[start:start + length].decode("utf-8"))
+
+    @staticmethod
+    def _rows(table, record, name):
+        start = int(record[name + "_start"])
+        return table[start:start + int(record[name + "_count"])]
+
+    def _decode_enemy(self, row):
+        code, flags, x, y, hp, speed = row
+        enemy = {"type": self.level["enemy_types"][code], "pos": [x, y]}
+        if flags & ENEMY_FLAG_HP:
+            enemy["hp"] = int(hp) if flags & ENEMY_FLAG_HP_INT else hp
+        if flags & ENEMY_FLAG_SPEED:
+            enemy["speed"] = int(speed) if flags & ENEMY_FLAG_SPEED_INT else speed
+        return enemy
+
+
+class LazyRooms:
+    """List-like view of a compiled level's rooms that decodes each room on first access"""
+
+    def __init__(self, level, reset_chests=False):
+        self.level = level
+        self.room_ids = level.room_ids
+        self.reset_chests = reset_chests
+        self._rooms = [None] * level.room_count
+        self.decoded = 0
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        room = self._rooms[item]
+        if room is None:
+            room = self._rooms[item] = self.level.decode_room(item % len(self._rooms), self.reset_chests)
+            self.decoded += 1
+        return room
+
+    def __iter__(self):
+        for i in range(len(self._rooms)):
+            yield self[i]
+
+    def is_decoded(self, slot):
+        return self._rooms[slot] is not None
+
+    def room_flags(self):
+        return self.level.room_flags()
+
+    def enemy_counts(self):
+        """Count the enemies of each type; rooms not decoded yet are read from the compiled enemy table"""
+        counts = self.level.enemy_counts([slot for slot, room in enumerate(self._rooms) if room is None])
+        return _count_enemies((room for room in self._rooms if room is not None), counts)
+
+    def to_list(self):
+        """Decode every room and return them as a plain list, e.g. for writing JSON"""
+        return list(self)
+
+
+def _count_enemies(rooms, counts):
+    for room in rooms:
+        for enemy in room.get("enemies", []):
+            name = enemy.get("type") or ""
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def enemy_counts(rooms):
+    """Count the enemies of each type name in a level's rooms; a compiled level answers from its enemy table"""
+    compiled = getattr(rooms, "enemy_counts", None)
+    if compiled is not None:
+        return compiled()
+    return _count_enemies(rooms, {})
+
+
+def write_compiled_level(json_path, bin_path):
+    """Compile a rooms_config JSON file and write it to bin_path atomically"""
+    stat = os.stat(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        rooms_config = json.load(f)
+    data = compile_level(rooms_config, stat.st_size, stat.st_mtime_ns)
+    tmp_path = bin_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, bin_path)
+    return rooms_config
+
+
+def is_current(json_path, bin_path):
+    """Return True if bin_path was compiled from the current contents of json_path"""
+    try:
+        stat = os.stat(json_path)
+        with open(bin_path, "rb") as f:
+            header = f.read(HEADER.size)
+        fields = HEADER.unpack(header)
+    except (OSError, struct.error):
+        return False
+    return (fields[0] == MAGIC and fields[1] == FORMAT_VERSION
+            and fields[3] == stat.st_size and fields[4] == stat.st_mtime_ns)
+
+
+def load_level(json_path, bin_path, reset_chests=False):
+    """Return a rooms_config dict backed by the compiled level, recompiling it if the JSON changed.
+
+    "rooms" is a LazyRooms sequence; the other keys are plain data. With reset_chests every
+    decoded chest starts uncollected, as a new game expects.
+    """
+    if not is_current(json_path, bin_path):
+        write_compiled_level(json_path, bin_path)
+    level = CompiledLevel(bin_path)
+    rooms_config = {key: value for key, value in level.level.items()
+                    if key not in ("room_neighbors", "room_neighbors_order", "enemy_types")}
+    rooms_config["rooms"] = LazyRooms(level, reset_chests)
+    rooms_config["room_neighbors"] = level.room_neighbors()
+    return rooms_config
+
+
+def plain_rooms_config(rooms_config):
+    """Return rooms_config with the rooms as a plain list, suitable for json.dump"""
+    rooms = rooms_config.get("rooms", [])
+    if isinstance(rooms, list):
+        return rooms_config
+    return dict(rooms_config, rooms=list(rooms))
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile a rooms_config JSON file into the binary level format")
+    parser.add_argument("source", nargs="?", default="config/rooms_config.json")
+    parser.add_argument("-o", "--output", default=None, help="defaults to the source path with a .bin suffix")
+    args = parser.parse_args(argv)
+    output = args.output or os.path.splitext(args.source)[0] + ".bin"
+    rooms_config = write_compiled_level(args.source, output)
+    print(f"{args.source} -> {output}: {len(rooms_config.get('rooms', []))} rooms, "
+          f"{os.path.getsize(output)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
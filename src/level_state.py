@@ -0,0 +1,69 @@
+import copy
+from src.room_registry import RoomRegistry
+
+# Mutable state of a level run on top of its pristine template.
+# Usage:
+#   state = LevelState(rooms_config)
+#   room_data = state.room(room_id)                 # read-only: the template record until the room changes
+#   room = state.mutable_room(room_id, "chests")    # copy-on-write: copies the room and its chests once
+#   room["chests"][0]["is_got"] = True
+#   state.reset()                                   # restart: drop every change at once
+#
+# The template (rooms_config as loaded) is never written during play. A room is copied
+# into the overlay the first time something in it changes, and only the fields being
+# changed are deep-copied, so walls and gaps keep their identity and compiled caches
+# stay valid. Restarting a run replaces the overlay with an empty one, whatever the
+# size of the dungeon.
+
+
+class LevelState:
+    """Pristine level template plus a copy-on-write overlay of the rooms changed during a run"""
+
+    def __init__(self, template, registry=None):
+        self.template = template
+        self.registry = registry or RoomRegistry(template)
+        self._overlay = {}
+        self._copied = {}
+        self.generation = 0
+
+    def room(self, room_id):
+        """Return the current record of a room, raising KeyError for unknown rooms"""
+        room = self._overlay.get(room_id)
+        return room if room is not None else self.registry.room(room_id)
+
+    def get(self, room_id, default=None):
+        """Return the current record of a room, or default for unknown rooms"""
+        room = self._overlay.get(room_id)
+        return room if room is not None else self.registry.get(room_id, default)
+
+    def mutable_room(self, room_id, *fields):
+        """Return the run's own copy of a room, with the given fields deep-copied so they can be edited"""
+        room = self._overlay.get(room_id)
+        if room is None:
+            room = self._overlay[room_id] = dict(self.registry.room(room_id))
+            self._copied[room_id] = set()
+        copied = self._copied[room_id]
+        for field in fields:
+            if field not in copied and field in room:
+                room[field] = copy.deepcopy(room[field])
+            copied.add(field)
+        return room
+
+    def revert_room(self, room_id):
+        """Drop the changes made to one room"""
+        self._overlay.pop(room_id, None)
+        self._copied.pop(room_id, None)
+
+    def is_modified(self, room_id):
+        return room_id in self._overlay
+
+    @property
+    def modified_rooms(self):
+        """Ids of the rooms that differ from the template"""
+        return list(self._overlay)
+
+    def reset(self):
+        """Forget every change made during the run"""
+        self._overlay = {}
+        self._copied = {}
+        self.generation += 1
@@ -0,0 +1,173 @@
+import math
+import numpy as np
+import pygame as pg
+
+# Free-space tests and Poisson-disk sampling for placing things inside a room.
+# Usage:
+#   blocked = room_blocked_array(room_collision.get(room_data), (800, 600), extra_rects)
+#   free = box_free(blocked, 45, 45)                 # free[y, x]: a 45x45 box at top-left (x, y) touches no wall
+#   points = sample_positions(free, 12, 40, rng, region=(130, 130, 671, 471))
+#   free, open_ = box_fields(blocked, [(30, 30), (110, 110)], centered=True)   # anchored at box centers
+#
+# Walls come from the room's compiled collision mask, so placement sees exactly the
+# geometry the game collides against. The summed-area table answers "is this box
+# empty" for every top-left pixel at once. The sampler is the grid-accelerated
+# Poisson-disk variant that throws darts into background cells of size r/sqrt(2):
+# cells are visited in 3x3 phases, and two cells of the same phase are far enough
+# apart that their darts can never conflict, so a whole phase is tested as one
+# vectorized batch against the 5x5 cell neighborhood.
+
+PHASES = [(px, py) for py in range(3) for px in range(3)]
+NEIGHBOR_DY, NEIGHBOR_DX = (offsets.ravel() for offsets in np.mgrid[-2:3, -2:3])
+
+
+def room_blocked_array(compiled_room, screen_size, rects=()):
+    """Return a (height, width) bool array of the screen that is True on wall pixels and inside rects"""
+    width, height = screen_size
+    surface = compiled_room.mask_for().to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+    ox, oy = compiled_room.origin
+    walls = pg.surfarray.pixels2d(surface)[-ox:-ox + width, -oy:-oy + height]
+    blocked = (walls != 0).T
+    for rect in rects:
+        rect = pg.Rect(rect).clip(pg.Rect(0, 0, width, height))
+        if rect.width and rect.height:
+            blocked[rect.top:rect.bottom, rect.left:rect.right] = True
+    return blocked
+
+
+def block_any(blocked, step):
+    """Downsample a bool array by step, marking a cell True if any pixel in its step x step block is True.
+
+    A box test on the result is exact for anchors on the step lattice as long as
+    the box size and anchor offset are multiples of step, and conservative otherwise.
+    """
+    height, width = blocked.shape
+    rows, cols = -(-height // step), -(-width // step)
+    if (rows * step, cols * step) != (height, width):
+        padded = np.zeros((rows * step, cols * step), dtype=bool)
+        padded[:height, :width] = blocked
+        blocked = padded
+    # OR-ing strided views is much faster than reducing a reshaped array over its short axes.
+    coarse_rows = blocked[0::step].copy()
+    for offset in range(1, step):
+        coarse_rows |= blocked[offset::step]
+    coarse = coarse_rows[:, 0::step].copy()
+    for offset in range(1, step):
+        coarse |= coarse_rows[:, offset::step]
+    return coarse
+
+
+def integral_image(blocked):
+    """Return the summed-area table of a bool array, padded with a leading zero row and column"""
+    table = np.zeros((blocked.shape[0] + 1, blocked.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(blocked, axis=0, dtype=np.int32), axis=1, out=table[1:, 1:])
+    return table
+
+
+def box_fields(blocked, sizes, region=None, centered=False):
+    """Return one bool array per (width, height) in sizes, True where a box of that size covers no blocked pixel.
+
+    Boxes are anchored at their top-left corner, or at their center with
+    centered=True, and must lie fully inside the array. With a region
+    (x0, y0, x1, y1) only anchors inside it are tested and the rest of each
+    array stays False. All sizes share one summed-area table.
+    """
+    height, width = blocked.shape
+    sizes = [(max(int(w), 1), max(int(h), 1)) for w, h in sizes]
+    x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+    x0, y0, x1, y1 = max(int(x0), 0), max(int(y0), 0), min(int(x1), width), min(int(y1), height)
+    reach = max(max(w, h) for w, h in sizes)
+    wx0, wy0 = max(x0 - reach, 0), max(y0 - reach, 0)
+    table = integral_image(blocked[wy0:min(y1 + reach, height), wx0:min(x1 + reach, width)])
+    fields = []
+    for w, h in sizes:
+        field = np.zeros((height, width), dtype=bool)
+        ox, oy = (w // 2, h // 2) if centered else (0, 0)
+        ax0, ax1 = max(x0, ox), min(x1, width - w + ox + 1)
+        ay0, ay1 = max(y0, oy), min(y1, height - h + oy + 1)
+        if ax1 > ax0 and ay1 > ay0:
+            left, top = ax0 - ox - wx0, ay0 - oy - wy0
+            right, bottom = left + ax1 - ax0, top + ay1 - ay0
+            sums = (table[top + h:bottom + h, left + w:right + w] - table[top:bottom, left + w:right + w]
+                    - table[top + h:bottom + h, left:right] + table[top:bottom, left:right])
+            field[ay0:ay1, ax0:ax1] = sums == 0
+        fields.append(field)
+    return fields
+
+
+def box_free(blocked, box_width, box_height, region=None):
+    """Return a bool array that is True where a box with its top-left at (x, y) covers no blocked pixel"""
+    return box_fields(blocked, [(box_width, box_height)], region)[0]
+
+
+def poisson_disk(free, radius, rng, region=None, rounds=12, min_yield=0.02):
+    """Return an (n, 2) int array of free (x, y) positions at least radius apart, filling the region.
+
+    Each round throws one dart into every empty cell; rounds stop once one
+    fills fewer than min_yield of the cells, as the set is then close to maximal.
+    """
+    height, width = free.shape
+    x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+    x0, y0 = max(int(x0), 0), max(int(y0), 0)
+    x1, y1 = min(int(x1), width), min(int(y1), height)
+    if x1 <= x0 or y1 <= y0:
+        return np.zeros((0, 2), dtype=np.int64)
+    cell = radius / math.sqrt(2)
+    cols, rows = int(math.ceil((x1 - x0) / cell)), int(math.ceil((y1 - y0) / cell))
+    # Two cells of padding on each side keep the 5x5 neighborhood lookups in bounds.
+    grid = np.full((rows + 4, cols + 4, 2), -1e9)
+    filled = np.zeros((rows + 4, cols + 4), dtype=bool)
+    radius_sq = float(radius) * float(radius)
+    for _ in range(rounds):
+        thrown = 0
+        for px, py in PHASES:
+            cy, cx = np.nonzero(~filled[2 + py:2 + rows:3, 2 + px:2 + cols:3])
+            if not len(cx):
+                continue
+            cx, cy = cx * 3 + px, cy * 3 + py
+            xs = np.floor(x0 + (cx + rng.random(len(cx))) * cell).astype(np.int64)
+            ys = np.floor(y0 + (cy + rng.random(len(cy))) * cell).astype(np.int64)
+            ok = (xs < x1) & (ys < y1)
+            ok[ok] = free[ys[ok], xs[ok]]
+            if not ok.any():
+                continue
+            cx, cy, xs, ys = cx[ok], cy[ok], xs[ok], ys[ok]
+            near = grid[cy[:, None] + 2 + NEIGHBOR_DY, cx[:, None] + 2 + NEIGHBOR_DX]
+            dist_sq = (near[..., 0] - xs[:, None]) ** 2 + (near[..., 1] - ys[:, None]) ** 2
+            ok = dist_sq.min(axis=1) >= radius_sq
+            cx, cy = cx[ok] + 2, cy[ok] + 2
+            grid[cy, cx, 0] = xs[ok]
+            grid[cy, cx, 1] = ys[ok]
+            filled[cy, cx] = True
+            thrown += len(cx)
+        if thrown <= min_yield * rows * cols:
+            break
+    return grid[filled].astype(np.int64)
+
+
+def sample_positions(free, count, min_distance, rng, region=None, min_radius=1.0):
+    """Return up to count free positions spread by Poisson-disk sampling.
+
+    The radius starts at min_distance and shrinks until the room holds count
+    points, so crowded rooms pack tighter instead of overlapping walls. Fewer
+    than count positions come back only if the free space itself runs out.
+    """
+    if count <= 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    height, width = free.shape
+    x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+    area = int(free[max(y0, 0):y1, max(x0, 0):x1].sum())
+    if not area:
+        return np.zeros((0, 2), dtype=np.int64)
+    # A maximal Poisson-disk set holds roughly area / (1.5 r^2) points; aim for a little slack.
+    radius = max(min(float(min_distance), math.sqrt(area / (1.8 * count))), min_radius)
+    while True:
+        points = poisson_disk(free, radius, rng, (x0, y0, x1, y1))
+        if len(points) >= count or radius <= min_radius:
+            break
+        radius = max(radius * 0.8, min_radius)
+    if len(points) > count:
+        points = points[rng.choice(len(points), count, replace=False)]
+    else:
+        points = points[rng.permutation(len(points))]
+    return points
@@ -1,60 +1,65 @@
 import pygame as pg
 import math
+from src.assets import load_image
+from src.projectile_pool import PooledProjectile, ANCHOR_BOX
 
-_bullet_raw = None
+_bullet_missing = False
 
 
-class Bullet:
+class Bullet(PooledProjectile):
     def __init__(self, x, y, direction, speed=8, damage=10, radius=5):
         """Initialize a bullet with position, direction, speed, damage and radius"""
-        self.x = x
-        self.y = y
+        rad = math.radians(direction)
+        super().__init__(x, y, math.cos(rad) * speed, -(math.sin(rad) * speed),
+                         lifetime=180, w=radius * 2, h=radius * 2, anchor=ANCHOR_BOX)
         self.direction = direction
         self.speed = speed
         self.damage = damage
         self.radius = radius
         self.color = (255, 255, 0)
-        self.active = True
-        self.lifetime = 180
-        self.timer = 0
-    
+
+    @classmethod
+    def from_save_state(cls, state):
+        """Recreate a bullet from get_save_state; its position and motion come back with its pool slot"""
+        return cls(0, 0, state["direction"], state["speed"], state["damage"], state["radius"])
+
+    def get_save_state(self):
+        return {"direction": self.direction, "speed": self.speed, "damage": self.damage, "radius": self.radius}
+
+    @property
+    def active(self):
+        return self._live
+
+    @active.setter
+    def active(self, value):
+        if not value:
+            self.release()
+
     def update(self, screen_width, screen_height):
-        """Update bullet position, lifetime and check boundaries"""
-        rad = math.radians(self.direction)
-        self.x += math.cos(rad) * self.speed
-        self.y -= math.sin(rad) * self.speed
-        
+        """Update bullet position, lifetime and check boundaries; pooled bullets are normally stepped by the pool"""
+        self.x += self.vx
+        self.y += self.vy
+
         self.timer += 1
         if self.timer >= self.lifetime:
             self.active = False
-        
-        if (self.x < 0 or self.x > screen_width or 
+
+        if (self.x < 0 or self.x > screen_width or
             self.y < 0 or self.y > screen_height):
             self.active = False
-    
+
     def draw(self, screen):
-        """Draw the bullet on the screen using image or circle"""
+        """Draw the bullet on the screen using image or circle and return the drawn area"""
         if self.active:
-            global _bullet_raw
-            if _bullet_raw is None:
-                try:
-                    _bullet_raw = pg.image.load("assets/bullet.png")
-                except Exception:
-                    _bullet_raw = None
-
-            if _bullet_raw is not None:
+            global _bullet_missing
+            x, y = self.x, self.y
+            if not _bullet_missing:
                 try:
                     w = int(self.radius * 2 * 2.5)
                     h = int(self.radius * 2 * 2.5)
-                    img = pg.transform.scale(_bullet_raw, (w, h))
-                    rect = img.get_rect(center=(int(self.x), int(self.y)))
-                    screen.blit(img, rect.topleft)
-                    return
+                    img = load_image("assets/bullet.png", (w, h))
+                    rect = img.get_rect(center=(int(x), int(y)))
+                    return screen.blit(img, rect.topleft)
                 except Exception:
-                    pass
-            pg.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-    
-    def get_rect(self):
-        """Get the collision rectangle for the bullet"""
-        return pg.Rect(self.x - self.radius, self.y - self.radius, 
-                      self.radius * 2, self.radius * 2)
\ No newline at end of file
+                    _bullet_missing = True
+            return pg.draw.circle(screen, self.color, (int(x), int(y)), self.radius)
@@ -1,13 +1,24 @@
 import pygame as pg
 import math
+import operator
 from .health_system import HealthSystem
 from .bullet import Bullet
 from .constants import PLAYER_CONFIG, BULLET_CONFIG, CONTROLS
 from src.audio import play_sound
+from src.assets import load_image
+from src.projectile_pool import ProjectilePool, ProjectileView, OWNER_PLAYER
+
+# Attributes that make up the player's state in a save game, besides health.
+SAVED_FIELDS = ("x", "y", "current_room", "direction", "last_direction", "speed", "bullet_damage", "has_gun",
+                "ammo", "max_ammo", "shoot_cooldown", "invincible", "invincible_timer", "just_switched", "is_moving")
+# An in-memory snapshot holds the same; bullets are saved and snapshotted with the projectile pool.
+SNAPSHOT_FIELDS = SAVED_FIELDS
+_get_snapshot_fields = operator.attrgetter(*SNAPSHOT_FIELDS)
 
 class Player:
-    def __init__(self, x, y):
+    def __init__(self, x, y, projectile_pool=None):
         """Initialize the player with position, health, weapons and other attributes"""
+        self._bullets = ProjectileView(projectile_pool or ProjectilePool(), OWNER_PLAYER)
         self.x = x
         self.y = y
         self.radius = PLAYER_CONFIG["radius"]
@@ -20,7 +31,6 @@ class Player:
         self.bullets = []
         self.ammo = BULLET_CONFIG["initial_ammo"]
         self.max_ammo = BULLET_CONFIG["max_ammo"]
-        self.room_bullets = {}
         self.is_moving = False
         self.last_direction = "right"
         self.shoot_cooldown = 0
@@ -29,28 +39,39 @@ class Player:
         self.current_room = 1
         self.just_switched = False
         try:
-            raw = pg.image.load("assets/raider.png").convert_alpha()
-            self._raider_image_raw = raw
             w = int(self.radius * 2 * 2.5)
             h = int(self.radius * 2 * 2.5)
-            self._raider_image = pg.transform.scale(raw, (w, h))
+            self._raider_image_raw = load_image("assets/raider.png")
+            self._raider_image = load_image("assets/raider.png", (w, h))
         except Exception:
             self._raider_image_raw = None
             self._raider_image = None
         try:
-            hurt = pg.image.load("assets/hurted.png").convert_alpha()
             w = int(self.radius * 2 * 2.5)
             h = int(self.radius * 2 * 2.5)
-            self._hurted_image = pg.transform.scale(hurt, (w, h))
+            self._hurted_image = load_image("assets/hurted.png", (w, h))
         except Exception:
             self._hurted_image = None
     
+    @property
+    def bullets(self):
+        """Live bullets of the current room, stored in the shared projectile pool"""
+        return self._bullets
+
+    @bullets.setter
+    def bullets(self, bullets):
+        if bullets is self._bullets:
+            return
+        bullets = list(bullets)
+        self._bullets.clear()
+        for bullet in bullets:
+            self._bullets.append(bullet)
+
     def switch_room(self, new_room_id):
-        """Switch to a new room and manage bullets between rooms"""
-        self.room_bullets[self.current_room] = []
+        """Switch to a new room; bullets do not follow the player between rooms"""
+        self.bullets.clear()
         self.current_room = new_room_id
         self.just_switched = True
-        self.bullets = self.room_bullets.get(new_room_id, [])
     
     def handle_input(self, keys):
         """Process keyboard input for player movement and direction"""
@@ -117,13 +138,8 @@ class Player:
         self.update_bullets(screen_width, screen_height)
     
     def update_bullets(self, screen_width, screen_height):
-        """Update all bullets in the current room"""
-        active_bullets = []
-        for bullet in self.bullets:
-            bullet.update(screen_width, screen_height)
-            if bullet.active:
-                active_bullets.append(bullet)
-        self.bullets = active_bullets
+        """Update all bullets in the current room in one vectorized pool step"""
+        self.bullets.step((screen_width, screen_height))
     
     def take_damage(self, damage):
         """Apply damage to the player with invincibility frames"""
@@ -143,24 +159,23 @@ class Player:
         return self.health_system.heal(amount)
     
     def draw(self, screen):
-        """Draw the player with appropriate sprite based on state"""
+        """Draw the player with appropriate sprite based on state and return the drawn area"""
         if self.invincible and self.invincible_timer % 10 < 5:
             if getattr(self, '_hurted_image', None) is not None:
                 rect = self._hurted_image.get_rect(center=(int(self.x), int(self.y)))
-                screen.blit(self._hurted_image, rect.topleft)
+                return screen.blit(self._hurted_image, rect.topleft)
             else:
-                pg.draw.circle(screen, (255, 0, 0), (int(self.x), int(self.y)), self.radius)
+                return pg.draw.circle(screen, (255, 0, 0), (int(self.x), int(self.y)), self.radius)
         else:
             if getattr(self, '_raider_image', None):
                 rect = self._raider_image.get_rect(center=(int(self.x), int(self.y)))
-                screen.blit(self._raider_image, rect.topleft)
+                return screen.blit(self._raider_image, rect.topleft)
             else:
-                pg.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+                return pg.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
     
     def draw_bullets(self, screen):
-        """Draw all bullets in the current room"""
-        for bullet in self.bullets:
-            bullet.draw(screen)
+        """Draw all bullets in the current room and return the drawn areas"""
+        return self.bullets.draw(screen)
     
     def get_rect(self):
         """Get collision rectangle for the player"""
@@ -189,5 +204,35 @@ class Player:
     
     def clear_all_bullets(self):
         """Clear all bullets from all rooms"""
-        self.bullets = []
-        self.room_bullets.clear()
\ No newline at end of file
+        self.bullets.clear()
+
+    def get_save_state(self):
+        """Get the player state stored in a save game"""
+        state = {field: getattr(self, field) for field in SAVED_FIELDS}
+        state["health"] = [self.health_system.current_health, self.health_system.max_health,
+                           self.health_system.is_alive]
+        return state
+
+    def apply_save_state(self, state):
+        """Restore the player from a state returned by get_save_state; GameManager.load_game respawns the bullets"""
+        self.just_switched = False
+        self.is_moving = False
+        for field in SAVED_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+        if "health" in state:
+            health = self.health_system
+            health.current_health, health.max_health, health.is_alive = state["health"]
+        self.clear_all_bullets()
+
+    def get_snapshot(self):
+        """Get the player state as a flat tuple for GameManager.snapshot"""
+        health = self.health_system
+        return _get_snapshot_fields(self), (health.current_health, health.max_health, health.is_alive)
+
+    def apply_snapshot(self, snapshot):
+        """Restore the player from a tuple returned by get_snapshot, leaving the bullets alone"""
+        values, health = snapshot
+        for field, value in zip(SNAPSHOT_FIELDS, values):
+            setattr(self, field, value)
+        self.health_system.current_health, self.health_system.max_health, self.health_system.is_alive = health
@@ -0,0 +1,386 @@
+import numpy as np
+import pygame as pg
+from src.spatial_hash import SpatialHash, merge_stats
+from src.entity_arena import make_handle, handle_index, handle_generation
+
+# Shared, array-backed storage for moving projectiles (player bullets and enemy fireballs).
+# Usage:
+#   pool = ProjectilePool()
+#   bullets = ProjectileView(pool, OWNER_PLAYER)
+#   bullets.append(Bullet(x, y, direction))
+#   expired = bullets.step(bounds=(800, 600))
+#
+# Position, velocity, age and hit-box size live in NumPy arrays so that every projectile
+# of an owner is integrated, aged and culled in one vectorized pass, and indexed in a
+# per-owner spatial hash for overlap queries. The Bullet and Fireball objects game code
+# holds are handles whose x/y read those arrays.
+
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1
+
+# How a projectile's hit box is derived from its float position, matching the rects
+# the per-object code used to build.
+ANCHOR_BOX = 0      # pg.Rect(x - w / 2, y - h / 2, w, h): the float corner is truncated
+ANCHOR_CENTER = 1   # rect.center = (int(x), int(y)): the center is truncated first
+
+_FIELDS = {
+    "x": np.float64,
+    "y": np.float64,
+    "vx": np.float64,
+    "vy": np.float64,
+    "timer": np.int32,
+    "lifetime": np.int32,
+    "w": np.int32,
+    "h": np.int32,
+    "anchor": np.int8,
+    "margin": np.int32,
+    "owner": np.int8,
+    "seq": np.int64,
+    "active": np.bool_,
+    "generation": np.int64,
+}
+
+# Per-projectile values copied back onto a handle when its slot is released.
+_HANDLE_FIELDS = ("x", "y", "vx", "vy", "timer")
+# Per-projectile values kept in a save game, see ProjectilePool.export_live.
+SAVED_FIELDS = ("x", "y", "vx", "vy", "timer", "lifetime", "w", "h", "anchor", "margin", "owner")
+
+
+class ProjectilePool:
+    """Struct-of-arrays projectile storage with a free list and vectorized integration"""
+
+    def __init__(self, capacity=64, cell_size=64):
+        self.capacity = 0
+        self.handles = []
+        self._free = []
+        self._next_seq = 0
+        self._counts = {}
+        self.cell_size = cell_size
+        self._grids = {}
+        self._grid_slots = {}
+        for name, dtype in _FIELDS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """Enlarge every array to the given capacity, keeping live slots where they are"""
+        for name, dtype in _FIELDS.items():
+            grown = np.zeros(capacity, dtype=dtype)
+            grown[:self.capacity] = getattr(self, name)
+            setattr(self, name, grown)
+        self.handles.extend([None] * (capacity - self.capacity))
+        self._free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, handle, owner):
+        """Move a handle's state into a free slot and return the slot index"""
+        if not self._free:
+            self._grow(max(64, self.capacity * 2))
+        index = self._free.pop()
+        for name, value in handle._state.items():
+            getattr(self, name)[index] = value
+        self.owner[index] = owner
+        self._counts[owner] = self._counts.get(owner, 0) + 1
+        self._grid_slots[owner] = None
+        self.seq[index] = self._next_seq
+        self._next_seq += 1
+        self.active[index] = True
+        self.handles[index] = handle
+        handle._pool = self
+        handle._index = index
+        handle.entity_id = make_handle(index, int(self.generation[index]))
+        return index
+
+    def release(self, index):
+        """Free a slot, leaving a copy of its last state on the handle"""
+        handle = self.handles[index]
+        if handle is not None:
+            for name in _HANDLE_FIELDS:
+                handle._state[name] = getattr(self, name)[index].item()
+            handle._pool = None
+            handle._index = None
+            handle._live = False
+        if self.active[index]:
+            owner = int(self.owner[index])
+            self._counts[owner] -= 1
+            self._grid_slots[owner] = None
+        self.active[index] = False
+        self.generation[index] += 1
+        self.handles[index] = None
+        self._free.append(index)
+
+    def resolve(self, entity_id):
+        """Return the live projectile behind an entity_id, or None once its slot was released"""
+        if entity_id is None:
+            return None
+        index = handle_index(entity_id)
+        if index >= self.capacity or not self.active[index] or self.generation[index] != handle_generation(entity_id):
+            return None
+        return self.handles[index]
+
+    def indices(self, owner):
+        """Return the slot indices of an owner's live projectiles in spawn order"""
+        if not self._counts.get(owner):
+            return np.zeros(0, dtype=np.int64)
+        found = np.flatnonzero(self.active & (self.owner == owner))
+        if len(found) > 1:
+            found = found[np.argsort(self.seq[found], kind="stable")]
+        return found
+
+    def count(self, owner):
+        """Return the number of live projectiles of an owner"""
+        return self._counts.get(owner, 0)
+
+    def step(self, owner, bounds=None):
+        """Advance an owner's projectiles one tick; expired or off-screen ones are released and returned"""
+        if not self._counts.get(owner):
+            return []
+        mask = self.active & (self.owner == owner)
+        self.x[mask] += self.vx[mask]
+        self.y[mask] += self.vy[mask]
+        self.timer[mask] += 1
+        self._grid_slots[owner] = None
+        expired = self.timer >= self.lifetime
+        if bounds is not None:
+            width, height = bounds
+            margin = self.margin
+            expired |= ((self.x < -margin) | (self.x > width + margin)
+                        | (self.y < -margin) | (self.y > height + margin))
+        dead = np.flatnonzero(mask & expired)
+        if len(dead) > 1:
+            dead = dead[np.argsort(self.seq[dead], kind="stable")]
+        handles = [self.handles[i] for i in dead.tolist()]
+        for i in dead.tolist():
+            self.release(i)
+        return handles
+
+    def boxes(self, index):
+        """Return left, top, width and height arrays of the hit boxes at the given slots"""
+        w = self.w[index].astype(np.int64)
+        h = self.h[index].astype(np.int64)
+        x = self.x[index]
+        y = self.y[index]
+        center = self.anchor[index] == ANCHOR_CENTER
+        left = np.where(center, np.trunc(x) - w // 2, np.trunc(x - w / 2)).astype(np.int64)
+        top = np.where(center, np.trunc(y) - h // 2, np.trunc(y - h / 2)).astype(np.int64)
+        return left, top, w, h
+
+    def rect(self, index):
+        """Return the hit box of one slot as a pg.Rect"""
+        left, top, w, h = self.boxes(np.array([index]))
+        return pg.Rect(int(left[0]), int(top[0]), int(w[0]), int(h[0]))
+
+    def hit_boxes(self, owner):
+        """Return (handle, pg.Rect) pairs for an owner's live projectiles in spawn order"""
+        index = self.indices(owner)
+        if len(index) == 0:
+            return []
+        boxes = zip(*(values.tolist() for values in self.boxes(index)))
+        return [(self.handles[i], pg.Rect(box)) for i, box in zip(index.tolist(), boxes)]
+
+    def hit_arrays(self, owner):
+        """Return the slot indices of an owner's live projectiles in spawn order, then their hit-box arrays"""
+        index = self.indices(owner)
+        return (index, *self.boxes(index))
+
+    def moved(self, index):
+        """Note that a slot was changed outside of step so its owner's spatial hash is rebuilt"""
+        self._grid_slots[int(self.owner[index])] = None
+
+    def _grid(self, owner):
+        """Return an owner's spatial hash and the slot of each entry, rebuilding it if projectiles changed"""
+        grid = self._grids.get(owner)
+        if grid is None:
+            grid = self._grids[owner] = SpatialHash(self.cell_size)
+        slots = self._grid_slots.get(owner)
+        if slots is None:
+            slots = self._grid_slots[owner] = self.indices(owner)
+            grid.rebuild(*self.boxes(slots))
+        return grid, slots
+
+    def overlapping(self, owner, rect):
+        """Return the handles of an owner's projectiles whose hit box overlaps the rect, in spawn order"""
+        if not self._counts.get(owner):
+            return []
+        grid, slots = self._grid(owner)
+        return [self.handles[i] for i in slots[grid.query(rect)].tolist()]
+
+    def export_live(self):
+        """Return (SAVED_FIELDS values, handle) pairs of every live projectile in spawn order, e.g. for a save game"""
+        index = np.flatnonzero(self.active)
+        index = index[np.argsort(self.seq[index], kind="stable")]
+        columns = [getattr(self, name)[index].tolist() for name in SAVED_FIELDS]
+        return [(values, self.handles[i]) for i, values in zip(index.tolist(), zip(*columns))]
+
+    def spawn_saved(self, handle, values):
+        """Spawn a handle with SAVED_FIELDS values from export_live and return the slot index"""
+        state = dict(zip(SAVED_FIELDS, values))
+        owner = state.pop("owner")
+        handle._state.update(state)
+        return self.spawn(handle, owner)
+
+    def get_collision_stats(self):
+        """Return the summed spatial hash counters of every owner"""
+        return merge_stats(*(grid.get_stats() for grid in self._grids.values()))
+
+    def snapshot(self):
+        """Return a copy of every projectile's state that restore() can bring back"""
+        arrays = {name: getattr(self, name).copy() for name in _FIELDS}
+        return self.capacity, arrays, list(self.handles), list(self._free), self._next_seq, dict(self._counts)
+
+    def restore(self, snapshot):
+        """Put the pool back to a snapshot; handles spawned since are released, released ones come back"""
+        for i in np.flatnonzero(self.active).tolist():
+            handle = self.handles[i]
+            if handle is not None:
+                for name in _HANDLE_FIELDS:
+                    handle._state[name] = getattr(self, name)[i].item()
+                handle._pool = None
+                handle._index = None
+                handle._live = False
+        capacity, arrays, handles, free, next_seq, counts = snapshot
+        self.capacity = capacity
+        for name, values in arrays.items():
+            setattr(self, name, values.copy())
+        self.handles = list(handles)
+        self._free = list(free)
+        self._next_seq = next_seq
+        self._counts = dict(counts)
+        self._grid_slots = {}
+        for i in np.flatnonzero(self.active).tolist():
+            handle = self.handles[i]
+            handle._pool = self
+            handle._index = i
+            handle._live = True
+
+    def clear(self, owner=None):
+        """Release every projectile, or only those of one owner"""
+        if owner is not None and not self._counts.get(owner):
+            return
+        mask = self.active if owner is None else self.active & (self.owner == owner)
+        for i in np.flatnonzero(mask).tolist():
+            self.release(i)
+
+
+class PooledProjectile:
+    """Base for projectile handles whose state moves into a ProjectilePool once spawned"""
+
+    def __init__(self, x, y, vx, vy, lifetime, w, h, anchor=ANCHOR_BOX, margin=0):
+        self._pool = None
+        self._index = None
+        self._live = True
+        self.entity_id = None
+        self._state = {
+            "x": float(x), "y": float(y), "vx": float(vx), "vy": float(vy),
+            "timer": 0, "lifetime": lifetime, "w": w, "h": h,
+            "anchor": anchor, "margin": margin,
+        }
+
+    def _get(self, name):
+        if self._pool is not None:
+            return getattr(self._pool, name)[self._index].item()
+        return self._state[name]
+
+    def _set(self, name, value):
+        if self._pool is not None:
+            getattr(self._pool, name)[self._index] = value
+            self._pool.moved(self._index)
+        else:
+            self._state[name] = value
+
+    x = property(lambda self: self._get("x"), lambda self, value: self._set("x", value))
+    y = property(lambda self: self._get("y"), lambda self, value: self._set("y", value))
+    vx = property(lambda self: self._get("vx"), lambda self, value: self._set("vx", value))
+    vy = property(lambda self: self._get("vy"), lambda self, value: self._set("vy", value))
+    timer = property(lambda self: self._get("timer"), lambda self, value: self._set("timer", value))
+    lifetime = property(lambda self: self._get("lifetime"), lambda self, value: self._set("lifetime", value))
+
+    def get_save_state(self):
+        """Return the handle's own attributes a save game needs to recreate it; the pool keeps the rest"""
+        return {}
+
+    @property
+    def in_pool(self):
+        return self._pool is not None
+
+    def get_rect(self):
+        """Get the collision rectangle for the projectile"""
+        if self._pool is not None:
+            return self._pool.rect(self._index)
+        s = self._state
+        if s["anchor"] == ANCHOR_CENTER:
+            rect = pg.Rect(0, 0, s["w"], s["h"])
+            rect.center = (int(s["x"]), int(s["y"]))
+            return rect
+        return pg.Rect(s["x"] - s["w"] / 2, s["y"] - s["h"] / 2, s["w"], s["h"])
+
+    def release(self):
+        """Remove the projectile from its pool"""
+        if self._pool is not None:
+            self._pool.release(self._index)
+        self._live = False
+
+
+class ProjectileView:
+    """List- and sprite-group-like view of one owner's live projectiles"""
+
+    def __init__(self, pool, owner):
+        self.pool = pool
+        self.owner = owner
+
+    def sprites(self):
+        handles = self.pool.handles
+        return [handles[i] for i in self.pool.indices(self.owner).tolist()]
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def __len__(self):
+        return self.pool.count(self.owner)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, item):
+        return self.sprites()[item]
+
+    def __contains__(self, handle):
+        return handle._pool is self.pool and self.pool.owner[handle._index] == self.owner
+
+    def append(self, handle):
+        """Spawn a projectile handle into the pool under this view's owner"""
+        if handle._pool is None:
+            self.pool.spawn(handle, self.owner)
+
+    add = append
+
+    def remove(self, handle):
+        handle.release()
+
+    def clear(self):
+        self.pool.clear(self.owner)
+
+    empty = clear
+
+    def step(self, bounds=None):
+        """Advance every projectile in the view; returns the ones that expired this tick"""
+        return self.pool.step(self.owner, bounds)
+
+    def overlapping(self, rect):
+        return self.pool.overlapping(self.owner, rect)
+
+    def hit_boxes(self):
+        return self.pool.hit_boxes(self.owner)
+
+    def hit_arrays(self):
+        return self.pool.hit_arrays(self.owner)
+
+    def draw(self, screen):
+        """Draw every projectile in the view and return the drawn areas"""
+        rects = []
+        for handle in self.sprites():
+            rect = handle.draw(screen)
+            if rect is not None:
+                rects.append(rect)
+        return rects
+
@@ -0,0 +1,317 @@
+import sys
+import json
+import time
+import base64
+import struct
+import hashlib
+import zlib
+from src.input_state import InputState, ACTION_BITS
+from src.async_writer import write_atomic
+from src.state_hash import PRESENTATION_KEYS, StateHashLog
+
+# Input recordings and headless replay.
+# Usage:
+#   recorder = InputRecorder(game_manager, seed)   # right after GameManager(config, seed=seed)
+#   recorder.tick(inputs)                          # before each game_manager.update(), with its InputState
+#   recorder.shoot()                               # SPACE pressed between ticks
+#   recorder.event("restart")                      # anything else that changed the world between ticks
+#   recorder.save("run.trrp", game_manager)        # at exit, with a digest of the end state
+#   replay = Replay(Recording.read("run.trrp"))
+#   replay.run(); replay.verify()                  # re-run unthrottled and compare the end state
+#   replay.seek(3600)                              # jump to a tick from the nearest keyframe
+# main.py --record run.trrp records a game; from the repo root, python -m src.replay run.trrp
+# replays one.
+#
+# A recording holds one byte per simulation tick (the ACTION_BITS of the keys held, plus
+# whether SPACE was pressed since the previous tick), the events that changed the world
+# between ticks (entering the game, restarts, enemy randomization with its seed, loading
+# a save, which is embedded) and what a fresh game needs to start out the same: the seed
+# of the item layout and the level's enemies. A replay runs the ticks headless and
+# unthrottled and keeps a GameManager snapshot every keyframe_every ticks, so seeking
+# only re-simulates from the nearest keyframe before the target.
+
+MAGIC = b"TRRP"
+FORMAT_VERSION = 1
+
+# magic, version, flags, length of the compressed metadata JSON, length of the compressed input stream
+HEADER = struct.Struct("<4sHHII")
+
+KEYFRAME_EVERY = 600
+SHOOT_BIT = ACTION_BITS["shoot"]
+
+
+def level_enemies(rooms_config):
+    """Return the level's enemy layout as [room_id, enemies] pairs"""
+    return [[room["room_id"], [dict(enemy) for enemy in room.get("enemies", [])]]
+            for room in rooms_config.get("rooms", [])]
+
+
+def state_digest(game):
+    """Hash the simulation state of a game, leaving out what only affects drawing"""
+    world = game.capture_world()
+    world["game_state"] = {key: value for key, value in world["game_state"].items()
+                           if key not in PRESENTATION_KEYS}
+    enemies = game.enemy_manager.export_rooms()
+    items = game.item_manager.export_rooms()
+    # Rooms not entered yet can only have been built ahead by the prefetcher, which runs on a time budget.
+    rooms = [[room_id, enemies.get(room_id), items.get(room_id)] for room_id in sorted(set(game.explored_rooms))]
+    pool = game.projectile_pool
+    projectiles = [getattr(pool, name)[pool.active].tolist() for name in ("x", "y", "vx", "vy", "timer")]
+    data = json.dumps([world, rooms, projectiles], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def apply_event(game, kind, data):
+    """Make a recorded world change the way main.py does"""
+    if kind == "shoot":
+        game.player.shoot()
+    elif kind == "start":
+        game.enemy_manager.activate_room(game.player.current_room)
+    elif kind == "restart":
+        game.restart_game(remove_item_state=False)
+    elif kind == "randomize":
+        game.randomize_enemies(data["counts"], data["seed"], write_config=False)
+    elif kind == "load":
+        if not game.load_game(data=base64.b64decode(data["save"])):
+            raise ValueError("the recorded save game could not be loaded")
+    else:
+        raise ValueError(f"unknown recording event {kind!r}")
+
+
+class Recording:
+    """A recorded game: its seed, starting enemy layout, per-tick input masks and events"""
+
+    def __init__(self, seed, room_count, enemies, inputs, events, digest=None, end=None):
+        self.seed = seed
+        self.room_count = room_count
+        self.enemies = enemies
+        self.inputs = bytes(inputs)
+        self.events = events
+        self.digest = digest
+        self.end = end or {}
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def to_bytes(self):
+        meta = {
+            "seed": self.seed,
+            "room_count": self.room_count,
+            "enemies": self.enemies,
+            "events": self.events,
+            "digest": self.digest,
+            "end": self.end,
+        }
+        meta_bytes = zlib.compress(json.dumps(meta, separators=(",", ":")).encode("utf-8"), 6)
+        input_bytes = zlib.compress(self.inputs, 9)
+        return b"".join([HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta_bytes), len(input_bytes)),
+                         meta_bytes, input_bytes])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError("recording is truncated")
+        magic, version, _, meta_length, input_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not an input recording")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported recording format version {version}")
+        start = HEADER.size
+        if start + meta_length + input_length > len(data):
+            raise ValueError("recording is truncated")
+        meta = json.loads(zlib.decompress(data[start:start + meta_length]))
+        inputs = zlib.decompress(data[start + meta_length:start + meta_length + input_length])
+        return cls(meta["seed"], meta["room_count"], meta["enemies"], inputs, meta["events"],
+                   meta.get("digest"), meta.get("end"))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class InputRecorder:
+    """Collects the input of a game as it is played; see the module comment for where to call it"""
+
+    def __init__(self, game, seed):
+        self.seed = seed
+        self.room_count = len(game.room_registry)
+        self.enemies = level_enemies(game.rooms_config)
+        self.inputs = bytearray()
+        self.events = []
+        self._shoot = False
+
+    def tick(self, inputs):
+        """Record the input of the tick about to run"""
+        mask = inputs.to_mask()
+        if self._shoot:
+            mask |= SHOOT_BIT
+            self._shoot = False
+        self.inputs.append(mask)
+
+    def shoot(self):
+        """Note that the player shot; it is kept with the next tick, right before which it took effect"""
+        self._shoot = True
+
+    def event(self, kind, **data):
+        """Record a world change between ticks; see apply_event for the kinds"""
+        self._flush_shoot()
+        self.events.append([len(self.inputs), kind, data])
+
+    def load(self, path):
+        """Record loading the save game at path, embedding the save"""
+        with open(path, "rb") as f:
+            self.event("load", save=base64.b64encode(f.read()).decode("ascii"))
+
+    def _flush_shoot(self):
+        # A shot followed by a world change before the next tick went off in the world before it.
+        if self._shoot:
+            self._shoot = False
+            self.events.append([len(self.inputs), "shoot", {}])
+
+    def recording(self, game):
+        """Return the recording so far, ending in the current state of game"""
+        self._flush_shoot()
+        end = {"tick": game.tick, "room": game.player.current_room,
+               "health": game.player.health_system.current_health}
+        return Recording(self.seed, self.room_count, self.enemies, self.inputs,
+                         [list(event) for event in self.events], state_digest(game), end)
+
+    def save(self, path, game):
+        """Write the recording to path and return its size in bytes"""
+        data = self.recording(game).to_bytes()
+        write_atomic(path, data)
+        return len(data)
+
+
+class Replay:
+    """Re-runs a recording in a headless game as fast as it goes, with keyframes for seeking"""
+
+    def __init__(self, recording, config=None, keyframe_every=None):
+        from src.headless import load_config
+        self.recording = recording
+        self.config = config if config is not None else load_config()
+        if keyframe_every is None:
+            keyframe_every = self.config.get("replay", {}).get("keyframe_every", KEYFRAME_EVERY)
+        self.keyframe_every = max(1, int(keyframe_every))
+        # Every mask decodes to one of 32 input states, shared by all ticks.
+        self._inputs = [InputState.from_mask(mask) for mask in range(2 * SHOOT_BIT)]
+        self.game = None
+        self.reset()
+
+    def reset(self):
+        """Start over in a fresh game set up like the recorded one"""
+        from src.headless import create_headless_game
+        if self.game is not None:
+            self.game.writer.close()
+        game = create_headless_game(self.config, seed=self.recording.seed)
+        if len(game.room_registry) != self.recording.room_count:
+            raise ValueError("the recording was made for a different level")
+        enemies = {room_id: room_enemies for room_id, room_enemies in self.recording.enemies}
+        for room in game.rooms_config.get("rooms", []):
+            room["enemies"] = [dict(enemy) for enemy in enemies.get(room["room_id"], [])]
+        game.enemy_manager.reset_all_enemies()
+        game.enemy_manager.activate_room(game.player.current_room)
+        game.new_world_epoch()
+        self.game = game
+        self.position = 0
+        self._next_event = 0
+        # position -> (index of the next event, snapshot taken before that position's events)
+        self.keyframes = {}
+
+    def _apply_events(self, position):
+        events = self.recording.events
+        while self._next_event < len(events) and events[self._next_event][0] <= position:
+            _, kind, data = events[self._next_event]
+            apply_event(self.game, kind, data)
+            self._next_event += 1
+
+    def _advance(self, target):
+        game = self.game
+        masks = self.recording.inputs
+        inputs = self._inputs
+        keyframe_every = self.keyframe_every
+        target = min(target, len(masks))
+        while self.position < target:
+            position = self.position
+            if position % keyframe_every == 0 and position not in self.keyframes:
+                self.keyframes[position] = (self._next_event, game.snapshot())
+            self._apply_events(position)
+            state = inputs[masks[position]]
+            if state.shoot:
+                game.player.shoot()
+            game.update(state)
+            game.update_chest_and_exit()
+            game.run_prefetch()
+            self.position = position + 1
+
+    def seek(self, position):
+        """Bring the game to the start of a recorded tick, i.e. after that many ticks"""
+        position = max(0, min(position, len(self.recording)))
+        if position < self.position:
+            # Snapshots cannot be restored across a restart or load, so only the current epoch's keyframes are usable.
+            epoch = self.game.world_epoch
+            usable = [start for start, (_, snapshot) in self.keyframes.items()
+                      if start <= position and snapshot.epoch == epoch]
+            if usable:
+                start = max(usable)
+                self._next_event, snapshot = self.keyframes[start]
+                self.game.restore(snapshot)
+                self.position = start
+            else:
+                self.reset()
+        self._advance(position)
+
+    def run(self):
+        """Play the rest of the recording, including its trailing events; returns the seconds it took"""
+        start = time.perf_counter()
+        self._advance(len(self.recording))
+        self._apply_events(self.position)
+        return time.perf_counter() - start
+
+    def verify(self):
+        """Return True if the game ended up in the recorded end state; call after run()"""
+        return self.recording.digest is not None and state_digest(self.game) == self.recording.digest
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay an input recording headless as fast as possible")
+    parser.add_argument("recording")
+    parser.add_argument("--keyframe-every", type=int, default=None, help="ticks between seek keyframes")
+    parser.add_argument("--seek", type=int, nargs="*", default=[],
+                        help="after the run, seek to these ticks and report how long each took")
+    parser.add_argument("--hash-log", default=None, metavar="PATH",
+                        help="write every tick's state hashes to PATH, for python -m src.state_hash")
+    args = parser.parse_args(argv)
+
+    from src.headless import init_headless_pygame
+    init_headless_pygame()
+    recording = Recording.read(args.recording)
+    replay = Replay(recording, keyframe_every=args.keyframe_every)
+    if args.hash_log:
+        replay.game.hash_log = StateHashLog()
+    elapsed = replay.run()
+    if args.hash_log:
+        replay.game.hash_log.save(args.hash_log)
+    ticks = len(recording)
+    print(f"{ticks} ticks in {elapsed:.3f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s), "
+          f"{len(recording.events)} events, {len(replay.keyframes)} keyframes")
+    verified = replay.verify()
+    if verified:
+        print("end state matches the recording")
+    else:
+        end = recording.end
+        print(f"end state differs from the recording: room {replay.game.player.current_room} "
+              f"(recorded {end.get('room')}), health {replay.game.player.health_system.current_health} "
+              f"(recorded {end.get('health')}), tick {replay.game.tick} (recorded {end.get('tick')})")
+    for position in args.seek:
+        start = time.perf_counter()
+        replay.seek(position)
+        print(f"seek to tick {replay.position}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    replay.game.writer.close()
+    return 0 if verified else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
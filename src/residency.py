@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+# Least-recently-used bookkeeping for rooms whose entities are materialized.
+# Usage:
+#   residency = RoomResidency(max_entities=2048)
+#   residency.touch(room_id, len(group))            # when a room is built or visited again
+#   for victim in residency.victims(keep=(room_id,)):
+#       ...turn the victim's sprites back into records...
+#
+# The cap counts entities (sprites, items) rather than rooms, so a few huge rooms
+# and many tiny ones are bounded alike. The room being played is passed in keep and
+# is never evicted, even when it alone exceeds the cap.
+
+
+class RoomResidency:
+    """Resident rooms in least-recently-used order, with their entity counts"""
+
+    def __init__(self, max_entities=None):
+        self.max_entities = max_entities
+        self.evictions = 0
+        self.clear()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def clear(self):
+        self._rooms = OrderedDict()
+        self.total = 0
+
+    def touch(self, room_id, entities):
+        """Mark a room as just used and record how many entities it holds"""
+        self.total += entities - self._rooms.get(room_id, 0)
+        self._rooms[room_id] = entities
+        self._rooms.move_to_end(room_id)
+
+    def discard(self, room_id):
+        self.total -= self._rooms.pop(room_id, 0)
+
+    def over_cap(self):
+        return self.max_entities is not None and self.total > self.max_entities
+
+    def victims(self, keep=()):
+        """Remove and return the least recently used rooms until the entity total fits the cap"""
+        if not self.over_cap():
+            return []
+        evicted = []
+        for room_id in list(self._rooms):
+            if self.total <= self.max_entities:
+                break
+            if room_id in keep:
+                continue
+            self.discard(room_id)
+            evicted.append(room_id)
+        self.evictions += len(evicted)
+        return evicted
+
+    def get_stats(self):
+        return {"rooms": len(self._rooms), "entities": self.total, "evictions": self.evictions}
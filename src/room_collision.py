@@ -0,0 +1,173 @@
+import pygame as pg
+from src.residency import RoomResidency
+
+# Compiled wall collision for rooms.
+# Usage:
+#   cache = RoomCollisionCache()
+#   room = cache.get(room_data)
+#   room.rect_blocked(player_rect, center=(player.x, player.y))   # walls a gap lets the player through are skipped
+#   room.rect_blocked(item_rect)                                  # every wall counts
+#
+# Each room's walls are rasterized once into pg.mask.Mask objects, so a query is a
+# single mask overlap instead of building a rect per wall and scanning the gaps.
+# Walls that sit on a gap's edge are only passable while the query center lies in
+# that gap's band; their masks are precomputed per combination of open gaps on
+# first use. With max_resident_masks the cache drops the least recently used rooms
+# once their masks add up to more than the cap; the rooms returned by keep() (the
+# room in play and the neighbors being prefetched) are never dropped.
+
+
+def _wall_gap_directions(wall, gaps):
+    """Return the gap directions that can make a wall passable, like the old per-wall gap scan"""
+    x, y, w, h = wall
+    directions = []
+    for gap_dir, gap_info in gaps.items():
+        if gap_dir == "right" and x == gap_info[0]:
+            directions.append(gap_dir)
+        elif gap_dir == "left" and x + w == gap_info[0]:
+            directions.append(gap_dir)
+        elif gap_dir == "top" and y + h == gap_info[2]:
+            directions.append(gap_dir)
+        elif gap_dir == "bottom" and y == gap_info[2]:
+            directions.append(gap_dir)
+    return frozenset(directions)
+
+
+class CompiledRoom:
+    """Wall masks of one room with gaps resolved per set of open gap bands"""
+
+    def __init__(self, room_data, screen_size=(800, 600)):
+        self.room_id = room_data.get("room_id")
+        self.gaps = dict(room_data.get("gaps", {}))
+        walls = [tuple(int(v) for v in wall[:4]) for wall in room_data.get("walls", [])]
+        walls = [wall for wall in walls if wall[2] > 0 and wall[3] > 0]
+
+        # The mask spans the screen and every wall, so queries off screen stay exact.
+        left = min([0] + [w[0] for w in walls])
+        top = min([0] + [w[1] for w in walls])
+        right = max([screen_size[0]] + [w[0] + w[2] for w in walls])
+        bottom = max([screen_size[1]] + [w[1] + w[3] for w in walls])
+        self.origin = (left, top)
+        self.size = (right - left, bottom - top)
+
+        self._gated = {}
+        solid = []
+        for wall in walls:
+            directions = _wall_gap_directions(wall, self.gaps)
+            if directions:
+                self._gated.setdefault(directions, []).append(wall)
+            else:
+                solid.append(wall)
+        self.solid = self._rasterize(solid)
+        self._gate_dirs = frozenset(d for dirs in self._gated for d in dirs)
+        self._masks = {}
+        self._probes = {}
+
+    def _rasterize(self, walls, base=None):
+        mask = base.copy() if base is not None else pg.mask.Mask(self.size)
+        ox, oy = self.origin
+        for x, y, w, h in walls:
+            mask.draw(pg.mask.Mask((w, h), fill=True), (x - ox, y - oy))
+        return mask
+
+    def open_gaps(self, center):
+        """Return the gap directions whose band contains the center point"""
+        cx, cy = center
+        open_dirs = []
+        for gap_dir, gap_info in self.gaps.items():
+            if gap_dir in ("left", "right"):
+                if gap_info[1] <= cy <= gap_info[2]:
+                    open_dirs.append(gap_dir)
+            elif gap_info[0] <= cx <= gap_info[1]:
+                open_dirs.append(gap_dir)
+        return frozenset(open_dirs)
+
+    def mask_for(self, open_dirs=frozenset()):
+        """Return the wall mask with the gap walls of the given open directions removed"""
+        if not self._gated:
+            return self.solid
+        key = self._gate_dirs.intersection(open_dirs)
+        mask = self._masks.get(key)
+        if mask is None:
+            closed = [wall for dirs, walls in self._gated.items() if not (dirs & key) for wall in walls]
+            mask = self._masks[key] = self._rasterize(closed, self.solid) if closed else self.solid
+        return mask
+
+    def mask_count(self):
+        """Return how many masks the room holds, the solid one included"""
+        return 1 + sum(mask is not self.solid for mask in self._masks.values())
+
+    def warm(self):
+        """Build the masks for no open gap and for each single open gap ahead of use"""
+        self.mask_for()
+        for direction in self._gate_dirs:
+            self.mask_for(frozenset((direction,)))
+        return self
+
+    def rect_blocked(self, rect, center=None):
+        """Return True if the rect overlaps a wall; with a center, gap walls whose band holds it are passable"""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        mask = self.mask_for(self.open_gaps(center)) if center is not None else self.mask_for()
+        probe = self._probes.get(rect.size)
+        if probe is None:
+            probe = self._probes[rect.size] = pg.mask.Mask(rect.size, fill=True)
+        return mask.overlap(probe, (rect.x - self.origin[0], rect.y - self.origin[1])) is not None
+
+    def point_blocked(self, x, y, center=None):
+        """Return True if the pixel at (x, y) is a wall"""
+        mask = self.mask_for(self.open_gaps(center)) if center is not None else self.mask_for()
+        mx, my = int(x) - self.origin[0], int(y) - self.origin[1]
+        if not (0 <= mx < self.size[0] and 0 <= my < self.size[1]):
+            return False
+        return bool(mask.get_at((mx, my)))
+
+
+class RoomCollisionCache:
+    """Compiles rooms on first use and recompiles a room only when its walls or gaps are replaced"""
+
+    def __init__(self, screen_size=(800, 600), max_resident_masks=None, keep=None):
+        self.screen_size = screen_size
+        self._rooms = {}
+        self.compiles = 0
+        self.residency = RoomResidency(max_resident_masks)
+        self.keep = keep
+
+    def get(self, room_data):
+        """Return the CompiledRoom for a room config entry"""
+        room_id = room_data.get("room_id")
+        walls, gaps = room_data.get("walls"), room_data.get("gaps")
+        entry = self._rooms.get(room_id)
+        if entry is None or entry[1] is not walls or entry[2] is not gaps:
+            entry = self._rooms[room_id] = (CompiledRoom(room_data, self.screen_size), walls, gaps)
+            self.compiles += 1
+        self._touch(room_id, entry[0])
+        return entry[0]
+
+    def warm(self, room_data):
+        """Compile a room and its single open gap masks ahead of a visit"""
+        room = self.get(room_data).warm()
+        self._touch(room.room_id, room)
+        return room
+
+    def _touch(self, room_id, room):
+        self.residency.touch(room_id, room.mask_count())
+        if self.residency.over_cap():
+            keep = (room_id, *self.keep()) if self.keep is not None else (room_id,)
+            for victim in self.residency.victims(keep=keep):
+                self._rooms.pop(victim, None)
+
+    def invalidate(self, room_id=None):
+        """Forget one compiled room, or all of them, e.g. after editing walls in place"""
+        if room_id is None:
+            self._rooms.clear()
+            self.residency.clear()
+        else:
+            self._rooms.pop(room_id, None)
+            self.residency.discard(room_id)
+
+    def get_residency_stats(self):
+        """Get how many rooms are compiled, how many masks they hold and how many rooms were dropped"""
+        stats = self.residency.get_stats()
+        stats["compiles"] = self.compiles
+        return stats
@@ -0,0 +1,188 @@
+import os
+import json
+import hashlib
+from collections import deque
+import numpy as np
+from src.room_registry import RoomRegistry, DIRECTIONS, NO_ROOM
+
+# Whole-level room graph analysis, computed once per level and cached on disk.
+# Usage:
+#   graph = load_room_graph(rooms_config, start_room=1, exit_rooms=[20], cache_dir="config/cache")
+#   graph.distance_to_treasure(room_id)   # hops, or None if the treasure cannot be reached
+#   graph.distance_to_exit(room_id)
+#   graph.unreachable                     # room ids the start room cannot reach
+#   graph.grid_pos(room_id)               # (column, row) relative to the start room
+#
+# Distances come from multi-source BFS over the reversed door graph, so every room's
+# hop count to the nearest target is a table lookup. The layout places rooms on a
+# global grid by walking doors from the start room, one cell per door.
+
+GRAPH_CACHE_VERSION = 1
+UNREACHABLE = -1
+
+# Grid step for a door in each direction, matching how the minimap lays rooms out.
+DIRECTION_STEPS = {"left": (-1, 0), "right": (1, 0), "top": (0, -1), "bottom": (0, 1)}
+
+
+def room_flags(rooms):
+    """Return (room_id, has chests, is exit) for every room; a compiled level answers from its index"""
+    compiled = getattr(rooms, "room_flags", None)
+    if compiled is not None:
+        return compiled()
+    return [(r["room_id"], bool(r.get("chests")), bool(r.get("is_exit"))) for r in rooms]
+
+
+def config_hash(rooms_config, start_room, exit_rooms):
+    """Hash the parts of a level that the graph depends on: rooms, doors, chests, exits and start"""
+    topology = {
+        "version": GRAPH_CACHE_VERSION,
+        "rooms": [list(flags) for flags in room_flags(rooms_config.get("rooms", []))],
+        "neighbors": rooms_config.get("room_neighbors", {}),
+        "start": start_room,
+        "exits": sorted(exit_rooms),
+    }
+    encoded = json.dumps(topology, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _bfs(adjacency, sources):
+    """Return hop counts from the nearest source slot along adjacency rows (UNREACHABLE where none)"""
+    dist = np.full(len(adjacency), UNREACHABLE, dtype=np.int32)
+    queue = deque()
+    for slot in sources:
+        if dist[slot] == UNREACHABLE:
+            dist[slot] = 0
+            queue.append(slot)
+    while queue:
+        slot = queue.popleft()
+        next_dist = dist[slot] + 1
+        for target in adjacency[slot]:
+            if dist[target] == UNREACHABLE:
+                dist[target] = next_dist
+                queue.append(target)
+    return dist
+
+
+class RoomGraph:
+    """Precomputed distances, reachability and grid layout of a level's rooms"""
+
+    def __init__(self, ids, dist_treasure, dist_exit, reachable, layout, conflicts, key=None):
+        self.ids = list(ids)
+        self.slots = {room_id: slot for slot, room_id in enumerate(self.ids)}
+        self.dist_treasure = dist_treasure
+        self.dist_exit = dist_exit
+        self.reachable = reachable
+        self.layout = layout
+        self.layout_conflicts = list(conflicts)
+        self.key = key
+
+    @classmethod
+    def build(cls, rooms_config, start_room, exit_rooms, registry=None, key=None):
+        """Analyze a level with BFS over its door graph"""
+        registry = registry or RoomRegistry(rooms_config)
+        count = len(registry)
+        forward = [[t for t in row if t != NO_ROOM] for row in registry.adjacency.tolist()]
+        reverse = [[] for _ in range(count)]
+        for slot, targets in enumerate(forward):
+            for target in targets:
+                reverse[target].append(slot)
+
+        treasure = [registry.slot(room_id) for room_id, chests, _ in room_flags(registry.records) if chests]
+        exits = [registry.slot(room_id) for room_id in exit_rooms if room_id in registry]
+        dist_treasure = _bfs(reverse, treasure)
+        dist_exit = _bfs(reverse, exits)
+
+        start = registry.slots.get(start_room)
+        reachable = _bfs(forward, [start] if start is not None else []) != UNREACHABLE
+
+        # Lay rooms out on a grid, first come first served, and remember doors that disagree with it.
+        layout = np.zeros((count, 2), dtype=np.int32)
+        placed = np.zeros(count, dtype=bool)
+        conflicts = []
+        if start is not None:
+            placed[start] = True
+            queue = deque([start])
+            rows = registry.adjacency.tolist()
+            while queue:
+                slot = queue.popleft()
+                x, y = layout[slot].tolist()
+                for d, target in enumerate(rows[slot]):
+                    if target == NO_ROOM:
+                        continue
+                    dx, dy = DIRECTION_STEPS[DIRECTIONS[d]]
+                    if not placed[target]:
+                        placed[target] = True
+                        layout[target] = (x + dx, y + dy)
+                        queue.append(target)
+                    elif tuple(layout[target].tolist()) != (x + dx, y + dy):
+                        conflicts.append((registry.ids[slot], DIRECTIONS[d], registry.ids[target]))
+        return cls(registry.ids, dist_treasure, dist_exit, reachable, layout, conflicts, key)
+
+    def save(self, path):
+        """Write the analysis to an .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path, ids=np.array(self.ids), dist_treasure=self.dist_treasure, dist_exit=self.dist_exit,
+            reachable=self.reachable, layout=self.layout,
+            conflicts=np.array(json.dumps(self.layout_conflicts)), key=np.array(self.key or ""))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an analysis written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["ids"].tolist(), data["dist_treasure"], data["dist_exit"], data["reachable"],
+                       data["layout"], [tuple(c) for c in json.loads(str(data["conflicts"]))],
+                       str(data["key"]) or None)
+
+    def _lookup(self, table, room_id):
+        slot = self.slots.get(room_id)
+        if slot is None or table[slot] == UNREACHABLE:
+            return None
+        return int(table[slot])
+
+    def distance_to_treasure(self, room_id):
+        """Return the number of doors between a room and the nearest treasure room, or None"""
+        return self._lookup(self.dist_treasure, room_id)
+
+    def distance_to_exit(self, room_id):
+        """Return the number of doors between a room and the exit, or None"""
+        return self._lookup(self.dist_exit, room_id)
+
+    def is_reachable(self, room_id):
+        slot = self.slots.get(room_id)
+        return slot is not None and bool(self.reachable[slot])
+
+    @property
+    def unreachable(self):
+        """Room ids that cannot be reached from the start room"""
+        return [self.ids[slot] for slot in np.flatnonzero(~self.reachable).tolist()]
+
+    def grid_pos(self, room_id):
+        """Return a reachable room's (column, row) on the global grid, the start room being (0, 0)"""
+        slot = self.slots.get(room_id)
+        if slot is None or not self.reachable[slot]:
+            return None
+        x, y = self.layout[slot].tolist()
+        return x, y
+
+
+def load_room_graph(rooms_config, start_room, exit_rooms, cache_dir=None, registry=None):
+    """Return the RoomGraph of a level, reusing the on-disk analysis when the config hash matches"""
+    key = config_hash(rooms_config, start_room, exit_rooms)
+    path = os.path.join(cache_dir, f"room_graph_{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            graph = RoomGraph.load(path)
+            if graph.key == key:
+                return graph
+        except Exception as e:
+            print(f"Warning: ignoring unreadable room graph cache {path}: {e}")
+    graph = RoomGraph.build(rooms_config, start_room, exit_rooms, registry=registry, key=key)
+    if path:
+        try:
+            graph.save(path)
+        except Exception as e:
+            print(f"Warning: failed to cache room graph: {e}")
+    return graph
@@ -0,0 +1,157 @@
+import time
+from collections import deque
+
+# Prepares neighbor rooms before the player walks into them.
+# Usage:
+#   prefetcher = RoomPrefetcher(distance=120, budget_ms=4)
+#   prefetcher.add_preparer("enemies", enemy_manager.prepare_room)   # fn(room_id, room_data)
+#   prefetcher.update(room_id, room_data, x, y, radius, registry.neighbor)   # every tick: queue rooms behind nearby gaps
+#   prefetcher.run()                                                 # in spare frame time: work through the queue
+#   prefetcher.record_switch(target_room_id, seconds)                # when the switch happens
+#
+# Each preparer builds one kind of per-room data (enemy sprites, compiled walls, the
+# static background layer) and must be cheap when the room is already prepared. Work
+# is queued as one task per room and preparer, and run() stops once its time budget
+# is spent, so a frame never pays for a whole room at once.
+
+
+def gaps_within(room_data, x, y, radius, distance):
+    """Return the gap directions the circle at (x, y) is within distance pixels of"""
+    near = []
+    for gap_dir, gap_info in room_data.get("gaps", {}).items():
+        if gap_dir in ("left", "right"):
+            gap_x, gap_y_min, gap_y_max = gap_info
+            if not gap_y_min - distance <= y <= gap_y_max + distance:
+                continue
+            gap = x - radius - gap_x if gap_dir == "left" else gap_x - x - radius
+        else:
+            gap_x_min, gap_x_max, gap_y = gap_info
+            if not gap_x_min - distance <= x <= gap_x_max + distance:
+                continue
+            gap = y - radius - gap_y if gap_dir == "top" else gap_y - y - radius
+        if gap <= distance:
+            near.append(gap_dir)
+    return near
+
+
+class RoomPrefetcher:
+    """Queues the rooms behind gaps the player approaches and prepares them within a per-frame budget"""
+
+    def __init__(self, distance=120, budget_ms=4.0, enabled=True):
+        self.distance = distance
+        self.budget = budget_ms / 1000.0
+        self.enabled = enabled
+        self._preparers = []
+        self._queue = deque()
+        self._pending = {}
+        self._ready = set()
+        self.tasks_run = 0
+        self.prepare_time = 0.0
+        self.switches = 0
+        self.prefetched_switches = 0
+        self.switch_time = 0.0
+        self.max_switch_time = 0.0
+
+    def add_preparer(self, name, prepare):
+        """Register prepare(room_id, room_data) to be run for every prefetched room"""
+        self._preparers.append((name, prepare))
+
+    def update(self, room_id, room_data, x, y, radius, neighbor):
+        """Queue the neighbors behind the gaps of the current room that the player is close to"""
+        if not self.enabled or not self._preparers:
+            return
+        for gap_dir in gaps_within(room_data, x, y, radius, self.distance):
+            target = neighbor(room_id, gap_dir)
+            if target is not None:
+                self.request(target)
+
+    def request(self, room_id):
+        """Queue a room for preparation unless it is ready or already queued"""
+        if room_id in self._ready or room_id in self._pending:
+            return
+        self._pending[room_id] = len(self._preparers)
+        for _, prepare in self._preparers:
+            self._queue.append((room_id, prepare))
+
+    def is_ready(self, room_id):
+        return room_id in self._ready
+
+    def prefetched_rooms(self):
+        """Return the rooms prepared or queued for the room in play"""
+        return self._ready.union(self._pending)
+
+    def run(self, budget=None, room_data=None):
+        """Run queued tasks until the budget in seconds is spent; room_data(room_id) supplies room records"""
+        if not self._queue:
+            return 0
+        start = time.perf_counter()
+        deadline = start + (self.budget if budget is None else budget)
+        done = 0
+        while self._queue:
+            room_id, prepare = self._queue.popleft()
+            try:
+                prepare(room_id, room_data(room_id) if room_data else None)
+            except Exception as e:
+                print(f"RoomPrefetcher: failed to prepare room {room_id}: {e}")
+            done += 1
+            self._pending[room_id] -= 1
+            if self._pending[room_id] == 0:
+                del self._pending[room_id]
+                self._ready.add(room_id)
+            if time.perf_counter() >= deadline:
+                break
+        self.tasks_run += done
+        self.prepare_time += time.perf_counter() - start
+        return done
+
+    def record_switch(self, room_id, seconds):
+        """Record the cost of a room switch; what was prepared for the old room's neighbors is let go"""
+        self.switches += 1
+        if room_id in self._ready:
+            self.prefetched_switches += 1
+        self.switch_time += seconds
+        self.max_switch_time = max(self.max_switch_time, seconds)
+        self.reset()
+
+    def reset(self):
+        """Forget queued work and which rooms are ready, e.g. after a switch or a restart"""
+        self._queue = deque()
+        self._pending = {}
+        self._ready = set()
+
+    def get_stats(self):
+        """Return switch counts and costs in milliseconds"""
+        return {
+            "switches": self.switches,
+            "prefetched": self.prefetched_switches,
+            "avg_switch_ms": 1000.0 * self.switch_time / max(self.switches, 1),
+            "max_switch_ms": 1000.0 * self.max_switch_time,
+            "tasks": self.tasks_run,
+            "prepare_ms": 1000.0 * self.prepare_time,
+        }
+
+
+class SwitchSpikeMeter:
+    """Compares the duration of frames that contained a room switch with the other frames"""
+
+    def __init__(self):
+        self.switch_frames = []
+        self.other_time = 0.0
+        self.other_frames = 0
+
+    def add(self, seconds, switched):
+        if switched:
+            self.switch_frames.append(seconds)
+        else:
+            self.other_time += seconds
+            self.other_frames += 1
+
+    def report(self):
+        """Return a one-line summary, or None if no switch happened"""
+        if not self.switch_frames:
+            return None
+        avg = 1000.0 * sum(self.switch_frames) / len(self.switch_frames)
+        peak = 1000.0 * max(self.switch_frames)
+        base = 1000.0 * self.other_time / max(self.other_frames, 1)
+        return (f"Room switch frames: {avg:.2f} ms avg, {peak:.2f} ms max over {len(self.switch_frames)} "
+                f"switches (other frames {base:.2f} ms avg)")
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Compiled lookup tables for the rooms of a level.
+# Usage:
+#   registry = RoomRegistry(rooms_config)
+#   room_data = registry.room(room_id)            # O(1), no scan over rooms_config["rooms"]
+#   target = registry.neighbor(room_id, "left")   # O(1), None when there is no door
+#
+# Rooms get dense slots 0..N-1 in config order. Room records are held in a list indexed
+# by slot, and neighbors in an (N, 4) int32 table of slots, so lookups cost the same
+# whether the level has twenty rooms or tens of thousands.
+
+DIRECTIONS = ("left", "right", "top", "bottom")
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+NO_ROOM = -1
+
+
+class RoomRegistry:
+    """Dense index over rooms_config: room records by slot and an integer adjacency table"""
+
+    def __init__(self, rooms_config):
+        rooms = rooms_config.get("rooms", [])
+        # A compiled level (LazyRooms) knows its ids up front; keep it as is so rooms decode on first lookup.
+        ids = getattr(rooms, "room_ids", None)
+        self.records = rooms if ids is not None else list(rooms)
+        self.ids = list(ids) if ids is not None else [room["room_id"] for room in self.records]
+        self.slots = {room_id: slot for slot, room_id in enumerate(self.ids)}
+        self.adjacency = np.full((len(self.records), len(DIRECTIONS)), NO_ROOM, dtype=np.int32)
+        for room_key, links in rooms_config.get("room_neighbors", {}).items():
+            slot = self.slots.get(self._parse_id(room_key))
+            if slot is None:
+                print(f"RoomRegistry: neighbors listed for unknown room {room_key}, skipping")
+                continue
+            for direction, neighbor_id in links.items():
+                neighbor_slot = self.slots.get(neighbor_id)
+                if direction not in DIRECTION_INDEX or neighbor_slot is None:
+                    print(f"RoomRegistry: room {room_key} has an invalid {direction} neighbor {neighbor_id}, skipping")
+                    continue
+                self.adjacency[slot, DIRECTION_INDEX[direction]] = neighbor_slot
+
+    @staticmethod
+    def _parse_id(room_key):
+        # room_neighbors is keyed by strings in the JSON config
+        try:
+            return int(room_key)
+        except (TypeError, ValueError):
+            return room_key
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, room_id):
+        return room_id in self.slots
+
+    def slot(self, room_id):
+        """Return the dense slot of a room id, raising KeyError for unknown rooms"""
+        return self.slots[room_id]
+
+    def room(self, room_id):
+        """Return the config record of a room, raising KeyError for unknown rooms"""
+        return self.records[self.slots[room_id]]
+
+    def get(self, room_id, default=None):
+        """Return the config record of a room, or default for unknown rooms"""
+        slot = self.slots.get(room_id)
+        return default if slot is None else self.records[slot]
+
+    def neighbor(self, room_id, direction):
+        """Return the id of the room through a door, or None"""
+        slot = self.slots.get(room_id)
+        d = DIRECTION_INDEX.get(direction)
+        if slot is None or d is None:
+            return None
+        target = int(self.adjacency[slot, d])
+        return None if target == NO_ROOM else self.ids[target]
+
+    def neighbors(self, room_id):
+        """Return {direction: room id} for every door of a room"""
+        slot = self.slots.get(room_id)
+        if slot is None:
+            return {}
+        row = self.adjacency[slot].tolist()
+        return {DIRECTIONS[d]: self.ids[t] for d, t in enumerate(row) if t != NO_ROOM}
@@ -0,0 +1,212 @@
+import json
+import struct
+import zlib
+import numpy as np
+
+# Binary save games.
+# Usage:
+#   data = encode_save(world, enemy_rooms, item_rooms, compress=True)
+#   save = SaveGame(data)                        # reads the header, world state and room index only
+#   save.world["player"]                         # global state: player, explored rooms, chests, projectiles, ...
+#   save.enemy_records(room_id)                  # a room's section is decoded when first asked for
+# GameManager.save_game() and load_game() build and apply saves; F5 and F9 do so in game.
+#
+# The file is a header, the global world state as JSON, a fixed-width room index and
+# one section per room holding its enemies and items as packed tables. A room whose
+# enemies were never built has no enemy table and comes back from the level config;
+# one whose items were never rolled has no item table and is rolled from the item seed.
+# Sections above a small size are zlib-compressed one by one when compression is on,
+# so loading stays a header parse plus an index view, and rooms are decoded on demand.
+
+MAGIC = b"TRSV"
+FORMAT_VERSION = 1
+
+# magic, version, flags, room count, length of the world JSON
+HEADER = struct.Struct("<4sHHII")
+SAVE_FLAG_COMPRESSED = 1      # the world JSON is zlib-compressed
+
+ROOM_FLAG_ENEMIES = 1         # the section holds the room's enemies
+ROOM_FLAG_ITEMS = 2           # the section holds the room's items
+ROOM_FLAG_COMPRESSED = 4      # the section is zlib-compressed
+
+ENEMY_FLAG_HP_INT = 1
+ENEMY_FLAG_MAX_HP_INT = 2
+ENEMY_FLAG_SPEED_INT = 4
+ENEMY_FLAG_ATTACK_TIMER = 8   # the enemy has an attack_timer
+ENEMY_FLAG_HAS_ALERT = 16     # the enemy has an is_alert flag
+ENEMY_FLAG_ALERT = 32         # ...and it is set
+
+# Sections smaller than this are stored as is; zlib has nothing to gain on a few records.
+COMPRESS_MIN_BYTES = 256
+
+INDEX_DTYPE = np.dtype([
+    ("room_id", "<i4"), ("flags", "<u2"),
+    ("enemy_count", "<u4"), ("item_count", "<u4"),
+    ("offset", "<u8"), ("length", "<u4"),
+])
+ENEMY_DTYPE = np.dtype([("type", "<u2"), ("flags", "<u2"), ("x", "<i4"), ("y", "<i4"),
+                        ("hp", "<f8"), ("max_hp", "<f8"), ("speed", "<f8"), ("attack_timer", "<i4")])
+ITEM_DTYPE = np.dtype([("type", "<u2"), ("x", "<i4"), ("y", "<i4")])
+
+
+def _code(codes, name):
+    code = codes.get(name)
+    if code is None:
+        code = codes[name] = len(codes)
+    return code
+
+
+def _enemy_row(record, codes):
+    hp = record.get("hp", 1)
+    max_hp = record.get("max_hp", hp)
+    speed = record.get("speed", 1)
+    flags = ((ENEMY_FLAG_HP_INT if type(hp) is int else 0)
+             | (ENEMY_FLAG_MAX_HP_INT if type(max_hp) is int else 0)
+             | (ENEMY_FLAG_SPEED_INT if type(speed) is int else 0))
+    attack_timer = record.get("attack_timer")
+    if attack_timer is not None:
+        flags |= ENEMY_FLAG_ATTACK_TIMER
+    if "is_alert" in record:
+        flags |= ENEMY_FLAG_HAS_ALERT | (ENEMY_FLAG_ALERT if record["is_alert"] else 0)
+    x, y = record["pos"][:2]
+    return (_code(codes, record["type"]), flags, x, y, hp, max_hp, speed, attack_timer or 0)
+
+
+def encode_save(world, enemy_rooms, item_rooms, compress=True):
+    """Encode a save game and return the bytes.
+
+    world is JSON-serializable global state. enemy_rooms maps room ids to enemy
+    records (dicts with type, pos, hp, max_hp, speed and the optional
+    attack_timer and is_alert); item_rooms maps room ids to (type, (x, y)) records.
+    """
+    enemy_codes, item_codes = {}, {}
+    room_ids = list(dict.fromkeys([*item_rooms, *enemy_rooms]))
+    index = np.zeros(len(room_ids), dtype=INDEX_DTYPE)
+    sections = []
+    offset = 0
+    for slot, room_id in enumerate(room_ids):
+        flags = 0
+        raw = b""
+        enemies = enemy_rooms.get(room_id)
+        if enemies is not None:
+            flags |= ROOM_FLAG_ENEMIES
+            rows = [_enemy_row(record, enemy_codes) for record in enemies]
+            raw += np.array(rows, dtype=ENEMY_DTYPE).tobytes()
+            index[slot]["enemy_count"] = len(rows)
+        items = item_rooms.get(room_id)
+        if items is not None:
+            flags |= ROOM_FLAG_ITEMS
+            rows = [(_code(item_codes, item_type), pos[0], pos[1]) for item_type, pos in items]
+            raw += np.array(rows, dtype=ITEM_DTYPE).tobytes()
+            index[slot]["item_count"] = len(rows)
+        if compress and len(raw) >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(raw, 1)
+            if len(packed) < len(raw):
+                raw = packed
+                flags |= ROOM_FLAG_COMPRESSED
+        index[slot]["room_id"] = room_id
+        index[slot]["flags"] = flags
+        index[slot]["offset"] = offset
+        index[slot]["length"] = len(raw)
+        sections.append(raw)
+        offset += len(raw)
+
+    world = dict(world, enemy_types=list(enemy_codes), item_types=list(item_codes))
+    world_bytes = json.dumps(world, separators=(",", ":")).encode("utf-8")
+    save_flags = 0
+    if compress:
+        world_bytes = zlib.compress(world_bytes, 6)
+        save_flags |= SAVE_FLAG_COMPRESSED
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, save_flags, len(room_ids), len(world_bytes))
+    return b"".join([header, world_bytes, index.tobytes(), *sections])
+
+
+class SaveGame:
+    """A parsed save game whose room sections are decoded on demand"""
+
+    def __init__(self, data):
+        data = memoryview(data)
+        if len(data) < HEADER.size:
+            raise ValueError("save file is truncated")
+        magic, version, flags, room_count, world_length = HEADER.unpack(data[:HEADER.size])
+        if magic != MAGIC:
+            raise ValueError("not a save file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported save format version {version}")
+        start = HEADER.size
+        world_bytes = bytes(data[start:start + world_length])
+        if flags & SAVE_FLAG_COMPRESSED:
+            world_bytes = zlib.decompress(world_bytes)
+        self.world = json.loads(world_bytes)
+        start += world_length
+        self.index = np.frombuffer(data, dtype=INDEX_DTYPE, count=room_count, offset=start)
+        self._sections = data[start + self.index.nbytes:]
+        if room_count and int(self.index["offset"][-1]) + int(self.index["length"][-1]) > len(self._sections):
+            raise ValueError("save file is truncated")
+        self._slots = {room_id: slot for slot, room_id in enumerate(self.index["room_id"].tolist())}
+        self._enemy_types = self.world.get("enemy_types", [])
+        self._item_types = self.world.get("item_types", [])
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def room_ids(self):
+        return list(self._slots)
+
+    def enemy_room_ids(self):
+        """Return the rooms whose enemies are stored in the save"""
+        has_enemies = (self.index["flags"] & ROOM_FLAG_ENEMIES) != 0
+        return self.index["room_id"][has_enemies].tolist()
+
+    def item_room_ids(self):
+        has_items = (self.index["flags"] & ROOM_FLAG_ITEMS) != 0
+        return self.index["room_id"][has_items].tolist()
+
+    def _tables(self, room_id):
+        slot = self._slots.get(room_id)
+        if slot is None:
+            return None, None
+        record = self.index[slot]
+        offset, length = int(record["offset"]), int(record["length"])
+        raw = self._sections[offset:offset + length]
+        if record["flags"] & ROOM_FLAG_COMPRESSED:
+            raw = zlib.decompress(raw)
+        enemy_count, item_count = int(record["enemy_count"]), int(record["item_count"])
+        enemies = items = None
+        if record["flags"] & ROOM_FLAG_ENEMIES:
+            enemies = np.frombuffer(raw, dtype=ENEMY_DTYPE, count=enemy_count)
+        if record["flags"] & ROOM_FLAG_ITEMS:
+            items = np.frombuffer(raw, dtype=ITEM_DTYPE, count=item_count, offset=enemy_count * ENEMY_DTYPE.itemsize)
+        return enemies, items
+
+    def enemy_records(self, room_id):
+        """Return a room's saved enemy records, or None if its enemies come from the level config"""
+        enemies, _ = self._tables(room_id)
+        if enemies is None:
+            return None
+        records = []
+        for row in enemies.tolist():
+            type_code, flags, x, y, hp, max_hp, speed, attack_timer = row
+            record = {
+                "type": self._enemy_types[type_code],
+                "pos": [x, y],
+                "hp": int(hp) if flags & ENEMY_FLAG_HP_INT else hp,
+                "max_hp": int(max_hp) if flags & ENEMY_FLAG_MAX_HP_INT else max_hp,
+                "speed": int(speed) if flags & ENEMY_FLAG_SPEED_INT else speed,
+            }
+            if flags & ENEMY_FLAG_ATTACK_TIMER:
+                record["attack_timer"] = attack_timer
+            if flags & ENEMY_FLAG_HAS_ALERT:
+                record["is_alert"] = bool(flags & ENEMY_FLAG_ALERT)
+            records.append(record)
+        return records
+
+    def item_records(self, room_id):
+        """Return a room's saved (type, (x, y)) item records, or None if the save has none for it"""
+        _, items = self._tables(room_id)
+        if items is None:
+            return None
+        item_types = self._item_types
+        return [(item_types[type_code], (x, y)) for type_code, x, y in items.tolist()]
@@ -0,0 +1,95 @@
+import time
+
+UNTHROTTLED = "unthrottled"
+
+
+class FixedStepClock:
+    """Fixed-timestep accumulator that decouples simulation ticks from rendered frames.
+
+    The simulation always advances in ticks of 1 / tick_rate seconds. Each frame,
+    real elapsed time multiplied by the speed factor is added to an accumulator and
+    drained in whole ticks; the remainder becomes the interpolation alpha used when
+    rendering. With speed "unthrottled" the clock runs ticks back to back for a
+    fixed wall-clock budget per frame instead.
+    """
+
+    def __init__(self, tick_rate=60, speed=1.0, max_steps_per_frame=8, render_every=1,
+                 unthrottled_budget=1.0 / 30):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps_per_frame = max(1, int(max_steps_per_frame))
+        self.render_every = max(1, int(render_every))
+        self.unthrottled_budget = unthrottled_budget
+        self.unthrottled = False
+        self.speed = 1.0
+        self.set_speed(speed)
+        self.alpha = 1.0
+        self.last_step = False
+        self.frame = 0
+        self.ticks = 0
+        self.dropped_time = 0.0
+        self._accumulator = 0.0
+        self._last_time = None
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Create a clock from the "simulation" section of the game config"""
+        sim_config = dict(config.get("simulation", {}))
+        sim_config.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(
+            tick_rate=sim_config.get("tick_rate", 60),
+            speed=sim_config.get("speed", 1.0),
+            max_steps_per_frame=sim_config.get("max_steps_per_frame", 8),
+            render_every=sim_config.get("render_every", 1),
+        )
+
+    def set_speed(self, speed):
+        """Set the simulation rate multiplier: a number such as 1 or 4, or "unthrottled" / 0 to run flat out"""
+        if speed in (None, 0, UNTHROTTLED, "max"):
+            self.unthrottled = True
+            self.speed = float("inf")
+        else:
+            self.unthrottled = False
+            self.speed = float(speed)
+        self._accumulator = 0.0
+
+    def reset(self):
+        """Forget accumulated time, e.g. after a pause or a screen change"""
+        self._accumulator = 0.0
+        self._last_time = None
+
+    def steps(self):
+        """Yield once per simulation tick to run this frame; last_step is True before the final one"""
+        now = time.perf_counter()
+        if self._last_time is None:
+            self._last_time = now - self.dt / max(self.speed, 1e-9)
+        elapsed = now - self._last_time
+        self._last_time = now
+        self.frame += 1
+
+        if self.unthrottled:
+            self.alpha = 1.0
+            deadline = now + self.unthrottled_budget
+            while True:
+                self.last_step = False
+                yield self.ticks
+                self.ticks += 1
+                if time.perf_counter() >= deadline:
+                    return
+
+        self._accumulator += elapsed * self.speed
+        count = int(self._accumulator / self.dt)
+        if count > self.max_steps_per_frame:
+            self.dropped_time += (count - self.max_steps_per_frame) * self.dt
+            self._accumulator -= (count - self.max_steps_per_frame) * self.dt
+            count = self.max_steps_per_frame
+        for i in range(count):
+            self._accumulator -= self.dt
+            self.last_step = i == count - 1
+            yield self.ticks
+            self.ticks += 1
+        self.alpha = min(1.0, max(0.0, self._accumulator / self.dt))
+
+    def should_render(self):
+        """Return True when this frame should be drawn under the render decimation setting"""
+        return self.frame % self.render_every == 0
@@ -0,0 +1,148 @@
+import itertools
+import numpy as np
+
+# Uniform-grid broadphase for axis-aligned boxes.
+# Usage:
+#   grid = SpatialHash(cell_size=64)
+#   grid.rebuild_rects([enemy.rect for enemy in enemies])
+#   for index in grid.query(player_rect):
+#       ...enemies[index] overlaps player_rect...
+#
+# The grid is "loose": every box is filed under the cell holding its top-left corner
+# and queries widen their cell range by the largest box, so a rebuild is a single
+# vectorized sort and each query only looks at the cells around it. Counters record
+# how many candidates the cells produced versus how many actually overlapped.
+
+
+def rect_arrays(rects):
+    """Convert pg.Rect objects into x, y, width and height int64 arrays"""
+    rects = list(rects)
+    boxes = np.fromiter(itertools.chain.from_iterable(rects), dtype=np.int64,
+                        count=len(rects) * 4).reshape(-1, 4)
+    return boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+
+
+class SpatialHash:
+    """Loose uniform grid over a set of boxes, rebuilt in one vectorized pass"""
+
+    def __init__(self, cell_size=64):
+        self.cell_size = max(1, int(cell_size))
+        self.queries = 0
+        self.candidates = 0
+        self.hits = 0
+        self.rebuilds = 0
+        self.clear()
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """Remove every entry"""
+        empty = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._x = self._y = self._w = self._h = empty
+        self._order = self._keys = empty
+        self._max_w = self._max_h = 0
+        self._min_cx = self._min_cy = 0
+        self._cols = self._rows = 0
+
+    def rebuild(self, x, y, w, h):
+        """Replace the contents with boxes given as x, y, width and height arrays; entry i is box i"""
+        self.rebuilds += 1
+        self._count = len(x)
+        if self._count == 0:
+            self.clear()
+            return
+        self._x = np.asarray(x, dtype=np.int64)
+        self._y = np.asarray(y, dtype=np.int64)
+        self._w = np.asarray(w, dtype=np.int64)
+        self._h = np.asarray(h, dtype=np.int64)
+        cx = self._x // self.cell_size
+        cy = self._y // self.cell_size
+        self._min_cx = int(cx.min())
+        self._min_cy = int(cy.min())
+        self._cols = int(cx.max()) - self._min_cx + 1
+        self._rows = int(cy.max()) - self._min_cy + 1
+        keys = (cy - self._min_cy) * self._cols + (cx - self._min_cx)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+        self._max_w = int(self._w.max())
+        self._max_h = int(self._h.max())
+
+    def rebuild_rects(self, rects):
+        """Replace the contents with pg.Rect boxes"""
+        self.rebuild(*rect_arrays(rects))
+
+    def query(self, rect):
+        """Return the indices of entries overlapping the rect, in ascending (insertion) order"""
+        self.queries += 1
+        if self._count == 0 or rect.width <= 0 or rect.height <= 0:
+            return np.zeros(0, dtype=np.int64)
+        cs = self.cell_size
+        # An entry filed at (cx, cy) can reach at most max_w / max_h past its cell's corner.
+        cx0 = max((rect.left - self._max_w) // cs - self._min_cx, 0)
+        cx1 = min((rect.right - 1) // cs - self._min_cx, self._cols - 1)
+        cy0 = max((rect.top - self._max_h) // cs - self._min_cy, 0)
+        cy1 = min((rect.bottom - 1) // cs - self._min_cy, self._rows - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.zeros(0, dtype=np.int64)
+        row_starts = np.arange(cy0, cy1 + 1) * self._cols
+        lo = np.searchsorted(self._keys, row_starts + cx0, side="left")
+        hi = np.searchsorted(self._keys, row_starts + cx1, side="right")
+        spans = [self._order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        if not spans:
+            return np.zeros(0, dtype=np.int64)
+        found = np.concatenate(spans) if len(spans) > 1 else spans[0]
+        self.candidates += len(found)
+        x, y = self._x[found], self._y[found]
+        hit = ((x < rect.right) & (x + self._w[found] > rect.left)
+               & (y < rect.bottom) & (y + self._h[found] > rect.top)
+               & (self._w[found] > 0) & (self._h[found] > 0))
+        found = np.sort(found[hit])
+        self.hits += len(found)
+        return found
+
+    def query_boxes(self, x, y, w, h):
+        """Return (query, entry) index arrays of the overlapping pairs between boxes given as arrays and the entries.
+
+        Every box is tested against every entry in one vectorized pass, which is
+        cheaper than one query per box for the few boxes a tick brings; pairs
+        are sorted by query and then by entry.
+        """
+        self.queries += len(x)
+        if self._count == 0 or len(x) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        x = np.asarray(x, dtype=np.int64)[:, None]
+        y = np.asarray(y, dtype=np.int64)[:, None]
+        w = np.asarray(w, dtype=np.int64)[:, None]
+        h = np.asarray(h, dtype=np.int64)[:, None]
+        self.candidates += len(x) * self._count
+        hit = ((self._x < x + w) & (self._x + self._w > x)
+               & (self._y < y + h) & (self._y + self._h > y)
+               & (self._w > 0) & (self._h > 0) & (w > 0) & (h > 0))
+        queries, entries = np.nonzero(hit)
+        self.hits += len(queries)
+        return queries, entries
+
+    def get_stats(self):
+        """Return query counters: candidates are entries tested exactly, hits the ones that overlapped"""
+        return {
+            "entries": self._count,
+            "rebuilds": self.rebuilds,
+            "queries": self.queries,
+            "candidates": self.candidates,
+            "hits": self.hits,
+        }
+
+    def reset_stats(self):
+        self.queries = self.candidates = self.hits = self.rebuilds = 0
+
+
+def merge_stats(*stats):
+    """Add up the counters of several SpatialHash.get_stats() results"""
+    total = {}
+    for entry in stats:
+        for key, value in entry.items():
+            total[key] = total.get(key, 0) + value
+    return total
@@ -0,0 +1,160 @@
+import sys
+import zlib
+from array import array
+import numpy as np
+from src.projectile_pool import OWNER_PLAYER
+
+# Per-tick simulation state hashes.
+# Usage:
+#   hashes = game.state_hashes()              # one 64-bit hash per name in SUBSYSTEMS
+#   game.hash_log = StateHashLog()            # GameManager.update then appends every tick's hashes
+#   game.hash_log.save("run.hashes")
+#   python -m src.state_hash a.hashes b.hashes   # first tick and subsystems where two runs differ
+# main.py and python -m src.replay write a log with --hash-log PATH.
+#
+# Hashes are built with Python's hash() of tuples of numbers, which is the same in every
+# process (strings and None, whose hashes are not, are swapped for fixed codes first), so
+# logs from separate runs can be compared. A group of entities hashes to the sum of its
+# members' hashes modulo 2**64: order does not matter and one entity can be swapped out
+# without touching the rest. Enemies and items only change in the room in play, so each
+# manager keeps the running sum of the entries of the rooms left (see _set_frozen) and
+# per tick only rehashes the room in play. Projectiles are hashed straight from the
+# pool's arrays. HUD-only game_state keys are left out so a replay matches a live run.
+
+SUBSYSTEMS = ("player", "bullets", "enemies", "projectiles", "items", "game_state")
+HASH_MASK = (1 << 64) - 1
+# A saved log: the game tick and each subsystem's hash, one row per tick.
+LOG_DTYPE = np.dtype([("tick", "<u8")] + [(name, "<u8") for name in SUBSYSTEMS])
+
+# game_state keys that only drive the HUD.
+PRESENTATION_KEYS = ("tip_text", "tip_timer")
+
+# Stand-in for None, whose hash is its address before Python 3.12.
+NONE_CODE = 0x6A09E667F3BCC909
+
+# Values swapped for fixed codes before hashing: None, and every string seen so far.
+_codes = {None: NONE_CODE}
+
+
+def string_code(value):
+    """Return the fixed code a string is hashed as"""
+    code = _codes.get(value)
+    if code is None:
+        code = _codes[value] = zlib.crc32(value.encode("utf-8")) << 32
+    return code
+
+
+def stable_key(values):
+    """Return a flat sequence of numbers, strings and None as a tuple whose hash is the same in every process"""
+    key = tuple(map(_codes.get, values, values))
+    if str in map(type, key):
+        key = tuple(string_code(value) if type(value) is str else value for value in key)
+    return key
+
+
+def value_hash(values):
+    return hash(stable_key(values)) & HASH_MASK
+
+
+def room_hash(room_id, rows):
+    """Hash a room's entities, one flat row of values each, independent of their order; 0 for no entities"""
+    total = 0
+    for row in rows:
+        total += hash(stable_key(row))
+    return hash((room_id, total & HASH_MASK)) & HASH_MASK if total else 0
+
+
+def game_state_hash(game_state):
+    return value_hash([part for key in sorted(game_state) if key not in PRESENTATION_KEYS
+                       for part in (key, game_state[key])])
+
+
+def projectile_hashes(pool):
+    """Return the hashes of the player's bullets and of the enemy projectiles in a ProjectilePool"""
+    active = pool.active
+    if not active.any():
+        return 0, 0
+    bullets = projectiles = 0
+    # A handful of projectiles are live at a time, too few for vectorized hashing to pay off.
+    for x, y, vx, vy, timer, owner in zip(pool.x[active].tolist(), pool.y[active].tolist(),
+                                          pool.vx[active].tolist(), pool.vy[active].tolist(),
+                                          pool.timer[active].tolist(), pool.owner[active].tolist()):
+        if owner == OWNER_PLAYER:
+            bullets += hash((x, y, vx, vy, timer))
+        else:
+            projectiles += hash((x, y, vx, vy, timer))
+    return bullets & HASH_MASK, projectiles & HASH_MASK
+
+
+class StateHashLog:
+    """The state hashes of consecutive ticks, with the game tick each was taken at"""
+
+    def __init__(self):
+        self._values = array("Q")
+
+    def __len__(self):
+        return len(self._values) // (len(SUBSYSTEMS) + 1)
+
+    def append(self, tick, hashes):
+        self._values.append(tick)
+        self._values.extend(hashes)
+
+    def to_array(self):
+        """Return the log as a structured array with a tick field and one field per subsystem"""
+        return np.frombuffer(self._values, dtype=LOG_DTYPE).copy()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.save(f, self.to_array())
+
+
+def load_log(path):
+    """Read a log written by StateHashLog.save as a structured array"""
+    log = np.load(path)
+    if log.dtype.names != LOG_DTYPE.names:
+        raise ValueError(f"{path} is not a state hash log")
+    return log
+
+
+def first_divergence(a, b):
+    """Return (row, names of the subsystems that differ) for the first tick two logs disagree on, or None.
+
+    Rows are compared in order, so both logs must start at the same point of the same run.
+    """
+    count = min(len(a), len(b))
+    differs = np.zeros(count, dtype=bool)
+    for name in SUBSYSTEMS:
+        differs |= a[name][:count] != b[name][:count]
+    rows = np.flatnonzero(differs)
+    if not len(rows):
+        return None
+    row = int(rows[0])
+    return row, [name for name in SUBSYSTEMS if a[name][row] != b[name][row]]
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Find the first tick where two state hash logs differ")
+    parser.add_argument("a")
+    parser.add_argument("b")
+    args = parser.parse_args(argv)
+
+    a, b = load_log(args.a), load_log(args.b)
+    divergence = first_divergence(a, b)
+    if divergence is None:
+        count = min(len(a), len(b))
+        print(f"identical for {count} ticks")
+        if len(a) != len(b):
+            longer = args.a if len(a) > len(b) else args.b
+            print(f"{longer} goes on for {abs(len(a) - len(b))} more ticks")
+        return 0
+    row, names = divergence
+    print(f"first divergence at update {row} (game tick {int(a['tick'][row])} / {int(b['tick'][row])}): "
+          f"{', '.join(names)}")
+    if row:
+        print(f"update {row - 1} matches (game tick {int(a['tick'][row - 1])})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The game loads its config and assets relative to the repo root.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.headless import create_headless_game  # noqa: E402
+
+
+@pytest.fixture
+def game(monkeypatch):
+    """A headless GameManager on the bundled level with a fixed item seed"""
+    monkeypatch.chdir(ROOT)
+    game = create_headless_game(seed=1)
+    yield game
+    game.writer.close()
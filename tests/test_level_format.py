@@ -0,0 +1,54 @@
+import json
+
+from src.level_format import CompiledLevel, LazyRooms, compile_level, enemy_counts
+
+
+def _rooms_config():
+    return {
+        "rooms": [
+            {"room_id": 1, "walls": [], "enemies": [{"type": "slime", "pos": [10, 10]},
+                                                    {"type": "bat", "pos": [20, 20], "hp": 30}]},
+            {"room_id": 2, "walls": [], "enemies": [{"type": "slime", "pos": [30, 30]}]},
+            # Not tabular: stored as JSON extras instead of rows of the enemy table.
+            {"room_id": 3, "walls": [], "enemies": [{"type": "wizard", "pos": [40, 40], "max_hp": 50}]},
+            {"room_id": 4, "walls": []},
+        ],
+        "room_neighbors": {},
+    }
+
+
+def _lazy_rooms(tmp_path):
+    path = tmp_path / "level.bin"
+    path.write_bytes(compile_level(_rooms_config()))
+    return LazyRooms(CompiledLevel(str(path)))
+
+
+def test_enemy_counts_read_the_compiled_table_without_decoding(tmp_path):
+    rooms = _lazy_rooms(tmp_path)
+    assert enemy_counts(rooms) == {"slime": 2, "bat": 1, "wizard": 1}
+    assert rooms.decoded == 0
+
+
+def test_enemy_counts_use_decoded_rooms_as_changed(tmp_path):
+    rooms = _lazy_rooms(tmp_path)
+    rooms[1]["enemies"] = [{"type": "guard", "pos": [0, 0]}] * 3
+    assert enemy_counts(rooms) == {"slime": 1, "bat": 1, "wizard": 1, "guard": 3}
+    assert enemy_counts(_rooms_config()["rooms"]) == {"slime": 2, "bat": 1, "wizard": 1}
+
+
+def test_enemy_totals_keep_the_level_lazy(game):
+    rooms = game.rooms_config["rooms"]
+    decoded = rooms.decoded
+    assert decoded < len(rooms)
+
+    totals = game.get_current_enemy_totals()
+
+    assert rooms.decoded == decoded
+    with open("config/rooms_config.json", encoding="utf-8") as f:
+        source = json.load(f)["rooms"]
+    expected = {enemy_type: 0 for enemy_type in totals}
+    for room in source:
+        for enemy in room.get("enemies", []):
+            if enemy["type"].lower() in expected:
+                expected[enemy["type"].lower()] += 1
+    assert totals == expected
@@ -0,0 +1,43 @@
+from src.enemies.wizard import Wizard
+from src.headless import create_headless_game
+from src.projectile_pool import OWNER_ENEMY, OWNER_PLAYER
+
+
+def _arm(game):
+    """Put wizards in the player's room and give the player a gun, so bullets and fireballs fly"""
+    for i in range(6):
+        game.enemy_manager.active_group.add(Wizard(200 + 80 * i, 120 + 60 * (i % 2)))
+    game.player.has_gun = True
+    game.player.ammo = 1000
+    health = game.player.health_system
+    health.max_health = health.current_health = 10 ** 6
+
+
+def _action(tick):
+    return {"left" if tick % 40 < 20 else "right": True, "shoot": True}
+
+
+def test_load_mid_volley_keeps_the_hash_stream(game, tmp_path):
+    _arm(game)
+    tick = 0
+    pool = game.projectile_pool
+    while not (pool.count(OWNER_PLAYER) and pool.count(OWNER_ENEMY)):
+        game.step(_action(tick))
+        tick += 1
+        assert tick < 600, "no volley in flight"
+    path = str(tmp_path / "volley.sav")
+    game.save_game(path)
+    game.writer.flush()
+
+    loaded = create_headless_game(seed=1)
+    try:
+        assert loaded.load_game(path)
+        assert loaded.projectile_pool.count(OWNER_ENEMY) == pool.count(OWNER_ENEMY)
+        assert loaded.projectile_pool.count(OWNER_PLAYER) == pool.count(OWNER_PLAYER)
+        assert loaded.state_hashes() == game.state_hashes()
+        for step in range(300):
+            game.step(_action(tick + step))
+            loaded.step(_action(tick + step))
+            assert loaded.state_hashes() == game.state_hashes(), f"diverged {step + 1} ticks after the load"
+    finally:
+        loaded.writer.close()
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from src.headless import create_headless_game
+from src.projectile_pool import OWNER_ENEMY, OWNER_PLAYER
+from src.state_hash import StateHashLog, first_divergence
+
+LEVEL = {"wizard": 60, "slime": 20, "bat": 20}
+
+
+def _prepare(game):
+    game.randomize_enemies(LEVEL, 3, write_config=False)
+    game.enemy_manager.reset_all_enemies()
+    game.enemy_manager.activate_room(game.player.current_room)
+    game.new_world_epoch()
+
+
+def _step(game, tick):
+    """Step with the gun firing; every 60 ticks the player is put in a doorway and walks through it"""
+    phase = tick % 60
+    if phase == 50:
+        room = game.player.current_room
+        gaps = sorted((direction, gap) for direction, gap in game.get_current_room().get("gaps", {}).items()
+                      if game.room_registry.neighbor(room, direction) is not None)
+        direction, gap = random.Random(tick).choice(gaps)
+        player, radius = game.player, game.player.radius
+        player.x, player.y = {
+            "left": (gap[0] + radius, (gap[1] + gap[2]) // 2),
+            "right": (gap[0] - radius, (gap[1] + gap[2]) // 2),
+            "top": ((gap[0] + gap[1]) // 2, gap[2] + radius),
+            "bottom": ((gap[0] + gap[1]) // 2, gap[2] - radius),
+        }[direction]
+        game.doorway = {"left": "left", "right": "right", "top": "up", "bottom": "down"}[direction]
+    if phase >= 50:
+        action = {game.doorway: True}
+    else:
+        action = {"left" if tick % 40 < 20 else "down": True}
+    action["shoot"] = True
+    game.step(action)
+
+
+def _in_volley(game, tick):
+    pool = game.projectile_pool
+    return tick % 60 < 40 and pool.count(OWNER_PLAYER) and pool.count(OWNER_ENEMY)
+
+
+def _before_leaving_a_new_room(game, tick):
+    # The next step walks through a doorway of a room that was not left before.
+    return tick % 60 == 50 and game.player.current_room not in game.item_manager.frozen_room_ids()
+
+
+@pytest.mark.parametrize("save_point", [_in_volley, _before_leaving_a_new_room])
+def test_hash_stream_continues_across_a_load(game, tmp_path, save_point):
+    _prepare(game)
+    game.player.has_gun = True
+    game.player.ammo = 10 ** 4
+    health = game.player.health_system
+    health.max_health = health.current_health = 10 ** 6
+    tick = 0
+    # Save at the given save point once a few rooms were left.
+    while not (len(game.enemy_manager.frozen_room_ids()) >= 3 and save_point(game, tick)):
+        _step(game, tick)
+        tick += 1
+        assert tick < 3000, "no save point found"
+    path = str(tmp_path / "run.sav")
+    game.save_game(path)
+    game.writer.flush()
+
+    loaded = create_headless_game(seed=1)
+    try:
+        _prepare(loaded)
+        assert loaded.load_game(path)
+        game.hash_log, loaded.hash_log = StateHashLog(), StateHashLog()
+        rooms = set()
+        for step in range(600):
+            _step(game, tick + step)
+            _step(loaded, tick + step)
+            rooms.add(game.player.current_room)
+        assert len(rooms) > 2
+        assert first_divergence(game.hash_log.to_array(), loaded.hash_log.to_array()) is None
+    finally:
+        loaded.writer.close()